@@ -1,5 +1,6 @@
 from logging.config import fileConfig
 import os
+import re
 import sys
 from dotenv import load_dotenv
 from sqlalchemy import engine_from_config, pool
@@ -28,6 +29,15 @@ from app.auth.models.token_models import AccessToken, RefreshToken
 
 target_metadata = Base.metadata
 
+# Token table partitions are managed at runtime by the partition maintenance task, not by autogenerate
+PARTITION_TABLE_PATTERN = re.compile(r"^(access|refresh)_tokens_(p\d{8}|default)$")
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    if type_ == "table" and reflected and PARTITION_TABLE_PATTERN.match(name):
+        return False
+    return True
+
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode."""
     url = config.get_main_option("sqlalchemy.url")
@@ -36,6 +46,7 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        include_object=include_object,
     )
     with context.begin_transaction():
         context.run_migrations()
@@ -49,7 +60,7 @@ def run_migrations_online() -> None:
     )
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection, target_metadata=target_metadata, include_object=include_object
         )
         with context.begin_transaction():
             context.run_migrations()
@@ -0,0 +1,149 @@
+"""partition token tables by expires_at
+
+Revision ID: 9e4b2f61c7d8
+Revises: 5c1e7d92b4a3
+Create Date: 2026-10-18 10:03:47.215904
+
+Converts access_tokens and refresh_tokens into tables range-partitioned by expires_at with one
+partition per UTC day plus a DEFAULT partition as a safety net. Only unexpired rows are copied.
+Partitioning requires the partition key in every unique constraint, so the primary keys become
+(id, expires_at) and token uniqueness becomes (token, expires_at). refresh_tokens.access_token_id
+can no longer be a foreign key (access_tokens.id alone is not unique), so it is kept as a plain
+indexed column.
+"""
+from datetime import date, datetime, timedelta, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9e4b2f61c7d8'
+down_revision: Union[str, None] = '5c1e7d92b4a3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PRECREATE_DAYS = 14
+
+COLUMNS = {
+    'access_tokens': 'id, user_id, token, created_at, expires_at',
+    'refresh_tokens': 'id, user_id, access_token_id, token, family_id, created_at, expires_at',
+}
+
+TABLE_DEFINITIONS = {
+    'access_tokens': """
+        id INTEGER NOT NULL DEFAULT nextval('access_tokens_id_seq'),
+        user_id INTEGER NOT NULL,
+        token VARCHAR NOT NULL,
+        created_at TIMESTAMP WITH TIME ZONE NOT NULL,
+        expires_at TIMESTAMP WITH TIME ZONE NOT NULL
+    """,
+    'refresh_tokens': """
+        id INTEGER NOT NULL DEFAULT nextval('refresh_tokens_id_seq'),
+        user_id INTEGER NOT NULL,
+        access_token_id INTEGER,
+        token VARCHAR NOT NULL,
+        family_id VARCHAR(32),
+        created_at TIMESTAMP WITH TIME ZONE NOT NULL,
+        expires_at TIMESTAMP WITH TIME ZONE NOT NULL
+    """,
+}
+
+
+def _create_daily_partition(table: str, day: date) -> None:
+    op.execute(
+        f"CREATE TABLE {table}_p{day:%Y%m%d} PARTITION OF {table} "
+        f"FOR VALUES FROM ('{day.isoformat()} 00:00:00+00') TO ('{(day + timedelta(days=1)).isoformat()} 00:00:00+00')"
+    )
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    today = datetime.now(timezone.utc).date()
+
+    # Move the plain tables aside; their sequences are reused by the partitioned tables
+    for table in ('refresh_tokens', 'access_tokens'):
+        op.execute(f'ALTER TABLE {table} RENAME TO {table}_legacy')
+        op.execute(f'ALTER SEQUENCE {table}_id_seq OWNED BY NONE')
+
+    for table in ('access_tokens', 'refresh_tokens'):
+        op.execute(f'CREATE TABLE {table} ({TABLE_DEFINITIONS[table]}) PARTITION BY RANGE (expires_at)')
+        op.execute(f'CREATE TABLE {table}_default PARTITION OF {table} DEFAULT')
+        last_expiry = bind.execute(
+            sa.text(f'SELECT max(expires_at) FROM {table}_legacy WHERE expires_at > now()')
+        ).scalar()
+        last_day = max(today + timedelta(days=PRECREATE_DAYS), last_expiry.date() if last_expiry else today)
+        day = today
+        while day <= last_day:
+            _create_daily_partition(table, day)
+            day += timedelta(days=1)
+        op.execute(
+            f'INSERT INTO {table} ({COLUMNS[table]}) '
+            f'SELECT {COLUMNS[table]} FROM {table}_legacy WHERE expires_at > now()'
+        )
+
+    op.execute('DROP TABLE refresh_tokens_legacy')
+    op.execute('DROP TABLE access_tokens_legacy')
+
+    op.create_primary_key('access_tokens_pkey', 'access_tokens', ['id', 'expires_at'])
+    op.create_unique_constraint('uq_access_tokens_token_expires_at', 'access_tokens', ['token', 'expires_at'])
+    op.create_foreign_key(
+        'access_tokens_user_id_fkey', 'access_tokens', 'users', ['user_id'], ['id'], ondelete='CASCADE'
+    )
+    op.create_index(op.f('ix_access_tokens_user_id'), 'access_tokens', ['user_id'], unique=False)
+
+    op.create_primary_key('refresh_tokens_pkey', 'refresh_tokens', ['id', 'expires_at'])
+    op.create_unique_constraint('uq_refresh_tokens_token_expires_at', 'refresh_tokens', ['token', 'expires_at'])
+    op.create_foreign_key(
+        'refresh_tokens_user_id_fkey', 'refresh_tokens', 'users', ['user_id'], ['id'], ondelete='CASCADE'
+    )
+    op.create_index(op.f('ix_refresh_tokens_user_id'), 'refresh_tokens', ['user_id'], unique=False)
+    op.create_index(op.f('ix_refresh_tokens_access_token_id'), 'refresh_tokens', ['access_token_id'], unique=False)
+    op.create_index(op.f('ix_refresh_tokens_family_id'), 'refresh_tokens', ['family_id'], unique=False)
+
+    for table in ('access_tokens', 'refresh_tokens'):
+        op.execute(f'ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id')
+
+
+def downgrade() -> None:
+    for table in ('refresh_tokens', 'access_tokens'):
+        op.execute(f'ALTER TABLE {table} RENAME TO {table}_partitioned')
+        op.execute(f'ALTER SEQUENCE {table}_id_seq OWNED BY NONE')
+
+    for table in ('access_tokens', 'refresh_tokens'):
+        op.execute(f'CREATE TABLE {table} ({TABLE_DEFINITIONS[table]})')
+        op.execute(
+            f'INSERT INTO {table} ({COLUMNS[table]}) SELECT {COLUMNS[table]} FROM {table}_partitioned'
+        )
+    op.execute('DROP TABLE refresh_tokens_partitioned')
+    op.execute('DROP TABLE access_tokens_partitioned')
+
+    op.create_primary_key('access_tokens_pkey', 'access_tokens', ['id'])
+    op.create_foreign_key(
+        'access_tokens_user_id_fkey', 'access_tokens', 'users', ['user_id'], ['id'], ondelete='CASCADE'
+    )
+    op.create_index(op.f('ix_access_tokens_id'), 'access_tokens', ['id'], unique=False)
+    op.create_index(op.f('ix_access_tokens_token'), 'access_tokens', ['token'], unique=True)
+    op.create_index(op.f('ix_access_tokens_user_id'), 'access_tokens', ['user_id'], unique=False)
+
+    op.create_primary_key('refresh_tokens_pkey', 'refresh_tokens', ['id'])
+    op.execute(
+        'UPDATE refresh_tokens SET access_token_id = NULL '
+        'WHERE access_token_id IS NOT NULL AND access_token_id NOT IN (SELECT id FROM access_tokens)'
+    )
+    op.create_foreign_key(
+        'refresh_tokens_user_id_fkey', 'refresh_tokens', 'users', ['user_id'], ['id'], ondelete='CASCADE'
+    )
+    op.create_foreign_key(
+        'refresh_tokens_access_token_id_fkey', 'refresh_tokens', 'access_tokens',
+        ['access_token_id'], ['id'], ondelete='CASCADE'
+    )
+    op.create_index(op.f('ix_refresh_tokens_id'), 'refresh_tokens', ['id'], unique=False)
+    op.create_index(op.f('ix_refresh_tokens_token'), 'refresh_tokens', ['token'], unique=True)
+    op.create_index(op.f('ix_refresh_tokens_user_id'), 'refresh_tokens', ['user_id'], unique=False)
+    op.create_index(op.f('ix_refresh_tokens_access_token_id'), 'refresh_tokens', ['access_token_id'], unique=False)
+    op.create_index(op.f('ix_refresh_tokens_family_id'), 'refresh_tokens', ['family_id'], unique=False)
+
+    for table in ('access_tokens', 'refresh_tokens'):
+        op.execute(f'ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id')
@@ -0,0 +1,32 @@
+"""add users created_at id index
+
+Revision ID: b7d3e5a19f42
+Revises: 9e4b2f61c7d8
+Create Date: 2026-10-18 11:26:09.581337
+
+Index backing the keyset pagination of the user listing. Built concurrently so the users
+table stays writable while it is created.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d3e5a19f42'
+down_revision: Union[str, None] = '9e4b2f61c7d8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_users_created_at_id', 'users', ['created_at', 'id'], unique=False, postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_users_created_at_id', table_name='users', postgresql_concurrently=True)
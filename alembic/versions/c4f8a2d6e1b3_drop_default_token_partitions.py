@@ -0,0 +1,47 @@
+"""drop default token partitions
+
+Revision ID: c4f8a2d6e1b3
+Revises: b7d3e5a19f42
+Create Date: 2026-10-18 16:42:11.903517
+
+Removes the DEFAULT partitions of access_tokens and refresh_tokens. Postgres refuses
+DETACH PARTITION ... CONCURRENTLY on a table that has one, so expired partitions could only be
+detached under an ACCESS EXCLUSIVE lock on the parent. Expired rows stranded in the default
+partitions (which nothing ever pruned) are deleted; live ones are moved into daily partitions,
+created as needed. Daily partitions are pre-created further ahead than any token lifetime.
+"""
+from datetime import timedelta
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4f8a2d6e1b3'
+down_revision: Union[str, None] = 'b7d3e5a19f42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    for table in ('access_tokens', 'refresh_tokens'):
+        op.execute(f'ALTER TABLE {table} DETACH PARTITION {table}_default')
+        op.execute(f'DELETE FROM {table}_default WHERE expires_at <= now()')
+        days = bind.execute(
+            sa.text(f"SELECT DISTINCT (expires_at AT TIME ZONE 'UTC')::date FROM {table}_default")
+        ).scalars().all()
+        for day in days:
+            op.execute(
+                f"CREATE TABLE IF NOT EXISTS {table}_p{day:%Y%m%d} PARTITION OF {table} "
+                f"FOR VALUES FROM ('{day.isoformat()} 00:00:00+00') "
+                f"TO ('{(day + timedelta(days=1)).isoformat()} 00:00:00+00')"
+            )
+        op.execute(f'INSERT INTO {table} SELECT * FROM {table}_default')
+        op.execute(f'DROP TABLE {table}_default')
+
+
+def downgrade() -> None:
+    for table in ('access_tokens', 'refresh_tokens'):
+        op.execute(f'CREATE TABLE {table}_default PARTITION OF {table} DEFAULT')
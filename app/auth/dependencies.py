@@ -1,21 +1,42 @@
-from fastapi import Depends, Security
+from typing import Callable, Optional
+
+from fastapi import Depends, Request, Security
 from fastapi.security import APIKeyHeader
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.auth.exceptions import AuthenticationRequiredException, InvalidTokenException
+from app.auth.exceptions import (
+    AdminRequiredException,
+    AuthenticationRequiredException,
+    InvalidTokenException,
+    PermissionDeniedException,
+)
+from app.auth.permissions import permission_registry
 from app.auth.services.auth_services import AuthService
 from app.auth.utils.token_utils import TokenUtils
-from app.dependencies import get_db
+from app.config.config import settings
+from app.dependencies import get_db, get_optional_redis_cache, get_read_db
 from app.exceptions import raise_predefined_http_exception
-from app.user.models.user_models import User
-from app.user.services.user_services import UserService
+from app.integrations.database import release_connection
+from app.integrations.redis_cache import RedisCache
+from app.user.schemas.user_schemas import UserPrincipal
 
 # Use APIKeyHeader to make Authorization required and properly described in OpenAPI
 authorization_scheme = APIKeyHeader(name="Authorization", auto_error=False, description="Bearer access token")
 
 
-def get_auth_service(session: AsyncSession = Depends(get_db)) -> AuthService:
-    return AuthService(session=session)
+def get_auth_service(
+    session: AsyncSession = Depends(get_db),
+    cache: Optional[RedisCache] = Depends(get_optional_redis_cache),
+) -> AuthService:
+    return AuthService(session=session, cache=cache)
+
+
+def get_read_auth_service(
+    session: AsyncSession = Depends(get_read_db),
+    cache: Optional[RedisCache] = Depends(get_optional_redis_cache),
+) -> AuthService:
+    """Auth service on a read-only (replica) session, for request authentication."""
+    return AuthService(session=session, cache=cache)
 
 
 def get_authorization_token(authorization: str = Security(authorization_scheme)) -> str:
@@ -25,12 +46,45 @@ def get_authorization_token(authorization: str = Security(authorization_scheme))
 
 
 async def get_current_user(
+    request: Request,
     token: str = Depends(get_authorization_token),
-    session: AsyncSession = Depends(get_db),
-) -> User:
+    auth_service: AuthService = Depends(get_read_auth_service),
+) -> UserPrincipal:
     decoded = await TokenUtils.decode_token(token)
     if not decoded or "user_id" not in decoded:
         raise_predefined_http_exception(InvalidTokenException())
-    user_service = UserService(session=session)
-    user = await user_service.get_user_by_id(user_id=decoded["user_id"])
-    return user
+    if await auth_service.is_token_revoked(decoded):
+        raise_predefined_http_exception(InvalidTokenException())
+    principal = await auth_service.user_service.get_principal(
+        user_id=decoded["user_id"], token=token, expires_at=decoded["exp"]
+    )
+    # The read session lives as long as the request; give its connection back once the principal is loaded
+    await release_connection(auth_service.session)
+    if not principal.is_active:
+        raise_predefined_http_exception(InvalidTokenException())
+    # For request-scoped consumers such as the response cache
+    request.state.principal = principal
+    return principal
+
+
+async def get_current_admin(current_user: UserPrincipal = Depends(get_current_user)) -> UserPrincipal:
+    if settings.ADMIN_ROLE not in current_user.roles:
+        raise_predefined_http_exception(AdminRequiredException())
+    return current_user
+
+
+def require_permissions(*permissions: str) -> Callable:
+    """
+    Build a dependency that requires the current user's roles to grant all of `permissions`.
+    The check runs against the per-worker permission registry (two integer operations), using the role
+    ids on the principal, so it needs no database access.
+    """
+    required = tuple(sorted(permissions))
+
+    async def dependency(current_user: UserPrincipal = Depends(get_current_user)) -> UserPrincipal:
+        await permission_registry.ensure_loaded()
+        if not permission_registry.has_permissions(current_user.role_ids, required):
+            raise_predefined_http_exception(PermissionDeniedException())
+        return current_user
+
+    return dependency
@@ -1,6 +1,6 @@
 from fastapi import status
 
-from app.exceptions import AppBaseException
+from app.exceptions import AppBaseException, preserialize_error
 
 
 class DuplicateUserEmailException(AppBaseException):
@@ -67,3 +67,57 @@ class AuthenticationRequiredException(AppBaseException):
             error_code="AUTHENTICATION_REQUIRED",
             status_code=status.HTTP_401_UNAUTHORIZED,
         )
+
+
+class HashingBusyException(AppBaseException):
+    """
+    Exception raised when the password hashing queue is full.
+    """
+
+    def __init__(self) -> None:
+        """
+        Initialize the exception for a saturated hashing executor.
+        """
+        super().__init__(
+            message="The service is busy, please retry shortly",
+            error_code="HASHING_BUSY",
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        )
+
+
+class AdminRequiredException(AppBaseException):
+    """
+    Exception raised when a non-admin user calls an admin-only endpoint.
+    """
+
+    def __init__(self) -> None:
+        """
+        Initialize the exception for missing admin privileges.
+        """
+        super().__init__(
+            message="Admin privileges are required",
+            error_code="ADMIN_REQUIRED",
+            status_code=status.HTTP_403_FORBIDDEN,
+        )
+
+
+class PermissionDeniedException(AppBaseException):
+    """
+    Exception raised when the user's roles lack a required permission.
+    """
+
+    def __init__(self) -> None:
+        """
+        Initialize the exception for missing permissions.
+        """
+        super().__init__(
+            message="You do not have permission to perform this action",
+            error_code="PERMISSION_DENIED",
+            status_code=status.HTTP_403_FORBIDDEN,
+        )
+
+
+# The most frequent fixed errors; their response bodies are serialized once
+preserialize_error(InvalidTokenException())
+preserialize_error(AuthenticationRequiredException())
+preserialize_error(InvalidCredentialsException())
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, String
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -8,23 +8,34 @@ from app.integrations.database import Base
 class AccessToken(Base):
     """
     SQLAlchemy model for storing JWT access tokens for users.
+    The table is range-partitioned by `expires_at` (one partition per day), so the partition key is part
+    of the primary key and of the token's unique constraint.
     """
 
     __tablename__ = "access_tokens"
+    __table_args__ = (
+        UniqueConstraint("token", "expires_at", name="uq_access_tokens_token_expires_at"),
+        {"postgresql_partition_by": "RANGE (expires_at)"},
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True, autoincrement=True)
     user_id = Column(
         Integer,
         ForeignKey("users.id", ondelete="CASCADE"),
         nullable=False,
         index=True,
     )
-    token = Column(String, nullable=False, unique=True, index=True)
+    token = Column(String, nullable=False)
     created_at = Column(DateTime(timezone=True), nullable=False, default=func.now())
-    expires_at = Column(DateTime(timezone=True), nullable=False)
+    expires_at = Column(DateTime(timezone=True), primary_key=True, nullable=False)
 
     user = relationship("User", backref="access_tokens")
-    refresh_tokens = relationship("RefreshToken", back_populates="access_token")
+    refresh_tokens = relationship(
+        "RefreshToken",
+        primaryjoin="AccessToken.id == foreign(RefreshToken.access_token_id)",
+        back_populates="access_token",
+        viewonly=True,
+    )
 
     def __init__(self, *args, **kwargs):
         expires_at = kwargs.get("expires_at")
@@ -36,29 +47,37 @@ class AccessToken(Base):
 class RefreshToken(Base):
     """
     SQLAlchemy model for storing refresh tokens for users.
+    Range-partitioned by `expires_at` like AccessToken. `access_token_id` is not a foreign key because
+    a partitioned `access_tokens.id` is only unique together with `expires_at`.
     """
 
     __tablename__ = "refresh_tokens"
+    __table_args__ = (
+        UniqueConstraint("token", "expires_at", name="uq_refresh_tokens_token_expires_at"),
+        {"postgresql_partition_by": "RANGE (expires_at)"},
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True, autoincrement=True)
     user_id = Column(
         Integer,
         ForeignKey("users.id", ondelete="CASCADE"),
         nullable=False,
         index=True,
     )
-    access_token_id = Column(
-        Integer,
-        ForeignKey("access_tokens.id", ondelete="CASCADE"),
-        nullable=True,
-        index=True,
-    )
-    token = Column(String, nullable=False, unique=True, index=True)
+    access_token_id = Column(Integer, nullable=True, index=True)
+    token = Column(String, nullable=False)
+    # All refresh tokens descended from one login share a family, so a replayed token revokes them all
+    family_id = Column(String(32), nullable=True, index=True)
     created_at = Column(DateTime(timezone=True), nullable=False, default=func.now())
-    expires_at = Column(DateTime(timezone=True), nullable=False)
+    expires_at = Column(DateTime(timezone=True), primary_key=True, nullable=False)
 
     user = relationship("User", backref="refresh_tokens")
-    access_token = relationship("AccessToken", back_populates="refresh_tokens")
+    access_token = relationship(
+        "AccessToken",
+        primaryjoin="foreign(RefreshToken.access_token_id) == AccessToken.id",
+        back_populates="refresh_tokens",
+        viewonly=True,
+    )
 
     def __init__(self, *args, **kwargs):
         expires_at = kwargs.get("expires_at")
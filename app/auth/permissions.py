@@ -0,0 +1,172 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from redis.exceptions import RedisError
+from sqlalchemy import select
+
+from app.config.config import settings
+from app.integrations.database import AsyncSessionLocal
+from app.integrations.redis_cache import RedisCache
+from app.metrics import register_collector
+from app.user.models.user_models import Role
+
+logger = logging.getLogger(__name__)
+
+PERMISSIONS_CHANGED_CHANNEL = "permissions_changed"
+# Seconds before the first retry of a failed subscription; doubled per failure, up to the refresh interval
+SUBSCRIBE_RETRY_INITIAL_DELAY = 1.0
+
+
+class PermissionRegistry:
+    """
+    Per-worker registry of roles compiled into permission bitsets.
+    Every permission name gets a bit; each role id maps to the OR of its permissions' bits, so an
+    authorization check is a couple of integer operations instead of a join through `user_roles`.
+    Roles are loaded once and reloaded when a change is announced on Redis pub/sub (or after
+    PERMISSIONS_REFRESH_INTERVAL as a safety net).
+    """
+
+    def __init__(self) -> None:
+        self._permission_bits: Dict[str, int] = {}
+        self._role_masks: Dict[int, int] = {}
+        self._role_names: Dict[int, str] = {}
+        self._required_masks: Dict[Tuple[str, ...], Optional[int]] = {}
+        self._lock = asyncio.Lock()
+        self.version = 0
+        self.loaded_at: Optional[float] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self.loaded_at is not None
+
+    def compile(self, roles: Iterable[Tuple[int, str, List[str]]]) -> None:
+        """
+        Replace the registry contents with the given (role id, name, permissions) rows.
+        """
+        roles = list(roles)
+        permission_names = sorted({permission for _, _, permissions in roles for permission in permissions or ()})
+        permission_bits = {permission: 1 << bit for bit, permission in enumerate(permission_names)}
+        role_masks, role_names = {}, {}
+        for role_id, name, permissions in roles:
+            mask = 0
+            for permission in permissions or ():
+                mask |= permission_bits[permission]
+            role_masks[role_id] = mask
+            role_names[role_id] = name
+        self._permission_bits = permission_bits
+        self._role_masks = role_masks
+        self._role_names = role_names
+        self._required_masks = {}
+        self.version += 1
+        self.loaded_at = time.monotonic()
+
+    async def load(self) -> None:
+        """
+        Load all roles from the database and recompile the bitsets.
+        """
+        async with self._lock:
+            async with AsyncSessionLocal() as session:
+                result = await session.execute(select(Role.id, Role.name, Role.permissions))
+                self.compile(result.all())
+        logger.info(f"Permission registry v{self.version} loaded: {len(self._role_masks)} roles")
+
+    async def ensure_loaded(self) -> None:
+        if not self.loaded:
+            await self.load()
+
+    def required_mask(self, permissions: Tuple[str, ...]) -> Optional[int]:
+        """
+        Return the bitset of the given permissions, or None if one of them is granted by no role.
+        """
+        if permissions not in self._required_masks:
+            mask = 0
+            for permission in permissions:
+                bit = self._permission_bits.get(permission)
+                if bit is None:
+                    mask = None
+                    break
+                mask |= bit
+            self._required_masks[permissions] = mask
+        return self._required_masks[permissions]
+
+    def role_mask(self, role_ids: Iterable[int]) -> int:
+        mask = 0
+        for role_id in role_ids:
+            mask |= self._role_masks.get(role_id, 0)
+        return mask
+
+    def has_permissions(self, role_ids: Iterable[int], permissions: Tuple[str, ...]) -> bool:
+        """
+        Check whether the union of the roles' permissions contains all of `permissions`.
+        """
+        required = self.required_mask(permissions)
+        if required is None:
+            return False
+        return self.role_mask(role_ids) & required == required
+
+    def role_names(self, role_ids: Iterable[int]) -> List[str]:
+        return [self._role_names[role_id] for role_id in role_ids if role_id in self._role_names]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "roles": len(self._role_masks),
+            "permissions": len(self._permission_bits),
+            "age_seconds": round(time.monotonic() - self.loaded_at, 1) if self.loaded else None,
+        }
+
+
+permission_registry = PermissionRegistry()
+register_collector("permissions", permission_registry.stats)
+
+
+async def publish_permissions_changed(cache: RedisCache) -> None:
+    """
+    Tell every worker to reload its permission registry. Call after changing roles or their permissions.
+    """
+    await cache.publish(PERMISSIONS_CHANGED_CHANNEL, "reload")
+
+
+async def _reload_if_stale(interval: float) -> None:
+    if permission_registry.loaded and time.monotonic() - permission_registry.loaded_at < interval:
+        return
+    try:
+        await permission_registry.load()
+    except Exception as e:
+        logger.error(f"Permission registry refresh failed: {e}")
+
+
+async def refresh_permissions_forever(cache: Optional[RedisCache]) -> None:
+    """
+    Keep the registry fresh: reload on every message on the permissions channel, and at least every
+    PERMISSIONS_REFRESH_INTERVAL seconds. While Redis is unavailable, the subscription is retried with
+    exponential backoff (capped at the interval) and the interval reloads go on. Runs until cancelled.
+    """
+    interval = settings.PERMISSIONS_REFRESH_INTERVAL
+    retry_delay = SUBSCRIBE_RETRY_INITIAL_DELAY
+    while True:
+        try:
+            if cache is None:
+                await permission_registry.load()
+                await asyncio.sleep(interval)
+                continue
+            async with cache.subscribe(PERMISSIONS_CHANGED_CHANNEL) as pubsub:
+                retry_delay = SUBSCRIBE_RETRY_INITIAL_DELAY
+                # Load after subscribing so no change between the load and the subscription is missed
+                await permission_registry.load()
+                while True:
+                    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=interval)
+                    if message is not None or time.monotonic() - permission_registry.loaded_at >= interval:
+                        await permission_registry.load()
+        except asyncio.CancelledError:
+            raise
+        except (RedisError, OSError) as e:
+            logger.warning(f"Permission change subscription failed, retrying in {retry_delay:.0f}s: {e}")
+            await _reload_if_stale(interval)
+            await asyncio.sleep(retry_delay)
+            retry_delay = min(retry_delay * 2, max(interval, SUBSCRIBE_RETRY_INITIAL_DELAY))
+        except Exception as e:
+            logger.error(f"Permission registry refresh failed: {e}")
+            await asyncio.sleep(min(interval, 5))
@@ -1,6 +1,6 @@
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Response, status
 
 from app.auth.dependencies import get_auth_service
 from app.auth.schemas.auth_schemas import (
@@ -12,8 +12,15 @@ from app.auth.schemas.auth_schemas import (
     RefreshTokenResponse,
 )
 from app.auth.services.auth_services import AuthService
+from app.auth.utils.token_utils import key_ring
+from app.config.config import settings
+from app.rate_limit import rate_limit_by_email
+from app.response_cache import invalidates_response_cache
+from app.responses import ModelResponse
+from app.user.routes.user_routers import USERS_CACHE_NAMESPACE
 
 auth_router = APIRouter()
+well_known_router = APIRouter()
 
 
 @auth_router.post(
@@ -22,12 +29,13 @@ auth_router = APIRouter()
     status_code=status.HTTP_200_OK,
     description="Authenticate user and return JWT token and user info.",
     summary="User Login",
+    dependencies=[Depends(rate_limit_by_email("login"))],
 )
 async def login(
     login_data: AuthLoginRequest,
     auth_service: Annotated[AuthService, Depends(get_auth_service)],
-) -> AuthLoginResponse:
-    return await auth_service.login(login_data=login_data)
+) -> ModelResponse:
+    return ModelResponse(await auth_service.login(login_data=login_data))
 
 
 @auth_router.post(
@@ -36,12 +44,14 @@ async def login(
     status_code=status.HTTP_201_CREATED,
     description="Register a new user.",
     summary="User Signup",
+    dependencies=[Depends(rate_limit_by_email("signup"))],
 )
+@invalidates_response_cache(USERS_CACHE_NAMESPACE)
 async def signup(
     signup_data: AuthSignupRequest,
     auth_service: Annotated[AuthService, Depends(get_auth_service)],
-) -> AuthSignupResponse:
-    return await auth_service.signup(signup_data=signup_data)
+) -> ModelResponse:
+    return ModelResponse(await auth_service.signup(signup_data=signup_data), status_code=status.HTTP_201_CREATED)
 
 
 @auth_router.post(
@@ -54,5 +64,18 @@ async def signup(
 async def refresh_token(
     refresh_data: RefreshTokenRequest,
     auth_service: Annotated[AuthService, Depends(get_auth_service)],
-) -> RefreshTokenResponse:
-    return await auth_service.refresh_token(refresh_data=refresh_data)
+) -> ModelResponse:
+    return ModelResponse(await auth_service.refresh_token(refresh_data=refresh_data))
+
+
+@well_known_router.get(
+    "/jwks.json",
+    description="Public keys for verifying access tokens locally (JSON Web Key Set).",
+    summary="JSON Web Key Set",
+)
+async def jwks() -> Response:
+    return Response(
+        content=key_ring.jwks(),
+        media_type="application/json",
+        headers={"Cache-Control": f"public, max-age={settings.JWKS_MAX_AGE}"},
+    )
@@ -1,11 +1,12 @@
 import logging
-from typing import Annotated
+import uuid
+from datetime import datetime, timezone
+from typing import Annotated, Optional
 
-from sqlalchemy import delete
+from redis.exceptions import RedisError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.auth.exceptions import DuplicateUserEmailException, InvalidCredentialsException, InvalidTokenException
-from app.auth.models.token_models import AccessToken, RefreshToken
 from app.auth.schemas.auth_schemas import (
     AuthLoginRequest,
     AuthLoginResponse,
@@ -14,12 +15,24 @@ from app.auth.schemas.auth_schemas import (
     RefreshTokenRequest,
     RefreshTokenResponse,
 )
+from app.auth.statements import (
+    CONSUME_REFRESH_TOKEN,
+    DELETE_TOKEN_FAMILY,
+    DELETE_USER_ACCESS_TOKENS,
+    DELETE_USER_REFRESH_TOKENS,
+    INSERT_REFRESH_TOKEN,
+    INSERT_TOKEN_PAIR,
+)
 from app.auth.utils.hash_utils import HashUtils
 from app.auth.utils.token_utils import TokenUtils
+from app.config.config import settings
 from app.exceptions import raise_predefined_http_exception
+from app.integrations.database import AsyncSessionLocal, release_connection
+from app.integrations.redis_cache import RedisCache
 from app.user.models.user_models import User
 from app.user.schemas.user_schemas import UserResponse
 from app.user.services.user_services import UserService
+from app.utils.background import spawn
 
 logger = logging.getLogger(__name__)
 
@@ -30,48 +43,99 @@ class AuthService:
     Handles user registration, password hashing, and JWT token generation.
     """
 
-    def __init__(self, session: Annotated[AsyncSession, "Auth DB session"]) -> None:
+    def __init__(
+        self,
+        session: Annotated[AsyncSession, "Auth DB session"],
+        cache: Optional[RedisCache] = None,
+    ) -> None:
         """
         Initialize AuthService with a database session.
         Args:
             session (AsyncSession): SQLAlchemy async session for database operations.
+            cache (Optional[RedisCache]): Redis cache holding token generations, if available.
         """
         self.session = session
-        self.user_service = UserService(session)
+        self.cache = cache
+        self.user_service = UserService(session, cache=cache)
+
+    async def _get_token_generation(self, user_id: int) -> Optional[int]:
+        """
+        Return the user's current token generation, or None when Redis is unavailable.
+        Args:
+            user_id (int): The user ID.
+        Returns:
+            Optional[int]: The token generation, or None if it can't be read.
+        """
+        if self.cache is None:
+            return None
+        try:
+            return await self.cache.get_token_generation(user_id)
+        except RedisError as e:
+            logger.warning(f"Could not read token generation for user {user_id}: {e}")
+            return None
+
+    async def is_token_revoked(self, decoded: dict) -> bool:
+        """
+        Check a decoded access token's `gen` claim against the user's current token generation.
+        Tokens without the claim were persisted at issue time and are not checked here.
+        When the generation can't be read (Redis down, or its circuit breaker open), JWT_STATELESS_FAIL_OPEN
+        decides: closed (the default) rejects every stateless token, signing all their users out for the
+        outage; open accepts them, so sessions revoked meanwhile keep working until their tokens expire.
+        Args:
+            decoded (dict): The decoded access token payload.
+        Returns:
+            bool: True if the token must be rejected.
+        """
+        if "gen" not in decoded:
+            return False
+        current_generation = await self._get_token_generation(decoded["user_id"])
+        if current_generation is None:
+            return not settings.JWT_STATELESS_FAIL_OPEN
+        return decoded["gen"] != current_generation
 
-    async def _generate_tokens(self, user_id: int) -> tuple[str, str]:
+    async def _generate_tokens(self, user_id: int, family_id: Optional[str] = None) -> tuple[str, str]:
         """
-        Generate a JWT access token and a refresh token for the user, save both in the database,
-        and relate the refresh token to the access token.
+        Generate a JWT access token and a refresh token for the user and write both rows in a
+        single statement: the access token insert is a CTE whose RETURNING id feeds the refresh
+        token insert. In stateless mode (JWT_STATELESS_ACCESS_TOKENS) only the refresh token is
+        persisted and the access token carries the user's token generation instead; if Redis is
+        unavailable the access token is persisted as usual.
+        Does not commit: the caller owns the transaction.
         Args:
             user_id (int): The ID of the user for whom to generate the tokens.
+            family_id (Optional[str]): Refresh token family to continue; a new one is started if None.
         Returns:
             tuple[str, str]: The generated (access_token, refresh_token).
         """
-        access_token, access_expires_at = await TokenUtils.generate_access_token(user_id=user_id)
-        access_token_obj = AccessToken(
-            user_id=user_id,
-            token=access_token,
-            expires_at=access_expires_at,
+        token_generation = None
+        if settings.JWT_STATELESS_ACCESS_TOKENS:
+            token_generation = await self._get_token_generation(user_id)
+        access_token, access_expires_at = await TokenUtils.generate_access_token(
+            user_id=user_id, token_generation=token_generation
         )
-        self.session.add(access_token_obj)
-        await self.session.flush()
-
         refresh_token, refresh_expires_at = await TokenUtils.generate_refresh_token(user_id=user_id)
-        refresh_token_obj = RefreshToken(
-            user_id=user_id,
-            access_token_id=access_token_obj.id,
-            token=refresh_token,
-            expires_at=refresh_expires_at,
-        )
-        self.session.add(refresh_token_obj)
-        await self.session.commit()
+        family_id = family_id or uuid.uuid4().hex
+
+        params = {
+            "p_user_id": user_id,
+            "p_refresh_token": refresh_token,
+            "p_family_id": family_id,
+            "p_refresh_expires_at": refresh_expires_at,
+        }
+        if token_generation is not None:
+            await self.session.execute(INSERT_REFRESH_TOKEN, params)
+        else:
+            params.update(p_access_token=access_token, p_access_expires_at=access_expires_at)
+            await self.session.execute(INSERT_TOKEN_PAIR, params)
         return access_token, refresh_token
 
     async def signup(self, signup_data: AuthSignupRequest) -> AuthSignupResponse:
         """
-        Register a new user. Hashes the password and saves the user to the database.
-        Also saves the generated JWT access token in the database.
+        Register a new user. Taken emails are rejected before the (expensive) hash; the check is a short
+        read transaction of its own (BEGIN, SELECT EXISTS, COMMIT), ended before hashing so no pooled
+        connection is held meanwhile, and is skipped when the email Bloom filter rules the email out.
+        The user and its tokens are then inserted in one transaction, committed once; uniqueness itself
+        is enforced by the insert (ON CONFLICT DO NOTHING).
         Args:
             signup_data (AuthSignupRequest): The registration data for the new user.
         Returns:
@@ -79,22 +143,23 @@ class AuthService:
         Raises:
             DuplicateUserEmailException: If a user with the given email already exists.
         """
-        if await self.user_service.user_exists_by_email(email=signup_data.email):
+        if await self.user_service.user_exists_by_email(signup_data.email):
             raise_predefined_http_exception(DuplicateUserEmailException(signup_data.email))
+        # Don't hold a pooled connection while hashing
+        await release_connection(self.session)
         hashed_password: str = await HashUtils.hash_password(password=signup_data.password)
-        # Use UserService to create the user
         new_user = await self.user_service.create_user(
             full_name=signup_data.full_name,
             email=signup_data.email,
             password=hashed_password,
         )
-        # Extract needed fields before any further session operations
-        user_id = new_user.id
-        user_email = new_user.email
-        user_full_name = new_user.full_name
-        access_token, refresh_token = await self._generate_tokens(user_id=user_id)
+        if new_user is None:
+            raise_predefined_http_exception(DuplicateUserEmailException(signup_data.email))
+        access_token, refresh_token = await self._generate_tokens(user_id=new_user.id)
+        await self.session.commit()
+        await self.user_service.remember_email(new_user.email)
         return AuthSignupResponse(
-            user=UserResponse(id=user_id, full_name=user_full_name, email=user_email),
+            user=new_user,
             access_token=access_token,
             token_type="bearer",
             refresh_token=refresh_token,
@@ -103,7 +168,8 @@ class AuthService:
     async def login(self, login_data: AuthLoginRequest) -> AuthLoginResponse:
         """
         Authenticate a user and return a JWT token if credentials are valid.
-        Also saves the generated JWT access token in the database.
+        The user is read in a short transaction, ended before the password check so no pooled connection
+        is held during the hash; the token rows are then written in one statement and committed once.
         Args:
             login_data (AuthLoginRequest): The login credentials.
         Returns:
@@ -112,15 +178,25 @@ class AuthService:
             InvalidCredentialsException: If the credentials are invalid.
         """
         user: User = await self.user_service.get_user_by_email(email=login_data.email)
+        # Don't hold a pooled connection while verifying the password; the user stays loaded
+        await release_connection(self.session)
         if user is None or not await HashUtils.check_password(
             password=login_data.password, hashed_password=user.password
         ):
             raise_predefined_http_exception(InvalidCredentialsException())
-        # Extract needed fields before any further session operations
+        # Deactivated accounts (e.g. being deleted) can't log in
+        if not user.is_active:
+            raise_predefined_http_exception(InvalidCredentialsException())
         user_id = user.id
         user_email = user.email
         user_full_name = user.full_name
+        if HashUtils.needs_rehash(user.password):
+            spawn(
+                self._rehash_password(user_id=user_id, password=login_data.password, old_hash=user.password),
+                name=f"rehash-password-{user_id}",
+            )
         access_token, refresh_token = await self._generate_tokens(user_id=user_id)
+        await self.session.commit()
         return AuthLoginResponse(
             user=UserResponse(id=user_id, full_name=user_full_name, email=user_email),
             access_token=access_token,
@@ -128,43 +204,114 @@ class AuthService:
             refresh_token=refresh_token,
         )
 
+    @staticmethod
+    async def _rehash_password(user_id: int, password: str, old_hash: str) -> None:
+        """
+        Upgrade a stored password hash to the configured Argon2 parameters.
+        Runs in the background after a successful login, on its own session, so the login response
+        never waits for the extra hash. A failure just leaves the old hash for the next login.
+        Args:
+            user_id (int): The user whose hash is upgraded.
+            password (str): The verified plaintext password.
+            old_hash (str): The hash that was verified.
+        """
+        try:
+            new_hash = await HashUtils.hash_password(password=password)
+            async with AsyncSessionLocal() as session:
+                if await UserService(session).update_password_hash(user_id, old_hash, new_hash):
+                    await session.commit()
+                    logger.info(f"Upgraded password hash parameters for user {user_id}")
+        except Exception as e:
+            logger.warning(f"Password rehash failed for user {user_id}: {e}")
+
     async def refresh_token(self, refresh_data: RefreshTokenRequest) -> RefreshTokenResponse:
         """
-        Validate refresh token, generate new access and refresh tokens, and return them.
+        Rotate a refresh token: consume it and issue a new access/refresh pair in one transaction.
+        The old token is consumed by a single `DELETE ... WHERE token = :t AND expires_at > now()
+        RETURNING`, so two concurrent refreshes with the same token can't both succeed. The new
+        refresh token stays in the same family. Presenting an already-rotated token is treated as
+        a replay and revokes the whole family.
+        Args:
+            refresh_data (RefreshTokenRequest): The refresh token to rotate.
+        Returns:
+            RefreshTokenResponse: The new access and refresh tokens.
+        Raises:
+            InvalidTokenException: If the refresh token is unknown, expired or replayed, or its user is deactivated.
         """
-        # Find the refresh token in DB
-        result = await self.session.execute(
-            RefreshToken.__table__.select().where(RefreshToken.token == refresh_data.refresh_token)
-        )
-        db_refresh_token = result.fetchone()
-        if not db_refresh_token:
+        result = await self.session.execute(CONSUME_REFRESH_TOKEN, {"token": refresh_data.refresh_token})
+        consumed = result.first()
+        if consumed is None:
+            await self._revoke_replayed_token_family(refresh_data.refresh_token)
             raise_predefined_http_exception(InvalidTokenException())
-        # Check expiry
-        from datetime import datetime, timezone
+        family_id = consumed.family_id or uuid.uuid4().hex
+        access_token, new_refresh_token = await self._generate_tokens(user_id=consumed.user_id, family_id=family_id)
+        await self._remember_rotated_token(refresh_data.refresh_token, consumed.user_id, family_id, consumed.expires_at)
+        await self.session.commit()
+        return RefreshTokenResponse(access_token=access_token, refresh_token=new_refresh_token)
 
-        if db_refresh_token.expires_at < datetime.now(timezone.utc):
-            # Delete expired token
-            await self.session.execute(
-                RefreshToken.__table__.delete().where(RefreshToken.token == refresh_data.refresh_token)
+    async def _remember_rotated_token(
+        self, refresh_token: str, user_id: int, family_id: str, expires_at: datetime
+    ) -> None:
+        """
+        Record a consumed refresh token in Redis until its original expiry so a later reuse is
+        recognised as a replay. Written before commit so concurrent reuse is already detected.
+        """
+        if self.cache is None:
+            return
+        ttl = int((expires_at - datetime.now(timezone.utc)).total_seconds())
+        if ttl <= 0:
+            return
+        try:
+            await self.cache.mark_refresh_token_rotated(
+                TokenUtils.token_digest(refresh_token), user_id, family_id, expire=ttl
             )
-            await self.session.commit()
-            raise_predefined_http_exception(InvalidTokenException())
-        # Delete the old refresh token (used or valid)
-        await self.session.execute(
-            RefreshToken.__table__.delete().where(RefreshToken.token == refresh_data.refresh_token)
-        )
+        except RedisError as e:
+            logger.warning(f"Could not record rotated refresh token for user {user_id}: {e}")
+
+    async def _revoke_replayed_token_family(self, refresh_token: str) -> None:
+        """
+        If the refresh token was already rotated, someone is replaying it: delete every live
+        refresh token of its family so neither the attacker nor the victim can keep refreshing.
+        """
+        if self.cache is None:
+            return
+        try:
+            rotated = await self.cache.get_rotated_refresh_token(TokenUtils.token_digest(refresh_token))
+        except RedisError as e:
+            logger.warning(f"Could not check refresh token replay: {e}")
+            return
+        if rotated is None:
+            return
+        user_id, family_id = rotated
+        logger.warning(f"Refresh token replay detected for user {user_id}; revoking token family {family_id}")
+        await self.session.execute(DELETE_TOKEN_FAMILY, {"family_id": family_id})
         await self.session.commit()
-        # Generate new tokens
-        user_id = db_refresh_token.user_id
-        access_token, new_refresh_token = await self._generate_tokens(user_id=user_id)
-        return RefreshTokenResponse(access_token=access_token, refresh_token=new_refresh_token)
 
-    async def delete_user_tokens(self, user_id: int) -> None:
+    async def revoke_sessions(self, user_id: int) -> None:
         """
-        Delete all access and refresh tokens for a user.
+        Log a user out everywhere: delete its refresh tokens, so no session can be refreshed (a refresh
+        would otherwise issue access tokens carrying the new generation), and its persisted access
+        tokens, then bump its token generation, which invalidates its stateless access tokens.
+        Commits. The deletions don't depend on Redis; without it, only stateless access tokens
+        survive, until they expire.
         Args:
-            user_id (int): The user ID whose tokens should be deleted.
+            user_id (int): The user whose sessions are revoked.
         """
-        await self.session.execute(delete(RefreshToken).where(RefreshToken.user_id == user_id))
-        await self.session.execute(delete(AccessToken).where(AccessToken.user_id == user_id))
+        await self.session.execute(DELETE_USER_REFRESH_TOKENS, {"user_id": user_id})
+        await self.session.execute(DELETE_USER_ACCESS_TOKENS, {"user_id": user_id})
         await self.session.commit()
+        await self.bump_token_generation(user_id)
+
+    async def bump_token_generation(self, user_id: int) -> None:
+        """
+        Invalidate a user's stateless access tokens by bumping its token generation. Persisted tokens
+        are unaffected; see revoke_sessions.
+        Args:
+            user_id (int): The user whose stateless access tokens are revoked.
+        """
+        if self.cache is None:
+            return
+        try:
+            await self.cache.bump_token_generation(user_id)
+        except RedisError as e:
+            logger.error(f"Could not bump token generation for user {user_id}: {e}")
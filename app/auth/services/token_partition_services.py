@@ -0,0 +1,146 @@
+import logging
+import re
+from datetime import date, datetime, timedelta, timezone
+from typing import Annotated, Dict, List
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = logging.getLogger(__name__)
+
+PARTITIONED_TOKEN_TABLES = ("access_tokens", "refresh_tokens")
+PARTITION_NAME_PATTERN = re.compile(r"^(?P<table>\w+)_p(?P<day>\d{8})$")
+
+
+class TokenPartitionService:
+    """
+    Service class maintaining the daily range partitions of the token tables.
+    Creates partitions ahead of time and drops whole expired partitions, replacing row-by-row deletes
+    of expired tokens (and the vacuum work they cause) with a cheap metadata operation. The tables have
+    no DEFAULT partition (it would rule out DETACH ... CONCURRENTLY), so partitions must be created
+    further ahead than the longest token lifetime.
+    """
+
+    def __init__(self, session: Annotated[AsyncSession, "Partition maintenance DB session"]) -> None:
+        """
+        Initialize TokenPartitionService with a database session.
+        Args:
+            session (AsyncSession): SQLAlchemy async session for database operations.
+        """
+        self.session = session
+
+    @staticmethod
+    def _partition_name(table: str, day: date) -> str:
+        return f"{table}_p{day:%Y%m%d}"
+
+    @staticmethod
+    def _bounds(day: date) -> tuple[str, str]:
+        return f"{day.isoformat()} 00:00:00+00", f"{(day + timedelta(days=1)).isoformat()} 00:00:00+00"
+
+    async def list_partitions(self, table: str) -> List[str]:
+        """
+        List the partition names attached to a token table.
+        Args:
+            table (str): The partitioned parent table.
+        Returns:
+            List[str]: The partition table names.
+        """
+        result = await self.session.execute(
+            text(
+                "SELECT child.relname FROM pg_inherits "
+                "JOIN pg_class parent ON pg_inherits.inhparent = parent.oid "
+                "JOIN pg_class child ON pg_inherits.inhrelid = child.oid "
+                "WHERE parent.relname = :table"
+            ),
+            {"table": table},
+        )
+        return list(result.scalars().all())
+
+    async def _create_partition(self, table: str, day: date) -> None:
+        """
+        Create the partition for one day.
+        """
+        name = self._partition_name(table, day)
+        lower, upper = self._bounds(day)
+        await self.session.execute(
+            text(f"CREATE TABLE {name} PARTITION OF {table} FOR VALUES FROM ('{lower}') TO ('{upper}')")
+        )
+
+    async def _pending_detaches(self, table: str) -> List[str]:
+        """
+        List the partitions of a token table left half-detached by an interrupted DETACH ... CONCURRENTLY.
+        """
+        result = await self.session.execute(
+            text(
+                "SELECT child.relname FROM pg_inherits "
+                "JOIN pg_class parent ON pg_inherits.inhparent = parent.oid "
+                "JOIN pg_class child ON pg_inherits.inhrelid = child.oid "
+                "WHERE parent.relname = :table AND pg_inherits.inhdetachpending"
+            ),
+            {"table": table},
+        )
+        return list(result.scalars().all())
+
+    async def create_future_partitions(self, days_ahead: int) -> List[str]:
+        """
+        Make sure a partition exists for today and each of the next `days_ahead` days.
+        Args:
+            days_ahead (int): How many days ahead to pre-create; must exceed the longest token lifetime.
+        Returns:
+            List[str]: Names of the partitions that were created.
+        """
+        today = datetime.now(timezone.utc).date()
+        created = []
+        for table in PARTITIONED_TOKEN_TABLES:
+            existing = set(await self.list_partitions(table))
+            for offset in range(days_ahead + 1):
+                day = today + timedelta(days=offset)
+                name = self._partition_name(table, day)
+                if name not in existing:
+                    await self._create_partition(table, day)
+                    created.append(name)
+        await self.session.commit()
+        return created
+
+    async def drop_expired_partitions(self, retention_days: int) -> List[str]:
+        """
+        Drop every daily partition whose whole range expired more than `retention_days` days ago.
+        Each partition is first detached with DETACH PARTITION ... CONCURRENTLY, which doesn't take an
+        ACCESS EXCLUSIVE lock on the parent, so token reads and writes carry on meanwhile; the detached
+        table is then dropped on its own. CONCURRENTLY can't run inside a transaction block, so this
+        runs in autocommit mode. A detach interrupted by a previous run is finalized first.
+        Args:
+            retention_days (int): Days to keep expired partitions around (e.g. for auditing).
+        Returns:
+            List[str]: Names of the partitions that were dropped.
+        """
+        cutoff = datetime.now(timezone.utc).date() - timedelta(days=retention_days)
+        dropped = []
+        await self.session.commit()
+        connection = await self.session.connection(execution_options={"isolation_level": "AUTOCOMMIT"})
+        for table in PARTITIONED_TOKEN_TABLES:
+            pending = set(await self._pending_detaches(table))
+            for name in await self.list_partitions(table):
+                match = PARTITION_NAME_PATTERN.match(name)
+                if not match or match.group("table") != table:
+                    continue
+                day = datetime.strptime(match.group("day"), "%Y%m%d").date()
+                if day + timedelta(days=1) <= cutoff:
+                    mode = "FINALIZE" if name in pending else "CONCURRENTLY"
+                    await connection.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name} {mode}"))
+                    await connection.execute(text(f"DROP TABLE {name}"))
+                    dropped.append(name)
+        await self.session.commit()
+        return dropped
+
+    async def maintain(self, days_ahead: int, retention_days: int) -> Dict[str, List[str]]:
+        """
+        Run a full maintenance pass: pre-create upcoming partitions, then drop expired ones.
+        Returns:
+            Dict[str, List[str]]: The created and dropped partition names.
+        """
+        created = await self.create_future_partitions(days_ahead)
+        dropped = await self.drop_expired_partitions(retention_days)
+        if created or dropped:
+            logger.info(f"Token partitions created: {created}; dropped: {dropped}")
+        return {"created": created, "dropped": dropped}
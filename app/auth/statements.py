@@ -0,0 +1,98 @@
+"""
+Prebuilt statements for the hot token queries; see `app.integrations.statements`.
+Parameters of INSERT values are prefixed with `p_`, since bind names equal to column names are
+reserved for the VALUES clause.
+"""
+
+from sqlalchemy import DateTime, Integer, String, Table, bindparam, func, insert, select, tuple_
+
+from app.auth.models.token_models import AccessToken, RefreshToken
+from app.integrations.statements import statements
+from app.user.models.user_models import User
+
+access_tokens = AccessToken.__table__
+refresh_tokens = RefreshToken.__table__
+users = User.__table__
+
+_new_access_token = (
+    insert(access_tokens)
+    .values(
+        user_id=bindparam("p_user_id", type_=Integer),
+        token=bindparam("p_access_token", type_=String),
+        expires_at=bindparam("p_access_expires_at", type_=DateTime(timezone=True)),
+    )
+    .returning(access_tokens.c.id)
+    .cte("new_access_token")
+)
+
+# Both token rows in one statement: the access token insert's RETURNING id feeds the refresh token insert
+INSERT_TOKEN_PAIR = statements.register(
+    "insert_token_pair",
+    insert(refresh_tokens).from_select(
+        ["user_id", "access_token_id", "token", "family_id", "expires_at"],
+        select(
+            bindparam("p_user_id", type_=Integer),
+            _new_access_token.c.id,
+            bindparam("p_refresh_token", type_=String),
+            bindparam("p_family_id", type_=String),
+            bindparam("p_refresh_expires_at", type_=DateTime(timezone=True)),
+        ),
+    ),
+)
+
+INSERT_REFRESH_TOKEN = statements.register(
+    "insert_refresh_token",
+    insert(refresh_tokens).values(
+        user_id=bindparam("p_user_id", type_=Integer),
+        token=bindparam("p_refresh_token", type_=String),
+        family_id=bindparam("p_family_id", type_=String),
+        expires_at=bindparam("p_refresh_expires_at", type_=DateTime(timezone=True)),
+    ),
+)
+
+# Consumes a live refresh token of an active user atomically; see AuthService.refresh_token
+CONSUME_REFRESH_TOKEN = statements.register(
+    "consume_refresh_token",
+    refresh_tokens.delete()
+    .where(
+        refresh_tokens.c.token == bindparam("token"),
+        refresh_tokens.c.expires_at > func.now(),
+        users.c.id == refresh_tokens.c.user_id,
+        users.c.is_active.is_(True),
+    )
+    .returning(refresh_tokens.c.user_id, refresh_tokens.c.family_id, refresh_tokens.c.expires_at),
+)
+
+DELETE_TOKEN_FAMILY = statements.register(
+    "delete_token_family",
+    refresh_tokens.delete().where(refresh_tokens.c.family_id == bindparam("family_id")),
+)
+
+
+# Every refresh token / persisted access token of a user; see AuthService.revoke_sessions
+DELETE_USER_REFRESH_TOKENS = statements.register(
+    "delete_user_refresh_tokens",
+    refresh_tokens.delete().where(refresh_tokens.c.user_id == bindparam("user_id")),
+)
+
+DELETE_USER_ACCESS_TOKENS = statements.register(
+    "delete_user_access_tokens",
+    access_tokens.delete().where(access_tokens.c.user_id == bindparam("user_id")),
+)
+
+
+def _delete_user_token_batch(table: Table):
+    """
+    Delete up to :batch_size of a user's rows from a token table (keyed by id and partition key).
+    """
+    batch = (
+        select(table.c.id, table.c.expires_at)
+        .where(table.c.user_id == bindparam("user_id"))
+        .limit(bindparam("batch_size", type_=Integer))
+    )
+    return table.delete().where(tuple_(table.c.id, table.c.expires_at).in_(batch))
+
+
+PURGE_USER_REFRESH_TOKENS = statements.register("purge_user_refresh_tokens", _delete_user_token_batch(refresh_tokens))
+
+PURGE_USER_ACCESS_TOKENS = statements.register("purge_user_access_tokens", _delete_user_token_batch(access_tokens))
@@ -0,0 +1,23 @@
+from asgiref.sync import async_to_sync
+from celery import shared_task
+
+from app.auth.services.token_partition_services import TokenPartitionService
+from app.config.config import settings
+from app.integrations.database import task_session
+
+
+async def _maintain_token_partitions() -> dict:
+    async with task_session() as session:
+        return await TokenPartitionService(session).maintain(
+            days_ahead=settings.TOKEN_PARTITION_DAYS_AHEAD,
+            retention_days=settings.TOKEN_PARTITION_RETENTION_DAYS,
+        )
+
+
+@shared_task(bind=True, queue="auth-queue", max_retries=3, default_retry_delay=60, acks_late=True)
+def maintain_token_partitions_task(self):
+    """Create upcoming token table partitions and drop expired ones. Idempotent."""
+    try:
+        return async_to_sync(_maintain_token_partitions)()
+    except Exception as exc:
+        raise self.retry(exc=exc)
@@ -1,18 +1,214 @@
-from argon2 import PasswordHasher
+import asyncio
+import multiprocessing
+import os
+import statistics
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from argon2 import PasswordHasher, extract_parameters
 from argon2.exceptions import VerifyMismatchError
-from starlette.concurrency import run_in_threadpool
+from argon2.low_level import ARGON2_VERSION
+
+from app.auth.exceptions import HashingBusyException
+from app.config.config import settings
+from app.exceptions import raise_predefined_http_exception
+from app.metrics import Histogram, register_collector
+
+ph = PasswordHasher(
+    time_cost=settings.ARGON2_TIME_COST,
+    memory_cost=settings.ARGON2_MEMORY_COST,
+    parallelism=settings.ARGON2_PARALLELISM,
+)
+
+
+def _verify(hashed_password: str, password: str) -> bool:
+    return ph.verify(hashed_password, password)
+
+
+def _hash(password: str) -> str:
+    return ph.hash(password)
+
+
+def _measure_hash_ms(time_cost: int, memory_cost: int, parallelism: int, samples: int) -> float:
+    hasher = PasswordHasher(time_cost=time_cost, memory_cost=memory_cost, parallelism=parallelism)
+    timings = []
+    for _ in range(samples):
+        started_at = time.perf_counter()
+        hasher.hash("calibration-password")
+        timings.append((time.perf_counter() - started_at) * 1000)
+    return statistics.median(timings)
+
+
+def calibrate_parameters(
+    target_ms: float,
+    max_memory_kib: int,
+    parallelism: int,
+    samples: int = 3,
+) -> Dict[str, Any]:
+    """
+    Benchmark Argon2 on this machine and pick parameters that hash in about `target_ms`.
+    Following RFC 9106, memory is preferred over iterations: the largest power-of-two memory_cost up
+    to `max_memory_kib` that fits the budget with one pass is chosen first, then time_cost is raised
+    while the median hash time stays within the target.
+    Args:
+        target_ms (float): Latency budget for a single hash, in milliseconds.
+        max_memory_kib (int): Upper bound for memory_cost, in KiB.
+        parallelism (int): Number of lanes.
+        samples (int): Hashes per measurement; the median is used.
+    Returns:
+        Dict[str, Any]: The chosen time_cost, memory_cost, parallelism and measured duration_ms.
+    """
+    memory_cost = 1 << (max_memory_kib.bit_length() - 1)
+    minimum_memory = 8 * parallelism
+    duration = _measure_hash_ms(1, memory_cost, parallelism, samples)
+    while duration > target_ms and memory_cost // 2 >= minimum_memory:
+        memory_cost //= 2
+        duration = _measure_hash_ms(1, memory_cost, parallelism, samples)
+
+    time_cost = 1
+    while True:
+        next_duration = _measure_hash_ms(time_cost + 1, memory_cost, parallelism, samples)
+        if next_duration > target_ms:
+            break
+        time_cost += 1
+        duration = next_duration
+    return {
+        "time_cost": time_cost,
+        "memory_cost": memory_cost,
+        "parallelism": parallelism,
+        "duration_ms": round(duration, 1),
+    }
+
 
-ph = PasswordHasher()
+class ExecutorSaturatedError(RuntimeError):
+    """Raised when a HashExecutor's queue is full and the work is rejected."""
+
+
+class HashExecutor:
+    """
+    Dedicated, bounded executor for password hashing.
+    Runs Argon2 on its own thread or process pool instead of anyio's shared threadpool, admits at most
+    `workers` concurrent jobs plus `max_queue` waiting ones, and rejects anything beyond that
+    immediately so a login burst can't starve the rest of the app.
+    """
+
+    def __init__(self, kind: str = "thread", workers: int = 0, max_queue: int = 32) -> None:
+        """
+        Initialize the executor. The pool itself is created lazily on first use.
+        Args:
+            kind (str): "thread" or "process".
+            workers (int): Pool size; 0 means one per CPU core.
+            max_queue (int): Number of jobs allowed to wait for a free worker.
+        """
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unsupported hash executor kind: {kind}")
+        self.kind = kind
+        self.workers = workers or os.cpu_count() or 1
+        self.max_queue = max_queue
+        self._executor: Optional[Executor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._pending = 0
+        self._running = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait_time = Histogram()
+        self.run_time = Histogram()
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="hash")
+        return self._executor
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run `fn(*args)` on the hashing pool.
+        Raises:
+            ExecutorSaturatedError: If all workers are busy and the queue is full.
+        """
+        if self._pending >= self.workers + self.max_queue:
+            self.rejected += 1
+            raise ExecutorSaturatedError("Hashing queue is full")
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.workers)
+        self._pending += 1
+        enqueued_at = time.perf_counter()
+        try:
+            async with self._slots:
+                started_at = time.perf_counter()
+                self.wait_time.observe(started_at - enqueued_at)
+                self._running += 1
+                try:
+                    return await asyncio.get_running_loop().run_in_executor(self._get_executor(), fn, *args)
+                finally:
+                    self._running -= 1
+                    self.completed += 1
+                    self.run_time.observe(time.perf_counter() - started_at)
+        finally:
+            self._pending -= 1
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "kind": self.kind,
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "running": self._running,
+            "queue_depth": self._pending - self._running,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "wait_seconds": self.wait_time.snapshot(),
+            "run_seconds": self.run_time.snapshot(),
+        }
+
+
+hash_executor = HashExecutor(
+    kind=settings.HASH_EXECUTOR,
+    workers=settings.HASH_WORKERS,
+    max_queue=settings.HASH_MAX_QUEUE,
+)
+register_collector("password_hashing", hash_executor.stats)
 
 
 class HashUtils:
     @staticmethod
     async def check_password(password: str, hashed_password: str) -> bool:
         try:
-            return await run_in_threadpool(ph.verify, hashed_password, password)
+            return await hash_executor.run(_verify, hashed_password, password)
         except VerifyMismatchError:
             return False
+        except ExecutorSaturatedError:
+            raise_predefined_http_exception(HashingBusyException())
+
+    @staticmethod
+    def needs_rehash(hashed_password: str) -> bool:
+        """
+        Return True if the hash is weaker than the configured parameters: an older Argon2 variant or
+        version, or a lower memory_cost, time_cost or parallelism. Stronger hashes are kept, so nodes
+        calibrated to different parameters don't rehash a user's password back and forth.
+        Only parses the hash string, so it is cheap enough to call on the event loop.
+        """
+        stored = extract_parameters(hashed_password)
+        return (
+            stored.type != ph.type
+            or stored.version < ARGON2_VERSION
+            or stored.memory_cost < ph.memory_cost
+            or stored.time_cost < ph.time_cost
+            or stored.parallelism < ph.parallelism
+        )
 
     @staticmethod
     async def hash_password(password: str) -> str:
-        return await run_in_threadpool(ph.hash, password)
+        try:
+            return await hash_executor.run(_hash, password)
+        except ExecutorSaturatedError:
+            raise_predefined_http_exception(HashingBusyException())
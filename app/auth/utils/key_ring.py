@@ -0,0 +1,125 @@
+import json
+import logging
+import os
+from typing import Any, Dict, Optional, Tuple
+
+from jwt.algorithms import get_default_algorithms
+
+logger = logging.getLogger(__name__)
+
+ASYMMETRIC_ALGORITHMS = frozenset({"EdDSA", "RS256", "RS384", "RS512"})
+PRIVATE_KEY_SUFFIX = ".pem"
+PUBLIC_KEY_SUFFIX = ".pub.pem"
+
+
+class KeyRing:
+    """
+    The JWT signing and verification keys, parsed once per process.
+    Keys live in `keys_dir` as `<kid>.pem` (private, usable for signing) or `<kid>.pub.pem` (public only,
+    for retired keys whose tokens may still be in circulation). Every key is accepted for verification and
+    published in the JWKS document; the active kid signs. Rotate in stages: add a new key while the old one
+    stays active, make it active once every verifier's cached JWKS includes it (JWKS_MAX_AGE), and delete
+    the old one once the longest-lived token it signed has expired.
+    """
+
+    def __init__(self, algorithm: str, keys_dir: str, active_kid: str = "") -> None:
+        """
+        Initialize the key ring. Keys are loaded lazily on first use.
+        Args:
+            algorithm (str): JWT algorithm; key files are only read for asymmetric algorithms.
+            keys_dir (str): Directory holding the PEM files.
+            active_kid (str): Kid used for signing; defaults to the last private key in sorted order.
+        """
+        self.algorithm = algorithm
+        self.keys_dir = keys_dir
+        self.active_kid = active_kid
+        self._signing_key: Optional[Tuple[str, Any]] = None
+        self._verification_keys: Dict[str, Any] = {}
+        self._jwks: Optional[bytes] = None
+
+    @property
+    def is_asymmetric(self) -> bool:
+        return self.algorithm in ASYMMETRIC_ALGORITHMS
+
+    def load(self) -> None:
+        """
+        Parse every key file and build the JWKS document. Called at startup and on first use.
+        Raises:
+            ValueError: If no private key is available or the active kid is unknown.
+        """
+        if not self.is_asymmetric:
+            self._jwks = json.dumps({"keys": []}).encode()
+            return
+        from cryptography.hazmat.primitives.serialization import load_pem_private_key, load_pem_public_key
+
+        private_keys, public_keys = {}, {}
+        for filename in sorted(os.listdir(self.keys_dir)):
+            path = os.path.join(self.keys_dir, filename)
+            with open(path, "rb") as key_file:
+                pem = key_file.read()
+            if filename.endswith(PUBLIC_KEY_SUFFIX):
+                public_keys[filename[: -len(PUBLIC_KEY_SUFFIX)]] = load_pem_public_key(pem)
+            elif filename.endswith(PRIVATE_KEY_SUFFIX):
+                kid = filename[: -len(PRIVATE_KEY_SUFFIX)]
+                private_keys[kid] = load_pem_private_key(pem, password=None)
+                public_keys[kid] = private_keys[kid].public_key()
+        if not private_keys:
+            raise ValueError(f"No JWT private keys found in {self.keys_dir}")
+        active_kid = self.active_kid or sorted(private_keys)[-1]
+        if active_kid not in private_keys:
+            raise ValueError(f"Active JWT key id {active_kid!r} has no private key in {self.keys_dir}")
+
+        algorithm = get_default_algorithms()[self.algorithm]
+        jwks = []
+        for kid, public_key in public_keys.items():
+            jwk = algorithm.to_jwk(public_key, as_dict=True)
+            jwk.update({"kid": kid, "alg": self.algorithm, "use": "sig"})
+            jwks.append(jwk)
+        self._signing_key = (active_kid, private_keys[active_kid])
+        self._verification_keys = public_keys
+        self._jwks = json.dumps({"keys": jwks}).encode()
+        logger.info(f"Loaded {len(public_keys)} JWT keys; signing with kid {active_kid}")
+
+    def signing_key(self) -> Tuple[str, Any]:
+        """
+        Return the (kid, private key object) used to sign new tokens.
+        """
+        if self._signing_key is None:
+            self.load()
+        return self._signing_key
+
+    def verification_key(self, kid: Optional[str]) -> Optional[Any]:
+        """
+        Return the public key object for `kid`, or None if the kid is unknown.
+        """
+        if self._jwks is None:
+            self.load()
+        return self._verification_keys.get(kid)
+
+    def jwks(self) -> bytes:
+        """
+        Return the serialized JWKS document with all public keys.
+        """
+        if self._jwks is None:
+            self.load()
+        return self._jwks
+
+
+def generate_private_key_pem(algorithm: str) -> bytes:
+    """
+    Generate a new private key for `algorithm` and return it PEM encoded (PKCS8, unencrypted).
+    """
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+
+    if algorithm == "EdDSA":
+        private_key = ed25519.Ed25519PrivateKey.generate()
+    elif algorithm in ASYMMETRIC_ALGORITHMS:
+        private_key = rsa.generate_private_key(public_exponent=65537, key_size=3072)
+    else:
+        raise ValueError(f"{algorithm} is not an asymmetric JWT algorithm")
+    return private_key.private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.NoEncryption(),
+    )
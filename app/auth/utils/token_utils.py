@@ -1,3 +1,4 @@
+import hashlib
 import logging
 import secrets
 import time
@@ -8,25 +9,75 @@ import jwt
 import pytz
 from starlette.concurrency import run_in_threadpool
 
+from app.auth.utils.key_ring import KeyRing
 from app.config.config import settings
+from app.metrics import register_collector
+from app.utils.ttl_cache import TTLCache
+
+# Algorithms cheap enough to verify directly on the event loop (microseconds per token)
+INLINE_DECODE_ALGORITHMS = frozenset({"HS256", "HS384", "HS512", "EdDSA"})
+
+# Parsed signing/verification keys for asymmetric algorithms, loaded once per process
+key_ring = KeyRing(
+    algorithm=settings.JWT_ALGORITHM,
+    keys_dir=settings.JWT_KEYS_DIR,
+    active_kid=settings.JWT_ACTIVE_KID,
+)
+
+# Per-worker cache of already-verified tokens: token digest -> decoded payload, expiring at `exp`
+verified_token_cache = TTLCache(maxsize=settings.JWT_DECODE_CACHE_SIZE)
+register_collector("jwt_decode_cache", verified_token_cache.stats)
 
 
 class TokenUtils:
 
+    @staticmethod
+    def token_digest(token: str) -> str:
+        """
+        Return a fixed-length SHA-256 hex digest of a token, suitable for use in cache keys.
+        """
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    @staticmethod
+    def _decode(token: str) -> dict:
+        key = settings.JWT_SECRET
+        if key_ring.is_asymmetric:
+            key = key_ring.verification_key(jwt.get_unverified_header(token).get("kid"))
+            # A forged or stale header is an invalid token (a 401), not a server-side key problem
+            if key is None:
+                raise jwt.InvalidTokenError("Unknown key id")
+        return jwt.decode(
+            token,
+            key,
+            algorithms=[settings.JWT_ALGORITHM],
+            options={"require": ["exp"]},
+        )
+
+    @staticmethod
+    def _encode(payload: dict) -> str:
+        if key_ring.is_asymmetric:
+            kid, private_key = key_ring.signing_key()
+            return jwt.encode(payload, private_key, settings.JWT_ALGORITHM, headers={"kid": kid})
+        return jwt.encode(payload, settings.JWT_SECRET, settings.JWT_ALGORITHM)
+
     @staticmethod
     async def decode_token(token: str) -> Optional[dict]:
         """
         Decode and validate a JWT token. Returns the decoded payload if valid and not expired, else None.
+        Verified payloads are kept in a per-worker LRU until their `exp`, so repeated requests with the
+        same bearer token skip signature verification entirely.
         """
+        digest = TokenUtils.token_digest(token)
+        cached = verified_token_cache.get(digest)
+        if cached is not None:
+            return dict(cached)
         try:
-            decoded_token = await run_in_threadpool(
-                jwt.decode,
-                token,
-                settings.JWT_SECRET,
-                algorithms=[settings.JWT_ALGORITHM],
-                options={"require": ["exp"]},
-            )
-            return decoded_token
+            if settings.JWT_DECODE_INLINE and settings.JWT_ALGORITHM in INLINE_DECODE_ALGORITHMS:
+                decoded_token = TokenUtils._decode(token)
+            else:
+                decoded_token = await run_in_threadpool(TokenUtils._decode, token)
+            verified_token_cache.set(digest, decoded_token, expires_at=decoded_token["exp"])
+            return dict(decoded_token)
         except jwt.ExpiredSignatureError:
             logging.warning("Token expired")
         except jwt.InvalidTokenError:
@@ -36,18 +87,22 @@ class TokenUtils:
         return None
 
     @staticmethod
-    async def generate_access_token(user_id: int) -> Tuple[str, datetime]:
+    async def generate_access_token(user_id: int, token_generation: Optional[int] = None) -> Tuple[str, datetime]:
         """
         Generate a JWT access token for the given user ID and return the token and its expiry as a datetime.
         Args:
             user_id (int): The user ID for whom the token is generated.
+            token_generation (Optional[int]): The user's token generation, embedded as the `gen` claim
+                for stateless access tokens.
         Returns:
             Tuple[str, datetime]: The generated JWT access token and its expiry datetime (Dubai timezone).
         """
         dubai_tz = pytz.timezone("Asia/Dubai")
         expires_at_ts = int(time.time()) + settings.JWT_ACCESS_EXPIRES_IN
         payload = {"user_id": user_id, "exp": expires_at_ts, "iat": int(time.time())}
-        token = await run_in_threadpool(jwt.encode, payload, settings.JWT_SECRET, settings.JWT_ALGORITHM)
+        if token_generation is not None:
+            payload["gen"] = token_generation
+        token = await run_in_threadpool(TokenUtils._encode, payload)
         expires_at_dubai = datetime.fromtimestamp(expires_at_ts, tz=dubai_tz)
         return token, expires_at_dubai
 
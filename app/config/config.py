@@ -22,6 +22,7 @@ class Settings(BaseSettings):
     ALLOW_CREDENTIALS: bool = True  # CORS allow credentials
     ALLOW_METHODS: List[str] = ["*"]  # CORS allowed methods
     ALLOW_HEADERS: List[str] = ["*"]  # CORS allowed headers
+    WEB_CONCURRENCY: int = 4  # Worker processes per node (uvicorn --workers); used to size DB pools
 
     # --- Database Config ---
     DB_USER: str  # Database username
@@ -31,26 +32,86 @@ class Settings(BaseSettings):
     DB_NAME: str  # Database name
     DB_TEST_NAME: str = "fastapi_test_db"  # Test database name
     ECHO_SQL: bool = True  # SQLAlchemy echo SQL
-    DB_POOL_SIZE: int = 10  # DB connection pool size
-    DB_MAX_OVERFLOW: int = 5  # DB max overflow
+    DB_POOL_SIZE: int = 10  # DB connection pool size (per worker process)
+    DB_MAX_OVERFLOW: int = 5  # DB max overflow (per worker process)
     DB_TIMEOUT: int = 30  # DB connection timeout (seconds)
+    DB_POOL_RECYCLE: int = 1800  # Recycle pooled connections after this many seconds
+    DB_POOL_PRE_PING: bool = True  # Check connection health on checkout
+    DB_MAX_CONNECTIONS_PER_NODE: int = 0  # If set, pools shrink so all workers on a node stay within it
+    DB_QUERY_CACHE_SIZE: int = 1200  # Compiled SQL statements cached per engine
+    DB_PREPARED_STATEMENT_CACHE_SIZE: int = 256  # Prepared statements asyncpg keeps per connection
+    DB_PGBOUNCER_MODE: bool = False  # Behind PgBouncer transaction pooling: no prepared-statement caching
     SERVER_TIMEZONE: str = "UTC+4"  # Server timezone
+    DB_READ_REPLICAS: List[str] = []  # Read replicas as "host:port" or "host:port:weight" (same credentials/DB)
+    DB_REPLICA_HEALTH_INTERVAL: int = 10  # Seconds between replica health checks
+    DB_REPLICA_HEALTH_TIMEOUT: float = 2.0  # Seconds a replica health check may take
+    DB_REPLICA_MAX_LAG_SECONDS: float = 5.0  # Replicas lagging further behind are taken out of rotation
+    DB_READ_YOUR_WRITES_SECONDS: int = 5  # After a write, the client's reads stick to the primary this long
+
+    PAGINATION_DEFAULT_LIMIT: int = 50  # Default page size of paginated listings
+    PAGINATION_MAX_LIMIT: int = 200  # Largest page size a client may request
+    PAGINATION_CURSOR_SECRET: str = ""  # HMAC key signing pagination cursors (empty = JWT_SECRET)
 
     # --- Redis Config ---
     REDIS_HOST: str = "redis"  # Redis host
     REDIS_PORT: int = 6379  # Redis port
     REDIS_DB: int = 0  # Redis DB index
     REDIS_URL: str = "redis://redis:6379/0"  # Default Redis URL format
+    REDIS_SERIALIZER: str = "msgpack"  # Codec for generic cache values: "msgpack" or "json"
+    REDIS_COMPRESSION_THRESHOLD: int = 1024  # zstd-compress values of at least this many bytes (0 = never)
+    REDIS_COMPRESSION_LEVEL: int = 3  # zstd compression level
+    REDIS_SOCKET_TIMEOUT: float = 1.0  # Connect/read timeout (seconds) of Redis calls
+    REDIS_BREAKER_FAILURE_THRESHOLD: int = 5  # Consecutive Redis failures that open the circuit breaker
+    REDIS_BREAKER_RECOVERY_TIMEOUT: float = 10.0  # Seconds the breaker stays open before probing Redis again
+    PRINCIPAL_CACHE_ENABLED: bool = True  # Cache authenticated principals in Redis
+    PRINCIPAL_CACHE_TTL: int = 300  # Max principal cache TTL (seconds), capped at the token's exp
+    EMAIL_BLOOM_ENABLED: bool = True  # Answer "email not taken" from a Redis Bloom filter without a DB query
+    EMAIL_BLOOM_CAPACITY: int = 1000000  # Expected number of users (changing it requires a rebuild)
+    EMAIL_BLOOM_ERROR_RATE: float = 0.01  # Bloom filter false-positive rate at capacity
+    RESPONSE_CACHE_ENABLED: bool = True  # Serve GET endpoints marked with @cache_response from Redis
+    RESPONSE_CACHE_MAX_TTL: int = 300  # Max cached response TTL (seconds); also the lifetime of tag sets
+    L1_CACHE_ENABLED: bool = True  # Serve hot principal/response cache keys from worker memory
+    L1_CACHE_MAX_ENTRIES: int = 10000  # Max entries per in-process cache (LRU-evicted)
+    L1_CACHE_TTL: float = 5.0  # Max seconds an entry is served from worker memory
+
+    # --- Rate Limiting Config (limits are "<requests>/<seconds>") ---
+    RATE_LIMIT_ENABLED: bool = True  # Enable rate limiting of the auth routes
+    RATE_LIMIT_PATHS: List[str] = ["/user/auth/login", "/user/auth/signup", "/user/auth/refresh-token"]  # Limited
+    RATE_LIMIT_PER_IP: str = "20/60"  # Per client IP, per route
+    RATE_LIMIT_PER_EMAIL: str = "5/60"  # Per submitted email, per route (login/signup)
+    RATE_LIMIT_PER_ROUTE: str = ""  # Across all clients, per route (empty = off; one flood locks out everyone)
+    RATE_LIMIT_LOCAL_BURST: int = 3  # In-process pre-filter allows this many times the IP limit before Redis
+    RATE_LIMIT_LOCAL_MAX_KEYS: int = 10000  # Max clients tracked by the in-process pre-filter
+    RATE_LIMIT_TRUST_FORWARDED_FOR: bool = False  # Take the client IP from X-Forwarded-For (behind a proxy)
 
     # --- Celery Config ---
     CELERY_BROKER_URL: str  # Celery broker URL
     CELERY_RESULT_BACKEND: str = REDIS_URL  # Celery result backend
+    USER_PURGE_BATCH_SIZE: int = 1000  # Token rows deleted per transaction when purging a deleted user
+    USER_DELETION_STATUS_TOKEN_TTL: int = 86400  # Seconds the deleted user can read their deletion's status
 
     # --- JWT/Auth Config ---
     JWT_SECRET: str  # JWT secret key
-    JWT_ALGORITHM: str = "HS256"  # JWT algorithm
+    JWT_ALGORITHM: str = "HS256"  # JWT algorithm: HS256, or EdDSA/RS256 to sign with the key ring
+    JWT_KEYS_DIR: str = "keys/jwt"  # <kid>.pem private keys and <kid>.pub.pem retired public keys
+    JWT_ACTIVE_KID: str = ""  # Key id used for signing (empty = last private key in sorted order)
+    ADMIN_ROLE: str = "admin"  # Role name granting access to the admin endpoints
+    PERMISSIONS_REFRESH_INTERVAL: int = 300  # Max seconds between permission registry reloads (besides pub/sub)
+    JWKS_MAX_AGE: int = 3600  # Cache-Control max-age (seconds) of /.well-known/jwks.json
     JWT_ACCESS_EXPIRES_IN: int = 36000  # Access token expiry (seconds)
     JWT_REFRESH_EXPIRES_IN: int = 604800  # Refresh token expiry (seconds)
+    TOKEN_PARTITION_DAYS_AHEAD: int = 14  # Daily token partitions to pre-create (must exceed token lifetimes)
+    TOKEN_PARTITION_RETENTION_DAYS: int = 1  # Days to keep fully expired token partitions before dropping
+    JWT_STATELESS_ACCESS_TOKENS: bool = False  # Don't persist access tokens; revoke via a Redis generation claim
+    JWT_STATELESS_FAIL_OPEN: bool = False  # Accept stateless access tokens while Redis can't check them
+    JWT_DECODE_CACHE_SIZE: int = 4096  # Per-worker LRU of verified tokens (0 disables)
+    JWT_DECODE_INLINE: bool = True  # Verify HMAC tokens on the event loop instead of the threadpool
+    ARGON2_TIME_COST: int = 3  # Argon2 iterations (tune with `python manage.py calibrate_argon2`)
+    ARGON2_MEMORY_COST: int = 65536  # Argon2 memory in KiB
+    ARGON2_PARALLELISM: int = 4  # Argon2 lanes
+    HASH_EXECUTOR: str = "thread"  # Password hashing pool: "thread" or "process"
+    HASH_WORKERS: int = 0  # Hashing pool size (0 = one per CPU core)
+    HASH_MAX_QUEUE: int = 32  # Hash jobs allowed to wait before requests fail fast with 503
 
     # --- AWS S3 Config ---
     S3_ACCESS_KEY: str
@@ -1,10 +1,12 @@
+from app.config.config import settings
+
 # Logging configuration
 log_level = "warning"  # Minimized log level to avoid verbosity
 access_log = False  # Disabling access logs in production to reduce I/O
 error_log = True  # Enable error logs to capture any issues
 
 # Performance settings
-workers = 4
+workers = settings.WEB_CONCURRENCY  # Also sizes the per-worker DB pools (DB_MAX_CONNECTIONS_PER_NODE)
 reload = False  # Disable hot-reloading in production
 
 # Timeout settings
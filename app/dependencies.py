@@ -1,30 +1,57 @@
 import logging
+from typing import Optional
 
 from app.config.config import settings as app_settings
 from app.integrations.database import AsyncSessionLocal
+from app.integrations.read_replicas import read_session
 from app.integrations.redis_cache import RedisCache
+from app.integrations.redis_codec import RedisCodec
 from app.integrations.s3 import AsyncS3Client
+from app.metrics import register_collector
+from app.utils.circuit_breaker import CircuitBreaker
 
 logger = logging.getLogger(__name__)
 
 
 async def get_redis_cache() -> RedisCache:
-    """Dependency that provides the RedisCache instance."""
+    """
+    Dependency that provides the RedisCache instance. Redis being unreachable doesn't raise here:
+    the failed ping is logged and counts as one failure towards REDIS_BREAKER_FAILURE_THRESHOLD;
+    once the threshold is reached, the circuit breaker opens and calls fail fast until Redis is back.
+    """
     if not hasattr(get_redis_cache, "_instance"):
-        instance = RedisCache(url=app_settings.REDIS_URI)
-        try:
-            await instance.connect()
-            if not await instance.ping():
-                logger.error("Redis connection established but ping failed.")
-                raise RuntimeError("Redis ping failed after connection.")
+        codec = RedisCodec(
+            serializer=app_settings.REDIS_SERIALIZER,
+            compression_threshold=app_settings.REDIS_COMPRESSION_THRESHOLD,
+            compression_level=app_settings.REDIS_COMPRESSION_LEVEL,
+        )
+        breaker = CircuitBreaker(
+            "redis",
+            failure_threshold=app_settings.REDIS_BREAKER_FAILURE_THRESHOLD,
+            recovery_timeout=app_settings.REDIS_BREAKER_RECOVERY_TIMEOUT,
+        )
+        instance = RedisCache(
+            url=app_settings.REDIS_URI, timeout=app_settings.REDIS_SOCKET_TIMEOUT, codec=codec, breaker=breaker
+        )
+        await instance.connect()
+        if await instance.ping():
             logger.info("Redis connection established and ping successful.")
-        except Exception as e:
-            logger.error(f"Failed to connect to Redis: {e}")
-            raise RuntimeError("Could not connect to Redis.") from e
+        else:
+            logger.error("Redis ping failed; caching is degraded until it recovers.")
+        register_collector("redis_breaker", breaker.stats)
         get_redis_cache._instance = instance
     return get_redis_cache._instance
 
 
+async def get_optional_redis_cache() -> Optional[RedisCache]:
+    """
+    Dependency that provides the RedisCache instance, or None while its circuit breaker is open.
+    Use it for best-effort caching where the request must still succeed without Redis.
+    """
+    cache = await get_redis_cache()
+    return None if cache.breaker.is_open else cache
+
+
 async def get_s3_client():
     """
     Dependency that provides an async S3 client (AsyncS3Client) as an async context manager.
@@ -42,6 +69,10 @@ def get_settings():
 
 
 async def get_db():
+    """
+    Dependency that provides a database session. No connection is checked out until the first query,
+    and it goes back to the pool at commit (or `release_connection`), not when the request ends.
+    """
     async with AsyncSessionLocal() as session:
         try:
             yield session
@@ -50,3 +81,13 @@ async def get_db():
             raise
         finally:
             await session.close()
+
+
+async def get_read_db():
+    """
+    Dependency that provides a read-only session, on a healthy read replica when one is configured.
+    Falls back to the primary (read-only) when the request or client has just written, so callers
+    always see their own writes.
+    """
+    async with read_session() as session:
+        yield session
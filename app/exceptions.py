@@ -1,8 +1,11 @@
-from typing import Optional
+import math
+from typing import Any, Dict, List, Optional, Tuple
 
-from fastapi import HTTPException, Request
+import orjson
+from fastapi import HTTPException, Request, status
 from fastapi.exceptions import RequestValidationError as FastAPIRequestValidationError
-from fastapi.responses import JSONResponse
+from fastapi.responses import Response
+from starlette.exceptions import HTTPException as StarletteHTTPException
 
 
 # Base custom exception for all app-specific errors
@@ -37,18 +40,70 @@ class AppBaseException(Exception):
             self.status_code = status_code
 
 
+class InternalServerErrorException(AppBaseException):
+    """
+    Exception reported for unhandled errors.
+    """
+
+    status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
+    error_code = "INTERNAL_SERVER_ERROR"
+    message = "An internal server error occurred."
+
+
+class RateLimitExceededException(AppBaseException):
+    """
+    Exception raised when a client exceeds a rate limit.
+    """
+
+    def __init__(self, retry_after: float) -> None:
+        """
+        Initialize the exception with the time until the client may retry.
+        Args:
+            retry_after (float): Seconds until a request would be allowed again.
+        """
+        super().__init__(
+            message="Too many requests, please retry later",
+            error_code="RATE_LIMIT_EXCEEDED",
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        )
+        self.headers = {"Retry-After": str(max(1, math.ceil(retry_after)))}
+
+
+class InvalidCursorException(AppBaseException):
+    """
+    Exception raised when a pagination cursor is malformed or has been tampered with.
+    """
+
+    def __init__(self) -> None:
+        """
+        Initialize the exception for an invalid pagination cursor.
+        """
+        super().__init__(
+            message="Invalid pagination cursor",
+            error_code="INVALID_CURSOR",
+            status_code=status.HTTP_400_BAD_REQUEST,
+        )
+
+
 # Utility to raise HTTPException with your schema
-def raise_http_exception(status_code: int, message: str, error_code: Optional[str] = None) -> None:
+def raise_http_exception(
+    status_code: int,
+    message: str,
+    error_code: Optional[str] = None,
+    headers: Optional[Dict[str, str]] = None,
+) -> None:
     """
     Raise a FastAPI HTTPException with a standardized error schema.
     Args:
         status_code (int): HTTP status code.
         message (str): Error message.
         error_code (Optional[str]): Application-specific error code.
+        headers (Optional[Dict[str, str]]): Extra response headers (e.g. Retry-After).
     """
     raise HTTPException(
         status_code=status_code,
         detail=[{"error_code": error_code, "message": message}],
+        headers=headers,
     )
 
 
@@ -62,57 +117,114 @@ def raise_predefined_http_exception(exc: Exception) -> None:
         status_code=getattr(exc, "status_code", 400),
         message=getattr(exc, "message", str(exc)),
         error_code=getattr(exc, "error_code", "APP_ERROR"),
+        headers=getattr(exc, "headers", None),
+    )
+
+
+# Serialized error lists of fixed-message exceptions, keyed by (error_code, message)
+_preserialized_errors: Dict[Tuple[Optional[str], str], bytes] = {}
+
+
+def preserialize_error(exc: AppBaseException) -> None:
+    """
+    Serialize the error of an exception with a fixed message once, so every response for it reuses
+    the bytes. Meant for frequent errors such as invalid or missing tokens.
+    Args:
+        exc (AppBaseException): An instance of the exception.
+    """
+    _preserialized_errors[(exc.error_code, exc.message)] = orjson.dumps(
+        [{"error_code": exc.error_code, "message": exc.message}]
     )
 
 
+def error_response(
+    status_code: int,
+    errors: List[Dict[str, Any]],
+    headers: Optional[Dict[str, str]] = None,
+    envelope: str = "errors",
+) -> Response:
+    """
+    Build a standardized error response, using a pre-serialized body when there is one.
+    Args:
+        status_code (int): HTTP status code.
+        errors (List[Dict[str, Any]]): The errors, each with an `error_code` and a `message`.
+        headers (Optional[Dict[str, str]]): Extra response headers.
+        envelope (str): Key holding the errors in the body ("detail" for HTTPException responses).
+    Returns:
+        Response: The JSON error response.
+    """
+    serialized = None
+    if len(errors) == 1 and isinstance(errors[0], dict) and errors[0].keys() == {"error_code", "message"}:
+        serialized = _preserialized_errors.get((errors[0]["error_code"], errors[0]["message"]))
+    if serialized is None:
+        serialized = orjson.dumps(errors)
+    body = b'{"' + envelope.encode() + b'":' + serialized + b"}"
+    return Response(content=body, status_code=status_code, headers=headers, media_type="application/json")
+
+
+preserialize_error(InternalServerErrorException())
+preserialize_error(RateLimitExceededException(retry_after=1))
+
+
+async def http_exception_handler(request: Request, exc: StarletteHTTPException) -> Response:
+    """
+    Handle HTTPException like FastAPI's default handler (`{"detail": ...}` body), serialized with orjson
+    and with pre-serialized bodies for the fixed errors raised via `raise_predefined_http_exception`.
+    Args:
+        request (Request): The incoming request.
+        exc (StarletteHTTPException): The exception instance.
+    Returns:
+        Response: The error response.
+    """
+    if exc.status_code in (status.HTTP_204_NO_CONTENT, status.HTTP_304_NOT_MODIFIED):
+        return Response(status_code=exc.status_code, headers=exc.headers)
+    if isinstance(exc.detail, list):
+        return error_response(exc.status_code, exc.detail, headers=exc.headers, envelope="detail")
+    body = orjson.dumps({"detail": exc.detail})
+    return Response(content=body, status_code=exc.status_code, headers=exc.headers, media_type="application/json")
+
+
 # Centralized custom exception handler
-async def custom_http_exception_handler(request: Request, exc: Exception) -> JSONResponse:
+async def custom_http_exception_handler(request: Request, exc: Exception) -> Response:
     """
     Handle all exceptions and return a standardized error response.
     Args:
         request (Request): The incoming request.
         exc (Exception): The exception instance.
     Returns:
-        JSONResponse: The standardized error response.
+        Response: The standardized error response.
     """
     # Handle FastAPI/Starlette HTTPException
     if isinstance(exc, HTTPException):
         detail = exc.detail
         if isinstance(detail, list) and all(isinstance(item, dict) and "message" in item for item in detail):
-            return JSONResponse(status_code=exc.status_code, content={"errors": detail})
-        return JSONResponse(
-            status_code=exc.status_code,
-            content={"errors": [{"error_code": "HTTP_EXCEPTION", "message": str(detail)}]},
+            return error_response(exc.status_code, detail, headers=exc.headers)
+        return error_response(
+            exc.status_code, [{"error_code": "HTTP_EXCEPTION", "message": str(detail)}], headers=exc.headers
         )
     # Handle custom app exceptions
     if isinstance(exc, AppBaseException):
-        return JSONResponse(
-            status_code=exc.status_code,
-            content={"errors": [{"error_code": exc.error_code, "message": exc.message}]},
+        return error_response(
+            exc.status_code,
+            [{"error_code": exc.error_code, "message": exc.message}],
+            headers=getattr(exc, "headers", None),
         )
     # Fallback for unhandled exceptions
-    return JSONResponse(
-        status_code=500,
-        content={
-            "errors": [
-                {
-                    "error_code": "INTERNAL_SERVER_ERROR",
-                    "message": "An internal server error occurred.",
-                }
-            ]
-        },
+    internal_error = InternalServerErrorException()
+    return error_response(
+        internal_error.status_code, [{"error_code": internal_error.error_code, "message": internal_error.message}]
     )
 
 
 # Custom exception handler for validation errors
-async def custom_validation_exception_handler(request: Request, exc: FastAPIRequestValidationError) -> JSONResponse:
+async def custom_validation_exception_handler(request: Request, exc: FastAPIRequestValidationError) -> Response:
     """
     Handle validation errors and return a standardized error response.
     Args:
         request (Request): The incoming request.
         exc (FastAPIRequestValidationError): The validation exception instance.
     Returns:
-        JSONResponse: The standardized error response for validation errors.
+        Response: The standardized error response for validation errors.
     """
     errors = [{"error_code": "VALIDATION_ERROR", "message": err["msg"]} for err in exc.errors()]
-    return JSONResponse(status_code=422, content={"errors": errors})
+    return error_response(422, errors)
@@ -1,4 +1,5 @@
 from celery import Celery
+from celery.schedules import crontab
 from kombu import Queue
 
 from app.config.config import settings
@@ -9,7 +10,7 @@ def create_celery_app() -> Celery:
         "fastapi_boilerplate",
         broker=settings.CELERY_BROKER_URL,
         backend=settings.CELERY_RESULT_BACKEND,
-        include=["app.user.tasks.user_tasks"],
+        include=["app.user.tasks.user_tasks", "app.auth.tasks.token_tasks"],
     )
     celery.conf.task_queues = (
         Queue("auth-queue"),
@@ -22,6 +23,13 @@ def create_celery_app() -> Celery:
         timezone="UTC",
         enable_utc=True,
         beat_scheduler="celery.beat:PersistentScheduler",
-        beat_schedule={},
+        beat_schedule={
+            # Hourly so a missed run never leaves inserts without a partition
+            "maintain-token-partitions": {
+                "task": "app.auth.tasks.token_tasks.maintain_token_partitions_task",
+                "schedule": crontab(minute=5),
+                "options": {"queue": "auth-queue"},
+            },
+        },
     )
     return celery
@@ -1,20 +1,23 @@
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy.pool import NullPool
 
 from app.config.config import settings
+from app.integrations.db_pool import instrument_pool, pool_options
+from app.integrations.statements import statement_cache_options
 
-# Create async engine with connection pooling and performance best practices
-engine = create_async_engine(
-    settings.ASYNC_DATABASE_URL,
-    pool_size=10,  # Number of persistent connections
-    max_overflow=20,  # Extra connections allowed temporarily
-    pool_timeout=30,  # Seconds to wait for a connection
-    pool_recycle=1800,  # Recycle connections every 30 min
-    pool_pre_ping=True,  # Check connection health
-)
+# Create async engine with a settings-driven, worker-aware and instrumented connection pool
+engine = create_async_engine(settings.ASYNC_DATABASE_URL, **pool_options(), **statement_cache_options())
+instrument_pool(engine, "db_pool")
 
-# Create async session factory
-AsyncSessionLocal = sessionmaker(bind=engine, class_=AsyncSession, autocommit=False, autoflush=False)
+# Create async session factory. Sessions check out a connection on their first query and return it on
+# commit; objects stay loaded after commit, so services can end a transaction early and keep using them.
+AsyncSessionLocal = sessionmaker(
+    bind=engine, class_=AsyncSession, autocommit=False, autoflush=False, expire_on_commit=False
+)
 
 # Create base class for models
 Base = declarative_base()
@@ -30,3 +33,30 @@ async def get_db():
             raise
         finally:
             await session.close()
+
+
+async def release_connection(session: AsyncSession) -> None:
+    """
+    End the session's transaction, if one is open, so its connection goes back to the pool now instead
+    of when the session closes. Call it before slow non-database work (e.g. password hashing); the next
+    query checks out a connection again. Pending changes are committed.
+    Args:
+        session (AsyncSession): The session to release.
+    """
+    if session.in_transaction():
+        await session.commit()
+
+
+@asynccontextmanager
+async def task_session() -> AsyncIterator[AsyncSession]:
+    """
+    Session for Celery tasks that call async services through `async_to_sync`.
+    Each call runs on a fresh event loop, so it uses its own unpooled engine instead of the app's
+    pool, whose asyncpg connections are bound to the web worker's loop.
+    """
+    task_engine = create_async_engine(settings.ASYNC_DATABASE_URL, poolclass=NullPool, **statement_cache_options())
+    try:
+        async with AsyncSession(task_engine, expire_on_commit=False) as session:
+            yield session
+    finally:
+        await task_engine.dispose()
@@ -0,0 +1,101 @@
+import logging
+import time
+from typing import Any, Dict
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.config.config import settings
+from app.metrics import Histogram, register_collector
+
+logger = logging.getLogger(__name__)
+
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """
+    AsyncAdaptedQueuePool that records how long each checkout waited for a connection.
+    Pool events fire only once a connection has been obtained, so the wait is timed around `_do_get`.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.wait_time = Histogram()
+        self.timeouts = 0
+
+    def _do_get(self):
+        started_at = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            self.wait_time.observe(time.perf_counter() - started_at)
+
+
+def pool_options() -> Dict[str, Any]:
+    """
+    Pool configuration for one worker process, derived from settings.
+    DB_POOL_SIZE and DB_MAX_OVERFLOW are per worker; when DB_MAX_CONNECTIONS_PER_NODE is set, both are
+    scaled down so that WEB_CONCURRENCY workers together stay within that budget.
+    Returns:
+        Dict[str, Any]: Keyword arguments for `create_async_engine`.
+    """
+    pool_size, max_overflow = settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW
+    if settings.DB_MAX_CONNECTIONS_PER_NODE > 0:
+        per_worker = max(1, settings.DB_MAX_CONNECTIONS_PER_NODE // max(1, settings.WEB_CONCURRENCY))
+        pool_size = min(pool_size, per_worker)
+        max_overflow = max(0, min(max_overflow, per_worker - pool_size))
+    return {
+        "poolclass": InstrumentedAsyncQueuePool,
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": settings.DB_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+def instrument_pool(engine: AsyncEngine, name: str) -> None:
+    """
+    Track connection hold times with pool checkout/checkin events and report the pool on /metrics
+    under `name`: wait and hold histograms, timeouts, and checked-out/overflow gauges.
+    """
+    sync_engine = engine.sync_engine
+    held_time = Histogram()
+    peak = {"checked_out": 0}
+
+    @event.listens_for(sync_engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy) -> None:
+        connection_record.info["checked_out_at"] = time.perf_counter()
+        peak["checked_out"] = max(peak["checked_out"], sync_engine.pool.checkedout())
+
+    @event.listens_for(sync_engine, "checkin")
+    def _on_checkin(dbapi_connection, connection_record) -> None:
+        checked_out_at = connection_record.info.pop("checked_out_at", None)
+        if checked_out_at is not None:
+            held_time.observe(time.perf_counter() - checked_out_at)
+
+    def stats() -> Dict[str, Any]:
+        pool = sync_engine.pool
+        return {
+            "size": pool.size(),
+            "max_overflow": pool._max_overflow,
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": max(0, pool.overflow()),
+            "peak_checked_out": peak["checked_out"],
+            "timeouts": getattr(pool, "timeouts", 0),
+            "wait_seconds": pool.wait_time.snapshot() if hasattr(pool, "wait_time") else None,
+            "held_seconds": held_time.snapshot(),
+            "compiled_cache_entries": len(sync_engine._compiled_cache or ()),
+        }
+
+    register_collector(name, stats)
+    options = pool_options()
+    logger.info(
+        f"DB pool {name}: {options['pool_size']}+{options['max_overflow']} connections per worker, "
+        f"up to {(options['pool_size'] + options['max_overflow']) * max(1, settings.WEB_CONCURRENCY)} per node"
+    )
@@ -0,0 +1,147 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, Optional
+
+from redis.exceptions import RedisError
+
+from app.config.config import settings
+from app.integrations.redis_cache import RedisCache
+from app.metrics import register_collector
+from app.utils.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = "l1_cache_invalidation"
+
+# Set while this worker is subscribed to the invalidation channel; L1 caches only serve entries then,
+# so a worker that could miss invalidations never answers from stale memory
+_subscribed = False
+
+
+class L1Cache:
+    """
+    Per-worker, in-process cache in front of Redis (the L2) for hot keys: bounded, LRU-evicted, with
+    a short per-entry TTL. Entries carry invalidation groups (e.g. a user id or a response tag);
+    invalidating a group here also announces it on Redis pub/sub so every worker drops it.
+    Counts L1 hits/misses and, for lookups that fall through, L2 hits/misses.
+    """
+
+    def __init__(self, name: str, maxsize: int, ttl: float) -> None:
+        """
+        Args:
+            name (str): Cache name, used in invalidation messages and metrics.
+            maxsize (int): Maximum number of entries.
+            ttl (float): Maximum seconds an entry is served from memory.
+        """
+        self.name = name
+        self.ttl = ttl
+        self._entries = TTLCache(maxsize=maxsize if settings.L1_CACHE_ENABLED else 0)
+        self.l2_hits = 0
+        self.l2_misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        if not _subscribed:
+            return None
+        entry = self._entries.get(key)
+        return entry[1] if entry is not None else None
+
+    def set(self, key: Hashable, value: Any, groups: Iterable[str] = (), ttl: Optional[float] = None) -> None:
+        """
+        Store `value` for at most the L1 TTL (less if `ttl` is shorter), tagged with invalidation `groups`.
+        """
+        if not _subscribed:
+            return
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl > 0:
+            self._entries.set(key, (frozenset(groups), value), ttl=ttl)
+
+    def record_l2(self, hit: bool) -> None:
+        if hit:
+            self.l2_hits += 1
+        else:
+            self.l2_misses += 1
+
+    def invalidate_local(self, group: str) -> int:
+        """
+        Drop this worker's entries in `group`.
+        """
+        return self._entries.delete_where(lambda entry: group in entry[0])
+
+    async def invalidate(self, cache: Optional[RedisCache], group: str) -> None:
+        """
+        Drop the entries in `group` in this worker and, through Redis pub/sub, in all others.
+        """
+        self.invalidate_local(group)
+        if cache is None:
+            return
+        try:
+            await cache.publish(INVALIDATION_CHANNEL, f"{self.name}|{group}")
+        except RedisError as e:
+            logger.warning(f"L1 cache invalidation broadcast failed for {self.name} {group}: {e}")
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        l1 = self._entries.stats()
+        l2_lookups = self.l2_hits + self.l2_misses
+        return {
+            "l1": {**l1, "ttl": self.ttl},
+            "l2": {
+                "hits": self.l2_hits,
+                "misses": self.l2_misses,
+                "hit_ratio": round(self.l2_hits / l2_lookups, 4) if l2_lookups else 0.0,
+            },
+        }
+
+
+_l1_caches: Dict[str, L1Cache] = {}
+
+
+def l1_cache(name: str) -> L1Cache:
+    """
+    Return the L1 cache called `name`, creating it with the L1_CACHE_* settings on first use.
+    """
+    if name not in _l1_caches:
+        _l1_caches[name] = L1Cache(name, maxsize=settings.L1_CACHE_MAX_ENTRIES, ttl=settings.L1_CACHE_TTL)
+    return _l1_caches[name]
+
+
+register_collector("cache_tiers", lambda: {name: cache.stats() for name, cache in _l1_caches.items()})
+
+
+def _apply_invalidation(message: bytes) -> None:
+    name, _, group = message.decode().partition("|")
+    cache = _l1_caches.get(name)
+    if cache is not None:
+        cache.invalidate_local(group)
+
+
+async def listen_for_invalidations_forever(connect: Callable[[], Awaitable[RedisCache]]) -> None:
+    """
+    Keep this worker's L1 caches coherent: apply every invalidation announced on Redis pub/sub.
+    L1 caches only serve entries while subscribed, and are cleared whenever the subscription is
+    (re)established, since announcements may have been missed meanwhile. Runs until cancelled.
+    Args:
+        connect (Callable[[], Awaitable[RedisCache]]): Returns the connected Redis cache; retried on failure.
+    """
+    global _subscribed
+    while True:
+        try:
+            cache = await connect()
+            async with cache.subscribe(INVALIDATION_CHANNEL) as pubsub:
+                for cache_tier in _l1_caches.values():
+                    cache_tier.clear()
+                _subscribed = True
+                logger.info("L1 cache invalidation subscription established")
+                while True:
+                    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=30)
+                    if message is not None:
+                        _apply_invalidation(message["data"])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"L1 cache invalidation subscription failed, retrying: {e}")
+        finally:
+            _subscribed = False
+        await asyncio.sleep(5)
@@ -0,0 +1,212 @@
+import asyncio
+import logging
+import time
+from contextvars import ContextVar
+from http.cookies import SimpleCookie
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config.config import settings
+from app.integrations.database import engine
+from app.integrations.db_pool import instrument_pool, pool_options
+from app.integrations.statements import statement_cache_options
+
+logger = logging.getLogger(__name__)
+
+PRIMARY_COOKIE = "db_primary_until"
+
+# Per-request state: whether this request wrote to the primary, or a recent write pins it there
+_request_state: ContextVar[Optional[Dict[str, Any]]] = ContextVar("db_request_state", default=None)
+
+
+class Replica:
+    """
+    One read replica: its engine, round-robin weight and last health check result.
+    """
+
+    def __init__(self, name: str, engine: AsyncEngine, weight: int = 1) -> None:
+        self.name = name
+        self.engine = engine
+        self.weight = weight
+        self.healthy = False
+        self.lag_seconds: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.current_weight = 0
+
+
+class ReplicaRouter:
+    """
+    Chooses a read replica per read-only session with smooth weighted round-robin over the replicas
+    that passed their last health check (reachable and replaying within DB_REPLICA_MAX_LAG_SECONDS).
+    When no replica is healthy, reads go to the primary.
+    """
+
+    def __init__(self, replicas: List[Replica]) -> None:
+        self.replicas = replicas
+
+    def pick(self) -> Optional[Replica]:
+        """
+        Return the next healthy replica, or None if there is none.
+        """
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+        total = 0
+        for replica in healthy:
+            replica.current_weight += replica.weight
+            total += replica.weight
+        chosen = max(healthy, key=lambda replica: replica.current_weight)
+        chosen.current_weight -= total
+        return chosen
+
+    async def check(self, replica: Replica) -> None:
+        """
+        Probe a replica and update its health: it must answer and lag no more than the configured maximum.
+        """
+        try:
+            async with replica.engine.connect() as connection:
+                lag = await asyncio.wait_for(
+                    connection.scalar(
+                        text(
+                            "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+                            "ELSE extract(epoch FROM now() - pg_last_xact_replay_timestamp()) END"
+                        )
+                    ),
+                    timeout=settings.DB_REPLICA_HEALTH_TIMEOUT,
+                )
+            replica.lag_seconds = float(lag) if lag is not None else None
+            healthy = replica.lag_seconds is None or replica.lag_seconds <= settings.DB_REPLICA_MAX_LAG_SECONDS
+            replica.last_error = None if healthy else f"replication lag {replica.lag_seconds:.1f}s"
+        except Exception as e:
+            healthy = False
+            replica.last_error = str(e) or type(e).__name__
+        if healthy != replica.healthy:
+            logger.warning(f"Read replica {replica.name} is now {'healthy' if healthy else 'unhealthy'}")
+        replica.healthy = healthy
+
+    async def monitor_forever(self) -> None:
+        """
+        Health-check every replica every DB_REPLICA_HEALTH_INTERVAL seconds until cancelled.
+        """
+        if not self.replicas:
+            return
+        while True:
+            await asyncio.gather(*(self.check(replica) for replica in self.replicas))
+            await asyncio.sleep(settings.DB_REPLICA_HEALTH_INTERVAL)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            replica.name: {
+                "healthy": replica.healthy,
+                "weight": replica.weight,
+                "lag_seconds": replica.lag_seconds,
+                "error": replica.last_error,
+            }
+            for replica in self.replicas
+        }
+
+
+def _parse_replica(spec: str) -> Replica:
+    """
+    Build a replica from "host:port" or "host:port:weight"; credentials and database match the primary.
+    """
+    host, port, *weight = spec.split(":")
+    url = f"postgresql+asyncpg://{settings.DB_USER}:{settings.DB_PASSWORD}@{host}:{port}/{settings.DB_NAME}"
+    replica_engine = create_async_engine(url, **pool_options(), **statement_cache_options())
+    instrument_pool(replica_engine, f"db_pool_replica_{host}_{port}")
+    return Replica(name=f"{host}:{port}", engine=replica_engine, weight=int(weight[0]) if weight else 1)
+
+
+replica_router = ReplicaRouter([_parse_replica(spec) for spec in settings.DB_READ_REPLICAS])
+
+# Read-only sessions: on a replica, or on the primary with transactions started READ ONLY
+read_only_primary_engine = engine.execution_options(postgresql_readonly=True)
+ReadSessionLocal = sessionmaker(class_=AsyncSession, autocommit=False, autoflush=False, expire_on_commit=False)
+
+
+@event.listens_for(engine.sync_engine, "after_cursor_execute")
+def _record_primary_write(conn, cursor, statement, parameters, context, executemany) -> None:
+    state = _request_state.get()
+    if state is not None and context is not None and (context.isinsert or context.isupdate or context.isdelete):
+        state["wrote"] = True
+
+
+def use_primary_for_reads() -> bool:
+    """
+    Read-your-writes: reads stick to the primary if this request has written, or if the client wrote
+    within the last DB_READ_YOUR_WRITES_SECONDS (tracked with a cookie).
+    """
+    state = _request_state.get()
+    if state is None:
+        return False
+    now = time.time()
+    # Capped, so a client-supplied cookie can't pin itself to the primary for longer than the window
+    return state["wrote"] or now < state["pinned_until"] <= now + settings.DB_READ_YOUR_WRITES_SECONDS
+
+
+def read_session() -> AsyncSession:
+    """
+    Create a read-only session on the next healthy replica, or on the primary when reads must stick
+    to it or no replica is available.
+    """
+    replica = None if use_primary_for_reads() else replica_router.pick()
+    return ReadSessionLocal(bind=replica.engine if replica else read_only_primary_engine)
+
+
+def primary_read_session() -> AsyncSession:
+    """
+    Create a read-only session on the primary, for reads whose result outlives replication lag
+    (e.g. ones that get cached).
+    """
+    return ReadSessionLocal(bind=read_only_primary_engine)
+
+
+def is_replica_session(session: AsyncSession) -> bool:
+    """
+    Whether the session reads from a read replica.
+    """
+    return any(session.bind is replica.engine for replica in replica_router.replicas)
+
+
+class ReadYourWritesMiddleware:
+    """
+    ASGI middleware tracking database writes per request. A request that wrote gets a short-lived
+    cookie, and requests carrying it read from the primary until it expires, so clients see their own
+    writes despite replication lag.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        pinned_until = 0.0
+        for name, value in scope.get("headers", []):
+            if name == b"cookie":
+                morsel = SimpleCookie(value.decode("latin-1")).get(PRIMARY_COOKIE)
+                if morsel is not None:
+                    try:
+                        pinned_until = float(morsel.value)
+                    except ValueError:
+                        pass
+        state = {"wrote": False, "pinned_until": pinned_until}
+        token = _request_state.set(state)
+
+        async def send_with_cookie(message: Message) -> None:
+            if message["type"] == "http.response.start" and state["wrote"]:
+                window = settings.DB_READ_YOUR_WRITES_SECONDS
+                # Rounded down: rounding up would exceed the cap in use_primary_for_reads, unpinning the client
+                cookie = f"{PRIMARY_COOKIE}={int(time.time() + window)}; Max-Age={window}; Path=/; HttpOnly"
+                message["headers"] = list(message.get("headers", [])) + [(b"set-cookie", cookie.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_cookie)
+        finally:
+            _request_state.reset(token)
@@ -1,27 +1,170 @@
 # Redis integration module (migrated from app/utils/redis_cache.py)
 # ...existing code from app/utils/redis_cache.py will be moved here...
 
-from typing import Any
+import asyncio
+import functools
+import logging
+import math
+import random
+import struct
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from uuid import uuid4
 
 import redis.asyncio as redis
+from redis.asyncio.client import Pipeline, PubSub
+from redis.exceptions import ConnectionError as RedisConnectionError
+from redis.exceptions import RedisError
+from redis.exceptions import TimeoutError as RedisTimeoutError
+
+from app.integrations.redis_codec import RedisCodec
+from app.utils.circuit_breaker import CircuitBreaker
+from app.utils.single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+PRINCIPAL_KEY_PREFIX = "principal"
+PRINCIPAL_INDEX_PREFIX = "principal_index"
+TOKEN_GENERATION_PREFIX = "token_generation"
+ROTATED_REFRESH_TOKEN_PREFIX = "refresh_rotated"
+RESPONSE_KEY_PREFIX = "response"
+RESPONSE_TAG_PREFIX = "response_tag"
+LOCK_PREFIX = "lock"
+
+# get_or_set entries: the loader's duration and the logical expiry (epoch seconds), then the encoded value
+ENTRY_HEADER = struct.Struct("!dd")
+
+# Atomic token bucket. State is a hash {tokens, ts}; time comes from the Redis server clock so all
+# workers agree. Returns {allowed (0/1), retry_after seconds as a string}.
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local retry_after = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+else
+    retry_after = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+return {allowed, tostring(retry_after)}
+"""
+
+
+# Set bits only in an existing filter, so a filter that was never fully built can't look complete
+BLOOM_ADD_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+for i = 1, #ARGV do
+    redis.call('SETBIT', KEYS[1], ARGV[i], 1)
+end
+return 1
+"""
+
+
+# Delete a lock only if it still holds our token, so an expired lock taken over by another worker survives
+RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+# Delete index sets (a user's principals, a response tag) together with every key they list. Running as one
+# script, it can't interleave with a writer adding to an index, which could otherwise index a new key
+# between reading and deleting the set, leaving that entry cached but out of reach of later invalidations.
+# DEL takes the keys in chunks to stay under Lua's unpack limit. Returns the number of keys deleted.
+DELETE_INDEXED_SCRIPT = """
+local deleted = 0
+for _, index_key in ipairs(KEYS) do
+    local keys = redis.call('SMEMBERS', index_key)
+    for i = 1, #keys, 1000 do
+        deleted = deleted + redis.call('DEL', unpack(keys, i, math.min(i + 999, #keys)))
+    end
+    redis.call('DEL', index_key)
+end
+return deleted
+"""
+
+
+# Errors meaning Redis is unreachable or too slow, as opposed to a command error it answered with
+OUTAGE_ERRORS = (RedisConnectionError, RedisTimeoutError, OSError, asyncio.TimeoutError)
+
+
+class CircuitOpenError(RedisConnectionError):
+    """Raised instead of calling Redis while the circuit breaker is open."""
+
+
+def _guarded(method: Callable) -> Callable:
+    """Run a RedisCache method through the circuit breaker."""
+
+    @functools.wraps(method)
+    async def wrapper(self: "RedisCache", *args: Any, **kwargs: Any) -> Any:
+        with self._guard():
+            return await method(self, *args, **kwargs)
+
+    return wrapper
+
+
+def jittered_ttl(ttl: float, jitter: float) -> int:
+    """Shorten `ttl` by a random fraction of up to `jitter`, so keys written together don't expire together."""
+    return max(1, round(ttl * (1 - random.uniform(0, jitter))))
 
 
 class RedisCache:
-    def __init__(self, url: str, max_connections: int = 10, timeout: int = 5):
+    """
+    Async Redis client for caching, rate limiting and pub/sub. Responses are not decoded: values come
+    back as bytes, and the generic get/set/mget/mset store values through a binary `RedisCodec`.
+    Every call goes through a circuit breaker: once Redis keeps failing, calls raise CircuitOpenError
+    (a RedisError, which callers already treat as a cache miss or no-op) immediately instead of
+    waiting for socket timeouts, until a probe call succeeds again.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        max_connections: int = 10,
+        timeout: float = 5,
+        codec: Optional[RedisCodec] = None,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
         self.url = url
         self.max_connections = max_connections
         self.timeout = timeout
+        self.codec = codec or RedisCodec()
+        self.breaker = breaker or CircuitBreaker("redis", failure_threshold=5, recovery_timeout=10)
         self.redis = None
         self._connected = False
+        self._token_bucket = None
+        self._bloom_add = None
+        self._release_lock = None
+        self._delete_indexed = None
+        self._loads = SingleFlight()
 
     async def connect(self):
         self.redis = await redis.from_url(
             self.url,
-            decode_responses=True,
+            decode_responses=False,
             max_connections=self.max_connections,
             socket_connect_timeout=self.timeout,
             socket_timeout=self.timeout,
         )
+        self._token_bucket = self.redis.register_script(TOKEN_BUCKET_SCRIPT)
+        self._bloom_add = self.redis.register_script(BLOOM_ADD_SCRIPT)
+        self._release_lock = self.redis.register_script(RELEASE_LOCK_SCRIPT)
+        self._delete_indexed = self.redis.register_script(DELETE_INDEXED_SCRIPT)
         self._connected = True
 
     async def close(self):
@@ -29,23 +172,355 @@ class RedisCache:
             await self.redis.close()
             self._connected = False
 
+    @contextmanager
+    def _guard(self) -> Iterator[None]:
+        if not self.breaker.allow():
+            raise CircuitOpenError(f"Redis circuit breaker is {self.breaker.state}")
+        try:
+            yield
+        except OUTAGE_ERRORS:
+            self.breaker.record_failure()
+            raise
+        except RedisError:
+            # Redis answered, with an error for this command
+            self.breaker.record_success()
+            raise
+        except BaseException:
+            self.breaker.release()
+            raise
+        else:
+            self.breaker.record_success()
+
+    @_guarded
     async def get(self, key: str) -> Any:
-        return await self.redis.get(key)
+        """Return the decoded value at `key`, or None if it's missing."""
+        value = await self.redis.get(key)
+        return self.codec.decode(value) if value is not None else None
 
+    @_guarded
     async def set(self, key: str, value: Any, expire: int = 300):
-        await self.redis.set(key, value, ex=expire)
+        await self.redis.set(key, self.codec.encode(value), ex=expire)
 
+    @_guarded
     async def delete(self, key: str):
         await self.redis.delete(key)
 
+    @_guarded
+    async def mget(self, keys: List[str]) -> List[Any]:
+        """Return the decoded values at `keys` in one round trip, with None for missing keys."""
+        if not keys:
+            return []
+        return [self.codec.decode(value) if value is not None else None for value in await self.redis.mget(keys)]
+
+    @_guarded
+    async def mset(self, values: Dict[str, Any], expire: Optional[int] = 300):
+        """
+        Store several values in one round trip: a single MSET without `expire`, otherwise pipelined SETs
+        (MSET can't set a TTL).
+        """
+        if not values:
+            return
+        encoded = {key: self.codec.encode(value) for key, value in values.items()}
+        if expire is None:
+            await self.redis.mset(encoded)
+            return
+        async with self._pipeline() as pipe:
+            for key, value in encoded.items():
+                pipe.set(key, value, ex=expire)
+
+    @_guarded
+    async def delete_many(self, keys: Iterable[str]) -> int:
+        """Delete several keys in one round trip; returns the number of keys deleted."""
+        keys = list(keys)
+        return await self.redis.delete(*keys) if keys else 0
+
+    @asynccontextmanager
+    async def pipeline(self, transaction: bool = False) -> AsyncIterator[Pipeline]:
+        """
+        Queue commands on the yielded pipeline and send them in one round trip when the block exits,
+        wrapped in MULTI/EXEC when `transaction` is set. To read the replies, `await pipe.execute()`
+        inside the block instead. Nothing is sent if the block raises. Values are passed to Redis as
+        given, so encode them with `codec` when they are read back with get/mget.
+        """
+        with self._guard():
+            async with self._pipeline(transaction) as pipe:
+                yield pipe
+
+    @asynccontextmanager
+    async def _pipeline(self, transaction: bool = False) -> AsyncIterator[Pipeline]:
+        async with self.redis.pipeline(transaction=transaction) as pipe:
+            yield pipe
+            if pipe.command_stack:
+                await pipe.execute()
+
+    @_guarded
+    async def acquire_lock(self, name: str, timeout: float) -> Optional[str]:
+        """
+        Take the lock `name` for at most `timeout` seconds (SET NX PX).
+        Returns:
+            Optional[str]: The token to release it with, or None if another holder has it.
+        """
+        token = uuid4().hex
+        acquired = await self.redis.set(f"{LOCK_PREFIX}:{name}", token, nx=True, px=max(1, int(timeout * 1000)))
+        return token if acquired else None
+
+    @_guarded
+    async def release_lock(self, name: str, token: str) -> bool:
+        """Release the lock `name` if it's still held with `token`; returns whether it was."""
+        return bool(await self._release_lock(keys=[f"{LOCK_PREFIX}:{name}"], args=[token]))
+
+    async def get_or_set(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: int,
+        beta: float = 1.0,
+        jitter: float = 0.1,
+        lock_timeout: float = 5.0,
+    ) -> Any:
+        """
+        Return the value cached at `key`, computing it with `loader` and caching it on a miss, without
+        letting a hot key stampede whatever the loader queries:
+        - concurrent calls for the key in this worker share one load (single flight);
+        - across workers, a Redis lock held for at most `lock_timeout` seconds lets one load while the
+          others poll the key for its value (and load it themselves if none appears in time);
+        - each hit refreshes the value early with a probability that grows as expiry approaches and with
+          the time the loader took (XFetch; `beta` > 1 favours earlier refreshes), so a hot key is usually
+          recomputed by one caller, while the others keep reading it, before it ever expires;
+        - the TTL is shortened by a random fraction of up to `jitter`, so keys cached together don't expire
+          together.
+        Redis errors (including an open circuit breaker) never fail the call: a failed lookup is a miss, and
+        the value is loaded without the lock or returned without being cached when those steps fail.
+        Entries carry the load time and expiry next to the value, so only read them through get_or_set.
+        Args:
+            key (str): The cache key.
+            loader (Callable[[], Awaitable[Any]]): Computes the value; its exceptions propagate and nothing is cached.
+            ttl (int): Seconds to cache the value, before jitter.
+            beta (float): XFetch weight; 0 disables early refreshes.
+            jitter (float): Largest fraction of `ttl` taken off at random.
+            lock_timeout (float): Seconds the cross-worker lock is held at most, and waited for at most.
+        Returns:
+            Any: The cached or freshly loaded value.
+        """
+        try:
+            entry = await self._get_entry(key)
+        except RedisError as e:
+            logger.warning(f"Cache lookup failed for {key}: {e}")
+            entry = None
+        if entry is not None:
+            value, delta, expires_at = entry
+            # 1 - random() is in (0, 1], so the log is defined and <= 0
+            if time.time() - delta * beta * math.log(1 - random.random()) < expires_at:
+                return value
+        return await self._loads.do(key, lambda: self._load(key, loader, ttl, jitter, lock_timeout, entry))
+
+    @_guarded
+    async def _get_entry(self, key: str) -> Optional[Tuple[Any, float, float]]:
+        data = await self.redis.get(key)
+        if data is None:
+            return None
+        delta, expires_at = ENTRY_HEADER.unpack_from(data)
+        header_size = ENTRY_HEADER.size
+        return self.codec.decode(data[header_size:]), delta, expires_at
+
+    @_guarded
+    async def _set_entry(self, key: str, value: Any, delta: float, expire: int) -> None:
+        data = ENTRY_HEADER.pack(delta, time.time() + expire) + self.codec.encode(value)
+        await self.redis.set(key, data, ex=expire)
+
+    async def _load(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: int,
+        jitter: float,
+        lock_timeout: float,
+        stale: Optional[Tuple[Any, float, float]],
+    ) -> Any:
+        lock_name = f"get_or_set:{key}"
+        token = None
+        try:
+            token = await self.acquire_lock(lock_name, lock_timeout)
+            if token is None:
+                if stale is not None:
+                    # Another worker is already refreshing the entry early; it's still valid meanwhile
+                    return stale[0]
+                deadline = time.monotonic() + lock_timeout
+                delay = 0.01
+                while time.monotonic() < deadline:
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, 0.2)
+                    entry = await self._get_entry(key)
+                    if entry is not None:
+                        return entry[0]
+                # The holder didn't store a value in time (slow or failed), so load without the lock
+        except RedisError as e:
+            logger.warning(f"Cache lock for {key} unavailable, loading without it: {e}")
+        try:
+            started_at = time.monotonic()
+            value = await loader()
+            delta = time.monotonic() - started_at
+            try:
+                await self._set_entry(key, value, delta, jittered_ttl(ttl, jitter))
+            except RedisError as e:
+                logger.warning(f"Cache store failed for {key}: {e}")
+            return value
+        finally:
+            if token is not None:
+                try:
+                    await self.release_lock(lock_name, token)
+                except RedisError as e:
+                    # The lock expires by itself after lock_timeout
+                    logger.warning(f"Cache lock release failed for {key}: {e}")
+
+    @_guarded
+    async def get_principal(self, user_id: int, token_digest: str) -> Optional[bytes]:
+        """Return the serialized principal cached for this user and token, if any."""
+        return await self.redis.get(f"{PRINCIPAL_KEY_PREFIX}:{user_id}:{token_digest}")
+
+    @_guarded
+    async def set_principal(self, user_id: int, token_digest: str, value: bytes, expire: int, index_expire: int):
+        """
+        Cache a serialized principal for a user and token.
+        Every key is tracked in a per-user index set so all of a user's principals can be
+        invalidated at once; the index outlives its members by using the maximum TTL.
+        """
+        key = f"{PRINCIPAL_KEY_PREFIX}:{user_id}:{token_digest}"
+        index_key = f"{PRINCIPAL_INDEX_PREFIX}:{user_id}"
+        async with self._pipeline() as pipe:
+            pipe.set(key, value, ex=expire)
+            pipe.sadd(index_key, key)
+            pipe.expire(index_key, index_expire)
+
+    @_guarded
+    async def invalidate_principals(self, user_id: int):
+        """Atomically drop every cached principal of a user, whatever token it was cached under."""
+        await self._delete_indexed(keys=[f"{PRINCIPAL_INDEX_PREFIX}:{user_id}"])
+
+    @_guarded
+    async def get_token_generation(self, user_id: int) -> int:
+        """Return the user's current access-token generation (0 if never bumped)."""
+        value = await self.redis.get(f"{TOKEN_GENERATION_PREFIX}:{user_id}")
+        return int(value) if value is not None else 0
+
+    @_guarded
+    async def bump_token_generation(self, user_id: int) -> int:
+        """Atomically increment the user's token generation, revoking every token issued before it."""
+        return await self.redis.incr(f"{TOKEN_GENERATION_PREFIX}:{user_id}")
+
+    @_guarded
+    async def mark_refresh_token_rotated(self, token_digest: str, user_id: int, family_id: str, expire: int):
+        """Remember a rotated refresh token until it would have expired, to detect replays."""
+        await self.redis.set(f"{ROTATED_REFRESH_TOKEN_PREFIX}:{token_digest}", f"{user_id}:{family_id}", ex=expire)
+
+    @_guarded
+    async def get_rotated_refresh_token(self, token_digest: str) -> Optional[tuple[int, str]]:
+        """Return (user_id, family_id) if this refresh token was already rotated, else None."""
+        value = await self.redis.get(f"{ROTATED_REFRESH_TOKEN_PREFIX}:{token_digest}")
+        if value is None:
+            return None
+        user_id, family_id = value.decode().split(":", 1)
+        return int(user_id), family_id
+
+    @_guarded
+    async def consume_token_bucket(
+        self, key: str, capacity: int, refill_per_second: float, cost: int = 1
+    ) -> tuple[bool, float]:
+        """
+        Atomically take `cost` tokens from the bucket at `key` in one round trip (EVALSHA).
+        Returns:
+            tuple[bool, float]: Whether the request is allowed, and seconds until it would be.
+        """
+        allowed, retry_after = await self._token_bucket(keys=[key], args=[capacity, refill_per_second, cost])
+        return bool(allowed), float(retry_after)
+
+    @_guarded
+    async def bloom_might_contain(self, key: str, positions: List[int]) -> Optional[bool]:
+        """
+        Check the Bloom filter bits at `positions` in one round trip.
+        Returns:
+            Optional[bool]: False if the item is definitely absent, True if it may be present, and None
+                if the filter has not been built.
+        """
+        fields = []
+        for position in positions:
+            fields.extend(("GET", "u1", position))
+        async with self._pipeline() as pipe:
+            pipe.exists(key)
+            # Only GET subcommands, so it's read-only; BITFIELD_RO would also need Redis 6
+            pipe.execute_command("BITFIELD", key, *fields)
+            exists, bits = await pipe.execute()
+        if not exists:
+            return None
+        return all(bits)
+
+    @_guarded
+    async def bloom_add(self, key: str, positions: List[int]) -> bool:
+        """
+        Set the Bloom filter bits at `positions`. Returns False (and does nothing) if the filter isn't built.
+        """
+        return bool(await self._bloom_add(keys=[key], args=positions))
+
+    @_guarded
+    async def replace_bloom(self, key: str, bits: bytes) -> None:
+        """
+        Atomically swap in a freshly built Bloom filter bit array.
+        """
+        building_key = f"{key}:building"
+        await self.redis.set(building_key, bits)
+        await self.redis.rename(building_key, key)
+
+    @_guarded
+    async def get_response(self, key: str) -> Optional[bytes]:
+        """Return a cached, serialized response body, if any."""
+        return await self.redis.get(f"{RESPONSE_KEY_PREFIX}:{key}")
+
+    @_guarded
+    async def set_response(self, key: str, body: bytes, expire: int, tags: List[str], tag_expire: int):
+        """
+        Cache a serialized response body and add it to each tag's index set, so everything under a
+        tag can be invalidated at once. Tag sets outlive their members by using the maximum TTL.
+        """
+        response_key = f"{RESPONSE_KEY_PREFIX}:{key}"
+        async with self._pipeline() as pipe:
+            pipe.set(response_key, body, ex=expire)
+            for tag in tags:
+                pipe.sadd(f"{RESPONSE_TAG_PREFIX}:{tag}", response_key)
+                pipe.expire(f"{RESPONSE_TAG_PREFIX}:{tag}", tag_expire)
+
+    @_guarded
+    async def invalidate_response_tags(self, *tags: str) -> int:
+        """Atomically drop every cached response under any of the tags; returns the number of responses dropped."""
+        return await self._delete_indexed(keys=[f"{RESPONSE_TAG_PREFIX}:{tag}" for tag in tags])
+
+    @_guarded
+    async def publish(self, channel: str, message: str) -> int:
+        """Publish a message; returns the number of subscribers that received it."""
+        return await self.redis.publish(channel, message)
+
+    @asynccontextmanager
+    async def subscribe(self, *channels: str) -> AsyncIterator[PubSub]:
+        """Subscribe to channels on a dedicated connection, closed when the context exits."""
+        pubsub = self.redis.pubsub()
+        try:
+            with self._guard():
+                await pubsub.subscribe(*channels)
+            yield pubsub
+        finally:
+            await pubsub.aclose()
+
     async def ping(self) -> bool:
         if self.redis:
             try:
-                return await self.redis.ping()
+                return await self._ping()
             except Exception:
                 return False
         return False
 
+    @_guarded
+    async def _ping(self) -> bool:
+        return await self.redis.ping()
+
     @property
     def connected(self) -> bool:
         return self._connected
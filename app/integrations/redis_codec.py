@@ -0,0 +1,83 @@
+import logging
+from typing import Any, Callable, Dict, Tuple
+
+import msgpack
+import orjson
+
+try:
+    import zstandard
+except ImportError:  # optional: values are stored uncompressed without it
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+# First byte of every encoded value: the serializer id, with COMPRESSED_FLAG set when the payload is
+# zstd-compressed. Decoding dispatches on it, so values written under another configuration
+# (e.g. during a rolling deploy that switches serializers) stay readable.
+JSON = 0x01
+MSGPACK = 0x02
+COMPRESSED_FLAG = 0x80
+
+
+def _msgpack_dumps(value: Any) -> bytes:
+    return msgpack.packb(value, use_bin_type=True, datetime=True)
+
+
+def _msgpack_loads(data: bytes) -> Any:
+    return msgpack.unpackb(data, raw=False, timestamp=3)
+
+
+SERIALIZERS: Dict[str, Tuple[int, Callable[[Any], bytes]]] = {
+    "json": (JSON, lambda value: orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)),
+    "msgpack": (MSGPACK, _msgpack_dumps),
+}
+DESERIALIZERS: Dict[int, Callable[[bytes], Any]] = {JSON: orjson.loads, MSGPACK: _msgpack_loads}
+
+
+class RedisCodec:
+    """
+    Binary encoding of the values stored through RedisCache's generic get/set/mget/mset: msgpack
+    (or JSON), zstd-compressed when the payload reaches `compression_threshold` bytes and the
+    optional `zstandard` package is installed.
+    """
+
+    def __init__(self, serializer: str = "msgpack", compression_threshold: int = 1024, compression_level: int = 3):
+        """
+        Args:
+            serializer (str): "msgpack" or "json".
+            compression_threshold (int): Compress payloads of at least this many bytes; 0 disables compression.
+            compression_level (int): zstd compression level.
+        Raises:
+            ValueError: If the serializer is unknown.
+        """
+        if serializer not in SERIALIZERS:
+            raise ValueError(f"Unknown Redis serializer {serializer!r}; expected one of {sorted(SERIALIZERS)}")
+        self.serializer = serializer
+        self._serializer_id, self._dumps = SERIALIZERS[serializer]
+        if compression_threshold > 0 and zstandard is None:
+            logger.warning("zstandard is not installed; Redis values will be stored uncompressed.")
+            compression_threshold = 0
+        self.compression_threshold = compression_threshold
+        self._compressor = zstandard.ZstdCompressor(level=compression_level) if compression_threshold else None
+        self._decompressor = zstandard.ZstdDecompressor() if zstandard is not None else None
+
+    def encode(self, value: Any) -> bytes:
+        payload = self._dumps(value)
+        if self._compressor is not None and len(payload) >= self.compression_threshold:
+            return bytes((self._serializer_id | COMPRESSED_FLAG,)) + self._compressor.compress(payload)
+        return bytes((self._serializer_id,)) + payload
+
+    def decode(self, data: bytes) -> Any:
+        """
+        Raises:
+            ValueError: If the value wasn't written by a RedisCodec, or is compressed and zstandard is missing.
+        """
+        header, payload = data[0], data[1:]
+        if header & COMPRESSED_FLAG:
+            if self._decompressor is None:
+                raise ValueError("Redis value is zstd-compressed but zstandard is not installed")
+            payload = self._decompressor.decompress(payload)
+        loads = DESERIALIZERS.get(header & ~COMPRESSED_FLAG)
+        if loads is None:
+            raise ValueError(f"Unknown Redis value header {header:#04x}")
+        return loads(payload)
@@ -0,0 +1,71 @@
+from typing import Any, Dict, List, TypeVar
+from uuid import uuid4
+
+from sqlalchemy.sql import Executable
+
+from app.config.config import settings
+
+StatementT = TypeVar("StatementT", bound=Executable)
+
+
+class StatementRegistry:
+    """
+    Named, prebuilt statements for the hot queries.
+    Each statement is built once at import with `bindparam` placeholders and executed with a parameter
+    dict, so a call skips building the construct and generating its cache key (memoized on the object);
+    SQLAlchemy then finds the compiled SQL in the engine's compiled cache and asyncpg reuses the prepared
+    statement of the connection.
+    """
+
+    def __init__(self) -> None:
+        self._statements: Dict[str, Executable] = {}
+
+    def register(self, name: str, statement: StatementT) -> StatementT:
+        """
+        Register a statement under a unique name and return it, for use as a module constant.
+        Args:
+            name (str): Registry name, e.g. "user_by_id".
+            statement (Executable): The statement, using `bindparam` for every per-call value.
+        Returns:
+            Executable: The same statement.
+        Raises:
+            ValueError: If the name is already taken.
+        """
+        if name in self._statements:
+            raise ValueError(f"Statement {name!r} is already registered")
+        self._statements[name] = statement
+        return statement
+
+    def __getitem__(self, name: str) -> Executable:
+        return self._statements[name]
+
+    def names(self) -> List[str]:
+        return sorted(self._statements)
+
+
+statements = StatementRegistry()
+
+
+def statement_cache_options() -> Dict[str, Any]:
+    """
+    Compiled-query and prepared-statement cache configuration, derived from settings.
+    DB_QUERY_CACHE_SIZE sizes SQLAlchemy's per-engine compiled SQL cache, DB_PREPARED_STATEMENT_CACHE_SIZE
+    the number of prepared statements asyncpg keeps per connection. With DB_PGBOUNCER_MODE (PgBouncer in
+    transaction or statement pooling, where consecutive statements may run on different server
+    connections) both prepared-statement caches are off and the statements asyncpg still prepares get
+    unique names, so they never collide on a shared server connection.
+    Returns:
+        Dict[str, Any]: Keyword arguments for `create_async_engine`.
+    """
+    if settings.DB_PGBOUNCER_MODE:
+        connect_args = {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+        }
+    else:
+        connect_args = {
+            "statement_cache_size": settings.DB_PREPARED_STATEMENT_CACHE_SIZE,
+            "prepared_statement_cache_size": settings.DB_PREPARED_STATEMENT_CACHE_SIZE,
+        }
+    return {"query_cache_size": settings.DB_QUERY_CACHE_SIZE, "connect_args": connect_args}
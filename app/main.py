@@ -1,20 +1,35 @@
 import logging
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
 from fastapi.exception_handlers import RequestValidationError
 from fastapi.exceptions import RequestValidationError as FastAPIRequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
 from sqlalchemy import text
+from starlette.exceptions import HTTPException as StarletteHTTPException
 
-from app.auth.routes.auth_routers import auth_router
+from app.auth.dependencies import get_current_admin
+from app.auth.permissions import refresh_permissions_forever
+from app.auth.routes.auth_routers import auth_router, well_known_router
+from app.auth.utils.hash_utils import hash_executor
+from app.auth.utils.token_utils import key_ring
 from app.config.config import settings
 from app.dependencies import get_redis_cache
-from app.exceptions import custom_http_exception_handler, custom_validation_exception_handler
+from app.exceptions import (
+    custom_http_exception_handler,
+    custom_validation_exception_handler,
+    http_exception_handler,
+)
 from app.integrations.celery_app import create_celery_app
 from app.integrations.database import engine
+from app.integrations.l1_cache import listen_for_invalidations_forever
+from app.integrations.read_replicas import ReadYourWritesMiddleware, replica_router
+from app.metrics import collect_metrics
+from app.rate_limit import RateLimitMiddleware
 from app.user.routes.user_routers import user_router
+from app.utils.background import spawn
 
 # =========================
 # Logging Configuration
@@ -70,20 +85,34 @@ def create_app() -> FastAPI:
         print(f"Environment: {settings.ENVIRONMENT}")
         print(f"Debug: {settings.DEBUG}")
         print(f"Workers (CPU count): {multiprocessing.cpu_count()}")
-        try:
-            await get_redis_cache()
-        except Exception as e:
-            print(f"Redis connection failed at startup: {e}")
+        key_ring.load()
+        # Never None: while Redis is unreachable, the refresher keeps retrying its subscription
+        redis_cache = await get_redis_cache()
+        permissions_refresher = spawn(refresh_permissions_forever(redis_cache), name="permissions_refresher")
+        replica_monitor = spawn(replica_router.monitor_forever(), name="replica_monitor")
+        l1_invalidation_listener = spawn(
+            listen_for_invalidations_forever(get_redis_cache), name="l1_cache_invalidation"
+        )
         yield
         # Shutdown
+        permissions_refresher.cancel()
+        replica_monitor.cancel()
+        l1_invalidation_listener.cancel()
         if hasattr(get_redis_cache, "_instance"):
             await get_redis_cache._instance.close()
+        hash_executor.shutdown()
 
-    app = FastAPI(lifespan=lifespan, **app_configs)
+    # orjson for every JSON response; routes returning a ModelResponse skip re-validation as well
+    app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse, **app_configs)
 
     # GZip compression middleware
     app.add_middleware(GZipMiddleware, minimum_size=1000)
 
+    # Rate limiting of the auth routes (per IP and per route; per email is a route dependency). Added
+    # before CORS, which therefore wraps it (the last middleware added runs first), so 429s carry CORS headers
+    if settings.RATE_LIMIT_ENABLED:
+        app.add_middleware(RateLimitMiddleware, paths=settings.RATE_LIMIT_PATHS)
+
     # CORS configuration
     app.add_middleware(
         CORSMiddleware,
@@ -93,14 +122,20 @@ def create_app() -> FastAPI:
         allow_headers=settings.ALLOW_HEADERS,
     )
 
+    # Read-your-writes stickiness for replica reads
+    if settings.DB_READ_REPLICAS:
+        app.add_middleware(ReadYourWritesMiddleware)
+
     # Exception handlers
     app.add_exception_handler(Exception, custom_http_exception_handler)
+    app.add_exception_handler(StarletteHTTPException, http_exception_handler)
     app.add_exception_handler(RequestValidationError, custom_validation_exception_handler)
     app.add_exception_handler(FastAPIRequestValidationError, custom_validation_exception_handler)
 
     # Routers (add API versioning prefix)
     app.include_router(user_router, prefix="/user", tags=["User"])
     app.include_router(auth_router, prefix="/user/auth", tags=["Auth"])
+    app.include_router(well_known_router, prefix="/.well-known", tags=["Auth"])
 
     return app
 
@@ -120,6 +155,8 @@ async def health_check():
         redis_cache = await get_redis_cache()
         if await redis_cache.ping():
             redis_status = "ok"
+        elif redis_cache.breaker.is_open:
+            redis_status = "unreachable (circuit open)"
         else:
             redis_status = "unreachable"
     except Exception as e:
@@ -130,4 +167,10 @@ async def health_check():
             db_status = "ok"
     except Exception as e:
         db_status = f"error: {str(e)}"
-    return {"status": "ok", "redis": redis_status, "database": db_status}
+    return {"status": "ok", "redis": redis_status, "database": db_status, "replicas": replica_router.status()}
+
+
+# Per-worker internals (pool usage, cache hit rates, rate limits, breaker state): admins only
+@app.get("/metrics", include_in_schema=False, dependencies=[Depends(get_current_admin)])
+async def metrics():
+    return collect_metrics()
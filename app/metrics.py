@@ -0,0 +1,65 @@
+import bisect
+import os
+from typing import Any, Callable, Dict, Sequence
+
+# Default latency buckets, in seconds
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Per-worker metric collectors, keyed by the section name they report under on /metrics
+_collectors: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+
+class Histogram:
+    """
+    Cumulative fixed-bucket histogram (Prometheus style) for per-worker latency metrics.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self._counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Return count, sum, mean, max and cumulative bucket counts keyed by upper bound.
+        """
+        cumulative, running = {}, 0
+        for bound, bucket_count in zip(self.buckets, self._counts):
+            running += bucket_count
+            cumulative[str(bound)] = running
+        cumulative["+Inf"] = self.count
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "mean": round(self.sum / self.count, 6) if self.count else 0.0,
+            "max": round(self.max, 6),
+            "buckets": cumulative,
+        }
+
+
+def register_collector(name: str, collector: Callable[[], Dict[str, Any]]) -> None:
+    """
+    Register a callable returning a snapshot of metrics for a subsystem.
+    Args:
+        name (str): Section name in the metrics payload.
+        collector (Callable[[], Dict[str, Any]]): Returns the current metric values.
+    """
+    _collectors[name] = collector
+
+
+def collect_metrics() -> Dict[str, Any]:
+    """
+    Collect a snapshot of all registered metrics for the current worker process.
+    Returns:
+        Dict[str, Any]: The worker pid and one section per registered collector.
+    """
+    return {"pid": os.getpid(), **{name: collector() for name, collector in _collectors.items()}}
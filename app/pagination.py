@@ -0,0 +1,117 @@
+import base64
+import hashlib
+import hmac
+import json
+from datetime import datetime
+from typing import Any, Generic, List, Optional, Sequence, Tuple, TypeVar
+
+from pydantic import BaseModel
+from sqlalchemy import Select, func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config.config import settings
+from app.exceptions import InvalidCursorException, raise_predefined_http_exception
+
+T = TypeVar("T")
+
+CURSOR_SIGNATURE_BYTES = 16
+
+
+class Page(BaseModel, Generic[T]):
+    """
+    One page of a keyset-paginated listing.
+    `next_cursor` is None on the last page; `total` is None unless a count was requested.
+    """
+
+    items: List[T]
+    next_cursor: Optional[str] = None
+    total: Optional[int] = None
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def _sign(payload: bytes) -> bytes:
+    secret = (settings.PAGINATION_CURSOR_SECRET or settings.JWT_SECRET).encode()
+    return hmac.new(secret, payload, hashlib.sha256).digest()[:CURSOR_SIGNATURE_BYTES]
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """
+    Encode the sort-key values of the last row of a page into an opaque, signed cursor.
+    Args:
+        values (Sequence[Any]): The row's values for the keyset columns, in order.
+    Returns:
+        str: The cursor.
+    """
+    payload = json.dumps([value.isoformat() if isinstance(value, datetime) else value for value in values]).encode()
+    return f"{_b64encode(payload)}.{_b64encode(_sign(payload))}"
+
+
+def decode_cursor(cursor: str, columns: Sequence[Any]) -> List[Any]:
+    """
+    Verify a cursor and decode its values, converting them to the python types of `columns`.
+    Raises:
+        InvalidCursorException: If the cursor is malformed or was not issued by this app.
+    """
+    try:
+        encoded_payload, encoded_signature = cursor.split(".", 1)
+        payload = _b64decode(encoded_payload)
+        if not hmac.compare_digest(_b64decode(encoded_signature), _sign(payload)):
+            raise ValueError("Bad cursor signature")
+        values = json.loads(payload)
+        if len(values) != len(columns):
+            raise ValueError("Cursor does not match the sort key")
+        return [
+            datetime.fromisoformat(value) if column.type.python_type is datetime else value
+            for value, column in zip(values, columns)
+        ]
+    except (ValueError, TypeError):
+        raise_predefined_http_exception(InvalidCursorException())
+
+
+async def paginate(
+    session: AsyncSession,
+    query: Select,
+    key_columns: Sequence[Any],
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+    with_total: bool = False,
+) -> Tuple[List[Any], Optional[str], Optional[int]]:
+    """
+    Fetch one page of `query` ordered by `key_columns` descending, using keyset (seek) pagination.
+    Each page costs one index range scan of `limit + 1` rows, however deep it is. The key columns must
+    be unique together (end them with the primary key) and should be covered by an index.
+    Args:
+        session (AsyncSession): SQLAlchemy async session.
+        query (Select): The filtered query selecting a single ORM entity; must not be ordered or limited.
+        key_columns (Sequence[Any]): Sort key columns, e.g. (User.created_at, User.id).
+        cursor (Optional[str]): The `next_cursor` of the previous page.
+        limit (Optional[int]): Page size, capped at PAGINATION_MAX_LIMIT.
+        with_total (bool): Also count all matching rows (an extra, potentially expensive, query).
+    Returns:
+        Tuple[List[Any], Optional[str], Optional[int]]: The rows, the next cursor and the total.
+    """
+    limit = min(limit or settings.PAGINATION_DEFAULT_LIMIT, settings.PAGINATION_MAX_LIMIT)
+    total = None
+    if with_total:
+        total = await session.scalar(select(func.count()).select_from(query.order_by(None).subquery()))
+
+    page_query = query
+    if cursor:
+        # Row comparison, so Postgres seeks straight to the position in the (key_columns) index
+        page_query = page_query.where(tuple_(*key_columns) < tuple_(*decode_cursor(cursor, key_columns)))
+    page_query = page_query.order_by(*(column.desc() for column in key_columns)).limit(limit + 1)
+    rows = list((await session.execute(page_query)).scalars().unique().all())
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor([getattr(last, column.key) for column in key_columns])
+    return rows, next_cursor, total
@@ -0,0 +1,211 @@
+import json
+import logging
+import time
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+from fastapi import Request
+from fastapi.responses import Response
+from redis.exceptions import RedisError
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.config.config import settings
+from app.dependencies import get_optional_redis_cache
+from app.exceptions import RateLimitExceededException, error_response, raise_predefined_http_exception
+from app.integrations.redis_cache import RedisCache
+from app.metrics import register_collector
+from app.utils.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_KEY_PREFIX = "rate_limit"
+
+
+def parse_limit(limit: str) -> Tuple[int, float]:
+    """
+    Parse a "<requests>/<seconds>" limit into a bucket capacity and refill rate.
+    Returns:
+        Tuple[int, float]: The capacity and the refill rate in tokens per second.
+    """
+    requests, seconds = limit.split("/", 1)
+    capacity = int(requests)
+    return capacity, capacity / float(seconds)
+
+
+class LocalPreFilter:
+    """
+    In-process first line of defence in front of the Redis limiter.
+    Keeps a generous per-worker token bucket per key (a multiple of the real limit, so it only trips for
+    clearly abusive clients) and remembers keys Redis has already rejected until their retry time, so
+    those requests are refused without a Redis round trip.
+    """
+
+    def __init__(self, burst: int, maxsize: int) -> None:
+        self.burst = burst
+        self._buckets = TTLCache(maxsize=maxsize)
+        self._denied = TTLCache(maxsize=maxsize)
+
+    def check(self, key: str, capacity: int, refill_per_second: float) -> Optional[float]:
+        """
+        Take one token from the local bucket for `key`.
+        Returns:
+            Optional[float]: Seconds to wait when the request must be rejected, otherwise None.
+        """
+        denied_until = self._denied.get(key)
+        now = time.time()
+        if denied_until is not None:
+            return denied_until - now
+        if self.burst <= 0:
+            return None
+        local_capacity = capacity * self.burst
+        local_rate = refill_per_second * self.burst
+        tokens, updated_at = self._buckets.get(key) or (local_capacity, now)
+        tokens = min(local_capacity, tokens + (now - updated_at) * local_rate)
+        if tokens < 1:
+            return (1 - tokens) / local_rate
+        self._buckets.set(key, (tokens - 1, now), ttl=local_capacity / local_rate)
+        return None
+
+    def deny(self, key: str, retry_after: float) -> None:
+        """
+        Reject `key` locally for `retry_after` seconds.
+        """
+        self._denied.set(key, time.time() + retry_after, ttl=retry_after)
+
+
+class RateLimiter:
+    """
+    Token-bucket rate limiter backed by an atomic Lua script in Redis, fronted by a LocalPreFilter.
+    Fails open: when Redis is unavailable only the local pre-filter applies.
+    """
+
+    def __init__(self, burst: int, maxsize: int) -> None:
+        self.prefilter = LocalPreFilter(burst=burst, maxsize=maxsize)
+        self.allowed = 0
+        self.rejected_local = 0
+        self.rejected_redis = 0
+        self.redis_errors = 0
+
+    async def hit(self, cache: Optional[RedisCache], key: str, limit: str) -> Optional[float]:
+        """
+        Count one request against `key`.
+        Args:
+            cache (Optional[RedisCache]): The shared cache, or None when Redis is unavailable.
+            key (str): Bucket key, e.g. "ip:/user/auth/login:10.0.0.1".
+            limit (str): The "<requests>/<seconds>" limit for this key.
+        Returns:
+            Optional[float]: Seconds until the client may retry when rejected, otherwise None.
+        """
+        capacity, refill_per_second = parse_limit(limit)
+        retry_after = self.prefilter.check(key, capacity, refill_per_second)
+        if retry_after is not None:
+            self.rejected_local += 1
+            return retry_after
+        if cache is not None:
+            try:
+                allowed, retry_after = await cache.consume_token_bucket(
+                    f"{RATE_LIMIT_KEY_PREFIX}:{key}", capacity, refill_per_second
+                )
+            except RedisError as e:
+                self.redis_errors += 1
+                logger.warning(f"Rate limiter fell back to the local pre-filter: {e}")
+            else:
+                if not allowed:
+                    self.rejected_redis += 1
+                    self.prefilter.deny(key, retry_after)
+                    return retry_after
+        self.allowed += 1
+        return None
+
+    async def check(self, cache: Optional[RedisCache], checks: Sequence[Tuple[str, str]]) -> Optional[float]:
+        """
+        Apply several (key, limit) checks in order, stopping at the first rejection.
+        """
+        for key, limit in checks:
+            retry_after = await self.hit(cache, key, limit)
+            if retry_after is not None:
+                return retry_after
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "allowed": self.allowed,
+            "rejected_local": self.rejected_local,
+            "rejected_redis": self.rejected_redis,
+            "redis_errors": self.redis_errors,
+        }
+
+
+rate_limiter = RateLimiter(burst=settings.RATE_LIMIT_LOCAL_BURST, maxsize=settings.RATE_LIMIT_LOCAL_MAX_KEYS)
+register_collector("rate_limit", rate_limiter.stats)
+
+
+def _client_ip(scope: Scope) -> str:
+    if settings.RATE_LIMIT_TRUST_FORWARDED_FOR:
+        for name, value in scope.get("headers", []):
+            if name == b"x-forwarded-for":
+                return value.decode("latin-1").split(",")[0].strip()
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+def _rejection_response(retry_after: float) -> Response:
+    exc = RateLimitExceededException(retry_after)
+    return error_response(
+        exc.status_code, [{"error_code": exc.error_code, "message": exc.message}], headers=exc.headers
+    )
+
+
+class RateLimitMiddleware:
+    """
+    ASGI middleware enforcing the per-IP limit, and the per-route limit if set, on the configured paths.
+    Runs before routing, body parsing and dependency resolution, so rejected requests cost no DB work.
+    """
+
+    def __init__(self, app: ASGIApp, paths: Sequence[str]) -> None:
+        self.app = app
+        self.paths = frozenset(paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+        path = scope["path"]
+        checks = [(f"ip:{path}:{_client_ip(scope)}", settings.RATE_LIMIT_PER_IP)]
+        if settings.RATE_LIMIT_PER_ROUTE:
+            checks.append((f"route:{path}", settings.RATE_LIMIT_PER_ROUTE))
+        cache = await get_optional_redis_cache()
+        retry_after = await rate_limiter.check(cache, checks)
+        if retry_after is not None:
+            await _rejection_response(retry_after)(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
+
+
+def rate_limit_by_email(scope: str) -> Callable:
+    """
+    Build a dependency limiting requests per submitted email address for one route.
+    The JSON body has already been read and cached on the request by FastAPI, so this costs no extra I/O.
+    Args:
+        scope (str): Name of the limited action, e.g. "login".
+    Returns:
+        Callable: The FastAPI dependency.
+    """
+
+    async def dependency(request: Request) -> None:
+        if not settings.RATE_LIMIT_ENABLED:
+            return
+        try:
+            body = await request.json()
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            return
+        email = body.get("email") if isinstance(body, dict) else None
+        if not isinstance(email, str) or not email:
+            return
+        cache = await get_optional_redis_cache()
+        retry_after = await rate_limiter.hit(
+            cache, f"email:{scope}:{email.strip().lower()}", settings.RATE_LIMIT_PER_EMAIL
+        )
+        if retry_after is not None:
+            raise_predefined_http_exception(RateLimitExceededException(retry_after))
+
+    return dependency
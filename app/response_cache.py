@@ -0,0 +1,237 @@
+import functools
+import hashlib
+import inspect
+import logging
+from typing import Any, Callable, Optional, Sequence
+
+from fastapi import Request
+from fastapi.responses import ORJSONResponse, Response
+from pydantic import BaseModel
+from redis.exceptions import RedisError
+
+from app.config.config import settings
+from app.dependencies import get_optional_redis_cache
+from app.integrations.l1_cache import l1_cache
+from app.integrations.redis_cache import jittered_ttl
+from app.metrics import register_collector
+from app.responses import ModelResponse
+from app.utils.single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# Keyword argument through which cached endpoints receive the request
+REQUEST_PARAMETER = "response_cache_request"
+# Largest fraction taken off a response's TTL at random, so entries cached together don't expire together
+TTL_JITTER = 0.1
+
+
+class ResponseCacheStats:
+    """
+    Per-worker counters of the response cache.
+    """
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.coalesced = 0
+        self.invalidations = 0
+        self.errors = 0
+
+    def snapshot(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "coalesced": self.coalesced,
+            "invalidations": self.invalidations,
+            "errors": self.errors,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+stats = ResponseCacheStats()
+register_collector("response_cache", stats.snapshot)
+
+# Hot responses served from worker memory, grouped by their tags
+response_l1 = l1_cache("response")
+# Concurrent misses of the same key in this worker share one endpoint call. It runs in the first caller's
+# request, whose dependencies (e.g. its DB session) live exactly as long as the call
+response_loads = SingleFlight(detached=False)
+
+
+def user_tag(namespace: str, user_id: Any) -> str:
+    return f"{namespace}:user:{user_id}"
+
+
+def build_cache_key(namespace: str, request: Request, user_id: Optional[Any]) -> str:
+    """
+    Key a cached response by namespace, principal, path and query parameters (in a canonical order).
+    Args:
+        namespace (str): The cache namespace.
+        request (Request): The request.
+        user_id (Optional[Any]): The authenticated user's id, or None for responses shared by all users.
+    Returns:
+        str: The cache key.
+    """
+    query = "&".join(f"{name}={value}" for name, value in sorted(request.query_params.multi_items()))
+    digest = hashlib.blake2b(f"{request.url.path}?{query}".encode(), digest_size=16).hexdigest()
+    return f"{namespace}:{'shared' if user_id is None else user_id}:{digest}"
+
+
+def _principal_id(request: Request) -> Optional[Any]:
+    principal = getattr(request.state, "principal", None)
+    return principal.id if principal is not None else None
+
+
+def _add_request_parameter(wrapper: Callable, endpoint: Callable) -> Callable[[dict], Request]:
+    """
+    Make FastAPI pass the request to `wrapper` under REQUEST_PARAMETER, on top of the endpoint's parameters.
+    FastAPI fills only one Request parameter per endpoint, so an endpoint taking the request itself shares it.
+    Returns:
+        Callable[[dict], Request]: Takes the request out of the wrapper's keyword arguments.
+    """
+    signature = inspect.signature(endpoint)
+    for name, parameter in signature.parameters.items():
+        if parameter.annotation is Request:
+            return lambda kwargs: kwargs[name]
+    parameter = inspect.Parameter(REQUEST_PARAMETER, inspect.Parameter.KEYWORD_ONLY, annotation=Request)
+    wrapper.__signature__ = signature.replace(parameters=[*signature.parameters.values(), parameter])
+    return lambda kwargs: kwargs.pop(REQUEST_PARAMETER)
+
+
+def _render(result: Any) -> Response:
+    if isinstance(result, Response):
+        return result
+    if isinstance(result, BaseModel):
+        return ModelResponse(result)
+    return ORJSONResponse(result)
+
+
+def cache_response(namespace: str, ttl: int, per_user: bool = True) -> Callable:
+    """
+    Cache the JSON responses of a GET endpoint in Redis as serialized bytes, also keeping them briefly in
+    the worker's L1 cache. A hit is answered without calling the endpoint, so its services and the
+    database are never touched; concurrent misses of the same entry in a worker share one call, made by
+    the first of them with its own dependencies (if it disconnects, another waiting request makes the
+    call), and TTLs are jittered so entries cached together don't expire together.
+    Entries are tagged with the namespace (and, when per user, with the user), so writes invalidate
+    them with `invalidate_response_cache`. Cached endpoints should return a model or a ModelResponse;
+    their route dependencies (e.g. authorization) still run on every request.
+    Args:
+        namespace (str): Cache namespace, e.g. "user_profile".
+        ttl (int): Seconds to keep a response, capped at RESPONSE_CACHE_MAX_TTL.
+        per_user (bool): Vary on the authenticated principal (set by `get_current_user`). When False,
+            one response is shared by every caller allowed to reach the endpoint.
+    Returns:
+        Callable: The decorator, applied below the route decorator.
+    """
+    ttl = min(ttl, settings.RESPONSE_CACHE_MAX_TTL)
+
+    def decorator(endpoint: Callable) -> Callable:
+        @functools.wraps(endpoint)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            request = take_request(kwargs)
+            cache = await get_optional_redis_cache() if settings.RESPONSE_CACHE_ENABLED else None
+            user_id = _principal_id(request) if per_user else None
+            if cache is None or request.method != "GET" or (per_user and user_id is None):
+                return await endpoint(*args, **kwargs)
+
+            key = build_cache_key(namespace, request, user_id)
+            tags = [namespace] + ([user_tag(namespace, user_id)] if per_user else [])
+            body = response_l1.get(key)
+            if body is None:
+                try:
+                    body = await cache.get_response(key)
+                    response_l1.record_l2(body is not None)
+                except RedisError as e:
+                    logger.warning(f"Response cache lookup failed: {e}")
+                    stats.errors += 1
+                if body is not None:
+                    response_l1.set(key, body, groups=tags, ttl=ttl)
+            if body is not None:
+                stats.hits += 1
+                return Response(content=body, media_type="application/json", headers={"X-Cache": "HIT"})
+
+            async def load() -> Response:
+                response = _render(await endpoint(*args, **kwargs))
+                if response.status_code == 200:
+                    expire = jittered_ttl(ttl, TTL_JITTER)
+                    try:
+                        await cache.set_response(key, response.body, expire, tags, settings.RESPONSE_CACHE_MAX_TTL)
+                        response_l1.set(key, response.body, groups=tags, ttl=expire)
+                        stats.stores += 1
+                    except RedisError as e:
+                        logger.warning(f"Response cache store failed: {e}")
+                        stats.errors += 1
+                response.headers["X-Cache"] = "MISS"
+                return response
+
+            if response_loads.in_flight(key):
+                stats.coalesced += 1
+                response = await response_loads.do(key, load)
+                return Response(
+                    content=response.body,
+                    status_code=response.status_code,
+                    media_type="application/json",
+                    headers={"X-Cache": "HIT"},
+                )
+            stats.misses += 1
+            return await response_loads.do(key, load)
+
+        take_request = _add_request_parameter(wrapper, endpoint)
+        return wrapper
+
+    return decorator
+
+
+async def invalidate_response_cache(namespace: str, user_id: Optional[Any] = None) -> None:
+    """
+    Drop cached responses after a write: the user's entries in the namespace when `user_id` is given,
+    otherwise the whole namespace. Best effort; failures are logged.
+    Args:
+        namespace (str): The cache namespace.
+        user_id (Optional[Any]): Limit the invalidation to this user's entries.
+    """
+    cache = await get_optional_redis_cache()
+    if cache is None:
+        return
+    tag = namespace if user_id is None else user_tag(namespace, user_id)
+    try:
+        await cache.invalidate_response_tags(tag)
+        stats.invalidations += 1
+    except RedisError as e:
+        logger.warning(f"Response cache invalidation failed for {tag}: {e}")
+        stats.errors += 1
+    await response_l1.invalidate(cache, tag)
+
+
+def invalidates_response_cache(*namespaces: str, user_namespaces: Sequence[str] = ()) -> Callable:
+    """
+    Invalidate cached responses after the decorated (write) endpoint succeeds.
+    Args:
+        namespaces (str): Namespaces dropped as a whole.
+        user_namespaces (Sequence[str]): Namespaces in which only the authenticated user's entries are dropped.
+    Returns:
+        Callable: The decorator, applied below the route decorator.
+    """
+
+    def decorator(endpoint: Callable) -> Callable:
+        @functools.wraps(endpoint)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            request = take_request(kwargs)
+            # Read before the endpoint runs, in case it deletes the user
+            user_id = _principal_id(request)
+            result = await endpoint(*args, **kwargs)
+            for namespace in namespaces:
+                await invalidate_response_cache(namespace)
+            if user_id is not None:
+                for namespace in user_namespaces:
+                    await invalidate_response_cache(namespace, user_id)
+            return result
+
+        take_request = _add_request_parameter(wrapper, endpoint)
+        return wrapper
+
+    return decorator
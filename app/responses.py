@@ -0,0 +1,42 @@
+from typing import Any, Mapping, Optional, Type
+
+import orjson
+from fastapi.responses import Response
+from pydantic import BaseModel
+from starlette.background import BackgroundTask
+
+
+class ModelResponse(Response):
+    """
+    JSON response for a route that already holds a validated pydantic model.
+    FastAPI passes returned responses through untouched, so this skips the `response_model` pass (dump,
+    re-validate, encode again); the model is serialized once, by pydantic-core. Keep `response_model`
+    on the route for the OpenAPI schema, and set `status_code` here.
+    """
+
+    media_type = "application/json"
+
+    def __init__(
+        self,
+        content: Any,
+        model: Optional[Type[BaseModel]] = None,
+        status_code: int = 200,
+        headers: Optional[Mapping[str, str]] = None,
+        background: Optional[BackgroundTask] = None,
+    ) -> None:
+        """
+        Args:
+            content (Any): The model instance (or plain JSON-compatible data) to send.
+            model (Optional[Type[BaseModel]]): Serialize as this model, e.g. a base class of the content's
+                type so only its fields are sent. Defaults to the content's own type.
+            status_code (int): HTTP status code.
+            headers (Optional[Mapping[str, str]]): Extra response headers.
+            background (Optional[BackgroundTask]): Task to run after the response is sent.
+        """
+        self.model = model
+        super().__init__(content, status_code=status_code, headers=headers, background=background)
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, BaseModel):
+            return (self.model or type(content)).__pydantic_serializer__.to_json(content)
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
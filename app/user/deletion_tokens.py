@@ -0,0 +1,56 @@
+"""
+Status tokens for account deletions: a signed, short-lived capability to read one deletion's status.
+The deleted user can't authenticate any more (the account is deactivated and its sessions revoked),
+so the token handed out with the 202 response is what lets them follow the purge.
+"""
+
+import base64
+import hashlib
+import hmac
+import time
+from typing import Optional
+
+from app.config.config import settings
+
+STATUS_TOKEN_SIGNATURE_BYTES = 16
+# Keeps these signatures distinct from anything else signed with JWT_SECRET
+STATUS_TOKEN_CONTEXT = b"user-deletion-status:"
+
+
+def _sign(payload: bytes) -> bytes:
+    digest = hmac.new(settings.JWT_SECRET.encode(), STATUS_TOKEN_CONTEXT + payload, hashlib.sha256).digest()
+    return digest[:STATUS_TOKEN_SIGNATURE_BYTES]
+
+
+def issue_status_token(deletion_id: str, user_id: int) -> str:
+    """
+    Issue a token granting read access to one deletion's status for USER_DELETION_STATUS_TOKEN_TTL seconds.
+    Args:
+        deletion_id (str): The deletion (purge task) id.
+        user_id (int): The user being deleted.
+    Returns:
+        str: The URL-safe token.
+    """
+    expires_at = int(time.time()) + settings.USER_DELETION_STATUS_TOKEN_TTL
+    payload = f"{deletion_id}:{user_id}:{expires_at}".encode()
+    return base64.urlsafe_b64encode(payload + _sign(payload)).rstrip(b"=").decode()
+
+
+def verify_status_token(token: str, deletion_id: str) -> Optional[int]:
+    """
+    Check a status token against the deletion it is presented for.
+    Returns:
+        Optional[int]: The deleted user's id, or None if the token is malformed, forged, expired or
+            issued for another deletion.
+    """
+    try:
+        data = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        payload, signature = data[:-STATUS_TOKEN_SIGNATURE_BYTES], data[-STATUS_TOKEN_SIGNATURE_BYTES:]
+        if not hmac.compare_digest(signature, _sign(payload)):
+            return None
+        token_deletion_id, user_id, expires_at = payload.decode().rsplit(":", 2)
+        if token_deletion_id != deletion_id or int(expires_at) <= time.time():
+            return None
+        return int(user_id)
+    except ValueError:
+        return None
@@ -1,9 +1,49 @@
-from fastapi import Depends
+from typing import Optional
+from uuid import UUID
+
+from fastapi import Depends, Request, Security
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.dependencies import get_db
+from app.auth.dependencies import authorization_scheme, get_authorization_token, get_current_user, get_read_auth_service
+from app.auth.exceptions import PermissionDeniedException
+from app.auth.services.auth_services import AuthService
+from app.config.config import settings
+from app.dependencies import get_db, get_optional_redis_cache
+from app.exceptions import raise_predefined_http_exception
+from app.integrations.redis_cache import RedisCache
+from app.user.deletion_tokens import verify_status_token
 from app.user.services.user_services import UserService
+from app.user.services.user_transfer_services import UserTransferService
+
+
+def get_user_service(
+    session: AsyncSession = Depends(get_db),
+    cache: Optional[RedisCache] = Depends(get_optional_redis_cache),
+) -> UserService:
+    return UserService(session=session, cache=cache)
+
+
+def get_user_transfer_service(
+    session: AsyncSession = Depends(get_db),
+    cache: Optional[RedisCache] = Depends(get_optional_redis_cache),
+) -> UserTransferService:
+    return UserTransferService(session=session, cache=cache)
 
 
-def get_user_service(session: AsyncSession = Depends(get_db)) -> UserService:
-    return UserService(session=session)
+async def authorize_deletion_status(
+    deletion_id: UUID,
+    request: Request,
+    token: Optional[str] = None,
+    authorization: Optional[str] = Security(authorization_scheme),
+    auth_service: AuthService = Depends(get_read_auth_service),
+) -> None:
+    """
+    Allow reading a deletion's status with the status token issued for it, or as an admin.
+    The token is checked first: the deleted user can't authenticate any more, and their client may
+    still send its revoked access token.
+    """
+    if token is not None and verify_status_token(token, str(deletion_id)) is not None:
+        return
+    current_user = await get_current_user(request, get_authorization_token(authorization), auth_service)
+    if settings.ADMIN_ROLE not in current_user.roles:
+        raise_predefined_http_exception(PermissionDeniedException())
@@ -1,4 +1,4 @@
-from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, String, Table
+from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Index, Integer, String, Table
 from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -29,7 +29,11 @@ class User(Base):
     """
 
     __tablename__ = "users"
-    __table_args__ = {"comment": "Stores user information."}
+    __table_args__ = (
+        # Keyset pagination order of the user listing
+        Index("ix_users_created_at_id", "created_at", "id"),
+        {"comment": "Stores user information."},
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     full_name = Column(String, nullable=False)
@@ -38,12 +42,13 @@ class User(Base):
     is_active = Column(Boolean, default=True, nullable=False)
     created_at = Column(DateTime(timezone=True), nullable=False, default=func.now())
 
-    # Many-to-many relationship with Role
+    # Many-to-many relationship with Role. Loaded only on request (e.g. selectinload); the auth path
+    # resolves roles through the permission registry instead of joining them on every user fetch.
     roles = relationship(
         "Role",
         secondary=user_roles,
         back_populates="users",
-        lazy="joined",
+        lazy="select",
     )
 
     def __init__(self, *args, **kwargs):
@@ -52,7 +57,7 @@ class User(Base):
     def __repr__(self):
         return (
             f"<User(id={self.id}, email={self.email}, full_name={self.full_name}, "
-            f"roles={[role.name for role in self.roles] if self.roles else None})>"
+            f"roles={[role.name for role in self.__dict__['roles']] if self.__dict__.get('roles') else None})>"
         )
 
 
@@ -1,16 +1,54 @@
-from typing import Annotated
+from typing import Annotated, Dict, Literal, Optional
+from uuid import UUID
 
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 
-from app.auth.dependencies import get_auth_service, get_current_user
+from app.auth.dependencies import get_auth_service, get_current_admin, get_current_user
 from app.auth.services.auth_services import AuthService
-from app.user.dependencies import get_user_service
-from app.user.schemas.user_schemas import UserResponse, UserUpdate
+from app.config.config import settings
+from app.pagination import Page
+from app.response_cache import cache_response, invalidates_response_cache
+from app.responses import ModelResponse
+from app.user.deletion_tokens import issue_status_token
+from app.user.dependencies import authorize_deletion_status, get_user_service, get_user_transfer_service
+from app.user.schemas.user_schemas import UserDeletionStatus, UserListItem, UserPrincipal, UserResponse, UserUpdate
 from app.user.services.user_services import UserService
+from app.user.services.user_transfer_services import UserTransferService
+from app.user.tasks import user_tasks
+
+TRANSFER_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+# Response cache namespaces: the admin user listing, and each user's own profile
+USERS_CACHE_NAMESPACE = "users"
+USER_PROFILE_CACHE_NAMESPACE = "user_profile"
 
 user_router = APIRouter()
 
 
+@user_router.get(
+    "/",
+    response_model=Page[UserListItem],
+    status_code=status.HTTP_200_OK,
+    description="List users newest first, with cursor pagination and optional filters (admin only).",
+    summary="List Users",
+    dependencies=[Depends(get_current_admin)],
+)
+@cache_response(USERS_CACHE_NAMESPACE, ttl=30, per_user=False)
+async def list_users(
+    user_service: Annotated[UserService, Depends(get_user_service)],
+    cursor: Optional[str] = None,
+    limit: Annotated[int, Query(ge=1, le=settings.PAGINATION_MAX_LIMIT)] = settings.PAGINATION_DEFAULT_LIMIT,
+    is_active: Optional[bool] = None,
+    role: Optional[str] = None,
+    with_total: bool = False,
+) -> ModelResponse:
+    return ModelResponse(
+        await user_service.list_users(cursor=cursor, limit=limit, is_active=is_active, role=role, with_total=with_total)
+    )
+
+
 @user_router.get(
     "/details",
     response_model=UserResponse,
@@ -18,8 +56,10 @@ user_router = APIRouter()
     description="Get details of the current user from the access token.",
     summary="Get Current User Details",
 )
-async def get_user_details(current_user: Annotated[UserResponse, Depends(get_current_user)]) -> UserResponse:
-    return current_user
+@cache_response(USER_PROFILE_CACHE_NAMESPACE, ttl=60)
+async def get_user_details(current_user: Annotated[UserPrincipal, Depends(get_current_user)]) -> ModelResponse:
+    # Serialized as UserResponse, so only its fields are sent
+    return ModelResponse(current_user, model=UserResponse)
 
 
 @user_router.put(
@@ -29,25 +69,88 @@ async def get_user_details(current_user: Annotated[UserResponse, Depends(get_cur
     description="Update the current user's information.",
     summary="Update Current User",
 )
+@invalidates_response_cache(USERS_CACHE_NAMESPACE, user_namespaces=[USER_PROFILE_CACHE_NAMESPACE])
 async def update_user(
     user_update: UserUpdate,
-    current_user: Annotated[UserResponse, Depends(get_current_user)],
+    current_user: Annotated[UserPrincipal, Depends(get_current_user)],
     user_service: Annotated[UserService, Depends(get_user_service)],
-) -> UserResponse:
+) -> ModelResponse:
     updated_user = await user_service.update_user(user_update, current_user)
-    return UserResponse.model_validate(updated_user)
+    return ModelResponse(UserResponse.model_validate(updated_user))
 
 
 @user_router.delete(
     "/delete",
-    status_code=status.HTTP_204_NO_CONTENT,
-    description="Delete the current user's account. Requires a valid access token in the Authorization header.",
+    response_model=UserDeletionStatus,
+    status_code=status.HTTP_202_ACCEPTED,
+    description=(
+        "Delete the current user's account. The account is deactivated and its sessions revoked at once; "
+        "its data is purged in the background. The returned status resource (Location) carries a token "
+        "that lets the deleted user follow the purge."
+    ),
     summary="Delete Current User",
 )
+@invalidates_response_cache(USERS_CACHE_NAMESPACE, user_namespaces=[USER_PROFILE_CACHE_NAMESPACE])
 async def delete_user(
-    current_user: Annotated[UserResponse, Depends(get_current_user)],
+    current_user: Annotated[UserPrincipal, Depends(get_current_user)],
     user_service: Annotated[UserService, Depends(get_user_service)],
     auth_service: Annotated[AuthService, Depends(get_auth_service)],
-) -> None:
-    await user_service.delete_user(current_user, auth_service)
-    return None
+) -> ModelResponse:
+    deletion_id = await user_service.delete_user(current_user, auth_service)
+    status_token = issue_status_token(deletion_id, current_user.id)
+    return ModelResponse(
+        UserDeletionStatus(id=deletion_id, status="pending", user_id=current_user.id),
+        status_code=status.HTTP_202_ACCEPTED,
+        headers={"Location": f"/user/deletions/{deletion_id}?token={status_token}"},
+    )
+
+
+@user_router.get(
+    "/deletions/{deletion_id}",
+    response_model=UserDeletionStatus,
+    status_code=status.HTTP_200_OK,
+    description=(
+        "Get the progress of an account deletion, with the status token from the deletion's Location, "
+        "or as an admin."
+    ),
+    summary="Get Account Deletion Status",
+    dependencies=[Depends(authorize_deletion_status)],
+)
+async def get_deletion_status(deletion_id: UUID) -> ModelResponse:
+    deletion = await run_in_threadpool(user_tasks.get_deletion_status, str(deletion_id))
+    return ModelResponse(deletion)
+
+
+@user_router.get(
+    "/export",
+    status_code=status.HTTP_200_OK,
+    description="Stream all users with their role names as NDJSON or CSV (admin only).",
+    summary="Export Users",
+    dependencies=[Depends(get_current_admin)],
+)
+async def export_users(
+    fmt: Annotated[Literal["ndjson", "csv"], Query(alias="format")] = "ndjson",
+    include_password_hashes: bool = False,
+) -> StreamingResponse:
+    return StreamingResponse(
+        UserTransferService.stream_export(fmt, include_password_hashes),
+        media_type=TRANSFER_MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="users.{fmt}"'},
+    )
+
+
+@user_router.post(
+    "/import",
+    status_code=status.HTTP_200_OK,
+    description="Bulk import users with pre-hashed passwords from an NDJSON or CSV request body (admin only).",
+    summary="Import Users",
+    dependencies=[Depends(get_current_admin)],
+)
+@invalidates_response_cache(USERS_CACHE_NAMESPACE, USER_PROFILE_CACHE_NAMESPACE)
+async def import_users(
+    request: Request,
+    transfer_service: Annotated[UserTransferService, Depends(get_user_transfer_service)],
+    fmt: Annotated[Literal["ndjson", "csv"], Query(alias="format")] = "ndjson",
+    on_conflict: Literal["skip", "update"] = "skip",
+) -> Dict[str, int]:
+    return await transfer_service.import_users(request.stream(), fmt=fmt, on_conflict=on_conflict)
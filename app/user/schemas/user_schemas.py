@@ -1,4 +1,5 @@
-from typing import Optional
+from datetime import datetime
+from typing import Dict, List, Literal, Optional
 
 from pydantic import BaseModel, EmailStr, Field, field_validator
 
@@ -12,6 +13,35 @@ class UserResponse(BaseModel):
         from_attributes = True
 
 
+class UserPrincipal(UserResponse):
+    """
+    The authenticated user as resolved from an access token.
+    Cached in Redis so authenticated requests don't need a database round trip.
+    """
+
+    is_active: bool = True
+    roles: List[str] = Field(default_factory=list)
+    role_ids: List[int] = Field(default_factory=list)
+
+
+class UserListItem(UserResponse):
+    is_active: bool
+    created_at: datetime
+    roles: List[str] = Field(default_factory=list)
+
+
+class UserDeletionStatus(BaseModel):
+    """
+    Progress of an account deletion: the account is deactivated at once and purged in the background.
+    `deleted` counts the rows removed so far per table; `user_id` is known once the purge has started.
+    """
+
+    id: str
+    status: Literal["pending", "in_progress", "completed", "failed"]
+    user_id: Optional[int] = None
+    deleted: Dict[str, int] = Field(default_factory=dict)
+
+
 class UserUpdate(BaseModel):
     full_name: Optional[str] = Field(None, min_length=3, description="Full name must contain a space")
     email: Optional[EmailStr] = Field(
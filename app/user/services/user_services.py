@@ -1,12 +1,58 @@
-from typing import Annotated, Optional
+import logging
+import time
+from typing import Annotated, Callable, Dict, Iterable, List, Optional
 
-from sqlalchemy import select
+from celery import current_app
+from fastapi.concurrency import run_in_threadpool
+from redis.exceptions import RedisError
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
+from app.auth.exceptions import DuplicateUserEmailException
+from app.auth.permissions import permission_registry
+from app.auth.statements import PURGE_USER_ACCESS_TOKENS, PURGE_USER_REFRESH_TOKENS
+from app.auth.utils.token_utils import TokenUtils
+from app.config.config import settings
 from app.exceptions import raise_predefined_http_exception
+from app.integrations.l1_cache import l1_cache
+from app.integrations.read_replicas import is_replica_session, primary_read_session
+from app.integrations.redis_cache import RedisCache
+from app.pagination import Page, paginate
 from app.user.exceptions import UserNotFoundException
-from app.user.models.user_models import User
-from app.user.schemas.user_schemas import UserUpdate
+from app.user.models.user_models import Role, User
+from app.user.schemas.user_schemas import UserListItem, UserPrincipal, UserResponse, UserUpdate
+from app.user.statements import (
+    CREATE_USER,
+    DEACTIVATE_USER,
+    EMAIL_EXISTS,
+    PRINCIPAL_ROW,
+    PURGE_USER,
+    UPDATE_PASSWORD_HASH,
+    USER_BY_EMAIL,
+    USER_BY_ID,
+    USER_IS_ACTIVE,
+)
+from app.utils.bloom_filter import BloomFilter
+
+logger = logging.getLogger(__name__)
+
+email_bloom = BloomFilter(capacity=settings.EMAIL_BLOOM_CAPACITY, error_rate=settings.EMAIL_BLOOM_ERROR_RATE)
+# The geometry is part of the key, so a resized filter starts out "not built" instead of giving wrong answers
+EMAIL_BLOOM_KEY = f"email_bloom:{email_bloom.size_bits}:{email_bloom.hash_count}"
+# Emails whose bits are set per Redis round trip when adding many at once
+EMAIL_BLOOM_ADD_BATCH_SIZE = 1000
+
+# Principals served from worker memory, invalidated per user
+principal_l1 = l1_cache("principal")
+
+
+PURGE_USER_TASK = "app.user.tasks.user_tasks.purge_user_task"
+
+
+def normalize_email(email: str) -> str:
+    return email.strip().lower()
 
 
 class UserService:
@@ -15,26 +61,103 @@ class UserService:
     Handles user lookup, creation, and validation logic.
     """
 
-    def __init__(self, session: Annotated[AsyncSession, "User DB session"]) -> None:
+    def __init__(
+        self,
+        session: Annotated[AsyncSession, "User DB session"],
+        cache: Optional[RedisCache] = None,
+    ) -> None:
         """
         Initialize UserService with a database session.
         Args:
             session (AsyncSession): SQLAlchemy async session for database
                 operations.
+            cache (Optional[RedisCache]): Redis cache used for principal caching, if available.
         """
         self.session = session
+        self.cache = cache
 
     async def user_exists_by_email(self, email: str) -> bool:
         """
         Check if a user exists by email.
+        A negative answer usually comes straight from the email Bloom filter in Redis; otherwise (or
+        when the filter says "maybe") an index-only `SELECT EXISTS` decides.
         Args:
             email (str): The email address to check.
         Returns:
             bool: True if user exists, False otherwise.
         """
-        result = await self.session.execute(select(User).filter_by(email=email))
-        user: Optional[User] = result.scalars().first()
-        return user is not None
+        if await self._email_definitely_absent(email):
+            return False
+        return bool(await self.session.scalar(EMAIL_EXISTS, {"email": email}))
+
+    async def _email_definitely_absent(self, email: str) -> bool:
+        if self.cache is None or not settings.EMAIL_BLOOM_ENABLED:
+            return False
+        try:
+            might_contain = await self.cache.bloom_might_contain(
+                EMAIL_BLOOM_KEY, email_bloom.positions(normalize_email(email))
+            )
+        except RedisError as e:
+            logger.warning(f"Email Bloom filter lookup failed: {e}")
+            return False
+        return might_contain is False
+
+    async def remember_email(self, email: str) -> None:
+        """
+        Add an email to the Bloom filter once the user holding it has been committed.
+        Args:
+            email (str): The newly taken email address.
+        """
+        await self.remember_emails([email])
+
+    async def remember_emails(self, emails: Iterable[str]) -> None:
+        """
+        Add emails to the Bloom filter once the users holding them have been committed, in batches of
+        EMAIL_BLOOM_ADD_BATCH_SIZE emails per round trip (e.g. after a bulk import).
+        Args:
+            emails (Iterable[str]): The newly taken email addresses.
+        """
+        if self.cache is None or not settings.EMAIL_BLOOM_ENABLED:
+            return
+        positions: List[int] = []
+        batched = 0
+        try:
+            for email in emails:
+                positions.extend(email_bloom.positions(normalize_email(email)))
+                batched += 1
+                if batched == EMAIL_BLOOM_ADD_BATCH_SIZE:
+                    await self.cache.bloom_add(EMAIL_BLOOM_KEY, positions)
+                    positions, batched = [], 0
+            if positions:
+                await self.cache.bloom_add(EMAIL_BLOOM_KEY, positions)
+        except RedisError as e:
+            logger.warning(f"Email Bloom filter update failed: {e}")
+
+    async def rebuild_email_bloom(self) -> int:
+        """
+        Rebuild the email Bloom filter from the users table: stream all emails, build the bit array
+        locally and swap it in with one write. Emails of users created while the build ran are re-added
+        afterwards. Requires a cache.
+        Returns:
+            int: The number of emails in the new filter.
+        """
+        started_at = await self.session.scalar(select(func.now()))
+        bits = email_bloom.new_bit_array()
+        count = 0
+        emails = await self.session.stream_scalars(select(User.email).execution_options(yield_per=10000))
+        async for email in emails:
+            email_bloom.add_to(bits, normalize_email(email))
+            count += 1
+        await self.cache.replace_bloom(EMAIL_BLOOM_KEY, bytes(bits))
+        late_emails = await self.session.scalars(select(User.email).where(User.created_at >= started_at))
+        for email in late_emails:
+            await self.remember_email(email)
+        if count > email_bloom.capacity:
+            logger.warning(
+                f"{count} emails exceed EMAIL_BLOOM_CAPACITY ({email_bloom.capacity}); false positives will rise"
+            )
+        logger.info(f"Email Bloom filter rebuilt with {count} emails")
+        return count
 
     async def get_user_by_email(self, email: str) -> User:
         """
@@ -46,7 +169,7 @@ class UserService:
         Raises:
             UserNotFoundException: If no user is found with the given email.
         """
-        result = await self.session.execute(select(User).filter_by(email=email))
+        result = await self.session.execute(USER_BY_EMAIL, {"email": email})
         user: Optional[User] = result.scalars().first()
         if not user:
             raise_predefined_http_exception(UserNotFoundException(user_id=email))
@@ -62,57 +185,256 @@ class UserService:
         Raises:
             UserNotFoundException: If no user is found with the given ID.
         """
-        result = await self.session.execute(select(User).filter_by(id=user_id))
+        result = await self.session.execute(USER_BY_ID, {"user_id": user_id})
         user: Optional[User] = result.scalars().first()
         if not user:
             raise_predefined_http_exception(UserNotFoundException(user_id=user_id))
         return user
 
-    async def create_user(self, full_name: str, email: str, password: str) -> User:
+    async def list_users(
+        self,
+        cursor: Optional[str] = None,
+        limit: Optional[int] = None,
+        is_active: Optional[bool] = None,
+        role: Optional[str] = None,
+        with_total: bool = False,
+    ) -> Page[UserListItem]:
         """
-        Create a new user in the database.
+        List users newest first with keyset pagination over (created_at, id).
+        Args:
+            cursor (Optional[str]): The `next_cursor` of the previous page.
+            limit (Optional[int]): Page size.
+            is_active (Optional[bool]): Only return active (or inactive) users.
+            role (Optional[str]): Only return users having this role.
+            with_total (bool): Also return the total number of matching users.
+        Returns:
+            Page[UserListItem]: The page of users.
+        """
+        query = select(User).options(selectinload(User.roles))
+        if is_active is not None:
+            query = query.where(User.is_active == is_active)
+        if role is not None:
+            query = query.where(User.roles.any(Role.name == role))
+        users, next_cursor, total = await paginate(
+            self.session,
+            query,
+            key_columns=(User.created_at, User.id),
+            cursor=cursor,
+            limit=limit,
+            with_total=with_total,
+        )
+        items = [
+            UserListItem(
+                id=user.id,
+                full_name=user.full_name,
+                email=user.email,
+                is_active=user.is_active,
+                created_at=user.created_at,
+                roles=[user_role.name for user_role in user.roles],
+            )
+            for user in users
+        ]
+        return Page[UserListItem](items=items, next_cursor=next_cursor, total=total)
+
+    async def get_principal(self, user_id: int, token: str, expires_at: int) -> UserPrincipal:
+        """
+        Resolve the principal for an access token, serving it from the worker's L1 cache or the Redis
+        principal cache when possible so the authenticated read path doesn't need a database connection.
+        Principals that are going to be cached are loaded from the primary, never from a replica.
+        Args:
+            user_id (int): The user ID carried by the token.
+            token (str): The raw access token; the cache is keyed by its digest.
+            expires_at (int): The token's `exp` claim, which caps the cache TTL.
+        Returns:
+            UserPrincipal: The authenticated user.
+        Raises:
+            UserNotFoundException: If no user is found with the given ID.
+        """
+        use_cache = self.cache is not None and settings.PRINCIPAL_CACHE_ENABLED
+        token_digest = TokenUtils.token_digest(token)
+        l1_key = (user_id, token_digest)
+        l1_ttl = expires_at - time.time()
+        if use_cache:
+            principal = principal_l1.get(l1_key)
+            if principal is not None:
+                return principal
+            try:
+                cached = await self.cache.get_principal(user_id, token_digest)
+                principal_l1.record_l2(cached is not None)
+                if cached:
+                    principal = UserPrincipal.model_validate_json(cached)
+                    principal_l1.set(l1_key, principal, groups=[str(user_id)], ttl=l1_ttl)
+                    return principal
+            except RedisError as e:
+                logger.warning(f"Principal cache lookup failed: {e}")
+
+        # Role names and permissions come from the per-worker permission registry, not a join through roles
+        if use_cache and is_replica_session(self.session):
+            # A lagging replica could still return a user from before a deactivation or role change, and
+            # the cached principal would keep serving it for PRINCIPAL_CACHE_TTL; cached misses read the primary
+            async with primary_read_session() as session:
+                row = (await session.execute(PRINCIPAL_ROW, {"user_id": user_id})).first()
+        else:
+            row = (await self.session.execute(PRINCIPAL_ROW, {"user_id": user_id})).first()
+        if row is None:
+            raise_predefined_http_exception(UserNotFoundException(user_id=user_id))
+        await permission_registry.ensure_loaded()
+        user_role_ids = sorted(row[4] or [])
+        principal = UserPrincipal(
+            id=row.id,
+            full_name=row.full_name,
+            email=row.email,
+            is_active=row.is_active,
+            roles=permission_registry.role_names(user_role_ids),
+            role_ids=user_role_ids,
+        )
+        ttl = min(settings.PRINCIPAL_CACHE_TTL, expires_at - int(time.time()))
+        if use_cache and ttl > 0:
+            try:
+                await self.cache.set_principal(
+                    user_id,
+                    token_digest,
+                    UserPrincipal.__pydantic_serializer__.to_json(principal),
+                    expire=ttl,
+                    index_expire=settings.PRINCIPAL_CACHE_TTL,
+                )
+            except RedisError as e:
+                logger.warning(f"Principal cache store failed: {e}")
+            else:
+                principal_l1.set(l1_key, principal, groups=[str(user_id)], ttl=l1_ttl)
+        return principal
+
+    async def invalidate_principal(self, user_id: int) -> None:
+        """
+        Drop all cached principals of a user so the next request reloads them from the database.
+        Args:
+            user_id (int): The user whose principals should be invalidated.
+        """
+        if self.cache is None:
+            return
+        try:
+            await self.cache.invalidate_principals(user_id)
+        except RedisError as e:
+            logger.warning(f"Principal cache invalidation failed for user {user_id}: {e}")
+        await principal_l1.invalidate(self.cache, str(user_id))
+
+    async def create_user(self, full_name: str, email: str, password: str) -> Optional[UserResponse]:
+        """
+        Insert a new user in a single `INSERT ... ON CONFLICT DO NOTHING ... RETURNING` round trip.
+        Email uniqueness is enforced by the unique index rather than a prior SELECT. The caller owns
+        the transaction and must commit.
         Args:
             full_name (str): The user's full name.
             email (str): The user's email address.
             password (str): The user's hashed password.
         Returns:
-            User: The created user object.
+            Optional[UserResponse]: The created user, or None if the email is already taken.
         """
-        new_user = User(full_name=full_name, email=email, password=password)
-        self.session.add(new_user)
-        await self.session.commit()
-        await self.session.refresh(new_user)
-        return new_user
+        result = await self.session.execute(
+            CREATE_USER, {"p_full_name": full_name, "p_email": email, "p_password": password}
+        )
+        row = result.first()
+        if row is None:
+            return None
+        return UserResponse(id=row.id, full_name=row.full_name, email=row.email)
 
-    async def update_user(self, user_update: UserUpdate, current_user: User) -> User:
+    async def update_password_hash(self, user_id: int, old_hash: str, new_hash: str) -> bool:
+        """
+        Replace a user's password hash, but only if it still equals `old_hash`, so a concurrent
+        password change is never overwritten. The caller owns the transaction and must commit.
+        Args:
+            user_id (int): The user ID.
+            old_hash (str): The hash the new one replaces.
+            new_hash (str): The new password hash.
+        Returns:
+            bool: True if the hash was updated.
+        """
+        result = await self.session.execute(
+            UPDATE_PASSWORD_HASH, {"user_id": user_id, "old_hash": old_hash, "new_hash": new_hash}
+        )
+        return result.rowcount == 1
+
+    async def update_user(self, user_update: UserUpdate, current_user: UserPrincipal) -> User:
         """
         Update an existing user in the database.
         Args:
             user_update (UserUpdate): The user update data (should not contain id or password).
-            current_user (User): The current user object.
+            current_user (UserPrincipal): The authenticated user.
         Returns:
             User: The updated user object.
         """
         update_data = user_update.dict(exclude_unset=True)
-        # Check for email uniqueness if email is being updated
-        if "email" in update_data and update_data["email"] != current_user.email:
-            if await self.user_exists_by_email(update_data["email"]):
-                from app.auth.exceptions import DuplicateUserEmailException
-
-                raise_predefined_http_exception(DuplicateUserEmailException(update_data["email"]))
+        email_changed = "email" in update_data and update_data["email"] != current_user.email
+        # Cheap pre-check; the unique index below is what actually guarantees uniqueness
+        if email_changed and await self.user_exists_by_email(update_data["email"]):
+            raise_predefined_http_exception(DuplicateUserEmailException(update_data["email"]))
+        user = await self.get_user_by_id(user_id=current_user.id)
         for field, value in update_data.items():
-            setattr(current_user, field, value)
+            setattr(user, field, value)
+        try:
+            await self.session.commit()
+        except IntegrityError:
+            await self.session.rollback()
+            raise_predefined_http_exception(DuplicateUserEmailException(update_data["email"]))
+        await self.session.refresh(user)
+        if email_changed:
+            await self.remember_email(user.email)
+        await self.invalidate_principal(user.id)
+        return user
+
+    async def delete_user(self, current_user: UserPrincipal, auth_service) -> str:
+        """
+        Delete the current user in the background. The account is deactivated right away, which blocks
+        refreshes and authentication, and its stateless access tokens are revoked by a generation bump;
+        `purge_user_task` then removes its tokens in batches and finally the user.
+        Args:
+            current_user (UserPrincipal): The authenticated user to delete.
+            auth_service (AuthService): The auth service used to bump the user's token generation.
+        Returns:
+            str: The deletion id, which identifies the purge task for the status resource.
+        """
+        await self.session.execute(DEACTIVATE_USER, {"user_id": current_user.id})
+        # Enqueued before the commit, so a failure here changes nothing; if the commit fails instead,
+        # the task keeps finding the user active and fails once its retries are exhausted
+        task = await run_in_threadpool(
+            current_app.send_task, PURGE_USER_TASK, args=[current_user.id], queue="user-queue"
+        )
         await self.session.commit()
-        await self.session.refresh(current_user)
-        return current_user
+        # Deactivation already blocks refresh and authentication; the tokens go in the batched purge
+        await auth_service.bump_token_generation(current_user.id)
+        await self.invalidate_principal(current_user.id)
+        return task.id
 
-    async def delete_user(self, current_user: User, auth_service) -> None:
+    async def purge_user(
+        self, user_id: int, batch_size: int, on_progress: Optional[Callable[[Dict[str, int]], None]] = None
+    ) -> Optional[Dict[str, int]]:
         """
-        Delete the current user from the database, including all related tokens.
+        Delete a deactivated user's token rows, `batch_size` rows per transaction so no lock is held
+        for long, then the user itself. Idempotent: a user that is already gone purges nothing.
         Args:
-            current_user (User): The user to delete.
-            auth_service (AuthService): The auth service to handle token deletion.
+            user_id (int): The user to purge.
+            batch_size (int): Rows deleted per transaction.
+            on_progress (Optional[Callable[[Dict[str, int]], None]]): Called with the counts after each batch.
+        Returns:
+            Optional[Dict[str, int]]: Rows deleted per table, or None if the user is active (not being deleted).
         """
-        await auth_service.delete_user_tokens(current_user.id)
-        await self.session.delete(current_user)
+        if await self.session.scalar(USER_IS_ACTIVE, {"user_id": user_id}):
+            return None
+        deleted = {"refresh_tokens": 0, "access_tokens": 0, "users": 0}
+        for table, statement in (
+            ("refresh_tokens", PURGE_USER_REFRESH_TOKENS),
+            ("access_tokens", PURGE_USER_ACCESS_TOKENS),
+        ):
+            while True:
+                result = await self.session.execute(statement, {"user_id": user_id, "batch_size": batch_size})
+                await self.session.commit()
+                deleted[table] += result.rowcount
+                if on_progress is not None:
+                    on_progress(deleted)
+                if result.rowcount < batch_size:
+                    break
+        result = await self.session.execute(PURGE_USER, {"user_id": user_id})
         await self.session.commit()
+        deleted["users"] = result.rowcount
+        logger.info(f"Purged user {user_id}: {deleted}")
+        return deleted
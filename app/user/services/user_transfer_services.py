@@ -0,0 +1,233 @@
+import asyncio
+import logging
+from typing import Annotated, AsyncIterable, AsyncIterator, Dict, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.auth.services.auth_services import AuthService
+from app.config.config import settings
+from app.integrations.database import AsyncSessionLocal
+from app.integrations.redis_cache import RedisCache
+
+logger = logging.getLogger(__name__)
+
+TRANSFER_FORMATS = ("ndjson", "csv")
+CONFLICT_MODES = ("skip", "update")
+
+# Chunks buffered between COPY and the consumer; bounds export memory and applies backpressure
+EXPORT_BUFFER_CHUNKS = 16
+
+# CSV options that let a single JSON document per line pass through COPY untouched: row_to_json escapes
+# control characters, so these bytes never occur inside the documents and nothing gets quoted.
+JSON_LINE_COPY_OPTIONS = {"format": "csv", "quote": "\x01", "delimiter": "\x02"}
+
+EXPORT_QUERY = """
+    SELECT users.id, users.full_name, users.email, {password_column}users.is_active, users.created_at,
+           coalesce(array_agg(roles.name ORDER BY roles.name) FILTER (WHERE roles.name IS NOT NULL), '{{}}')
+               AS roles
+    FROM users
+    LEFT JOIN user_roles ON user_roles.user_id = users.id
+    LEFT JOIN roles ON roles.id = user_roles.role_id
+    GROUP BY users.id
+    ORDER BY users.id
+"""
+
+STAGING_TABLE = "users_import"
+# Same columns as an export with password hashes, so an export can be imported as is; `id` is ignored
+STAGING_COLUMNS = ("id", "full_name", "email", "password", "is_active", "created_at", "roles")
+
+UPDATED_ON_CONFLICT = ("full_name", "password", "is_active")
+MERGE_CONFLICT_CLAUSES = {
+    "skip": "DO NOTHING",
+    "update": "DO UPDATE SET " + ", ".join(f"{column} = EXCLUDED.{column}" for column in UPDATED_ON_CONFLICT),
+}
+
+# Rows without an Argon2 hash are rejected so plaintext passwords can never be imported.
+# `previous` reads the statement's snapshot, i.e. the users as they were before the merge, so updated
+# users whose password changed or who were deactivated can be told apart; their persisted tokens are
+# deleted in the same statement, so no refresh token issued before the import survives it.
+MERGE_QUERY = """
+    WITH source AS (
+        SELECT DISTINCT ON (email) full_name, email, password, coalesce(is_active, true) AS is_active,
+               coalesce(created_at, now()) AS created_at, coalesce(roles, '{{}}') AS roles
+        FROM users_import
+        WHERE email IS NOT NULL AND full_name IS NOT NULL AND password LIKE '$argon2%'
+        ORDER BY email
+    ), previous AS (
+        SELECT id, password, is_active FROM users WHERE email IN (SELECT email FROM source)
+    ), merged AS (
+        INSERT INTO users (full_name, email, password, is_active, created_at)
+        SELECT full_name, email, password, is_active, created_at FROM source
+        ON CONFLICT (email) {conflict_clause}
+        RETURNING id, email, (xmax = 0) AS inserted
+    ), assigned AS (
+        INSERT INTO user_roles (user_id, role_id)
+        SELECT merged.id, roles.id
+        FROM merged
+        JOIN source ON source.email = merged.email
+        JOIN roles ON roles.name = ANY(source.roles)
+        ON CONFLICT DO NOTHING
+        RETURNING 1
+    ), revoked AS (
+        SELECT merged.id
+        FROM merged
+        JOIN previous ON previous.id = merged.id
+        JOIN source ON source.email = merged.email
+        WHERE NOT merged.inserted
+          AND (previous.password IS DISTINCT FROM source.password OR (previous.is_active AND NOT source.is_active))
+    ), revoked_refresh_tokens AS (
+        DELETE FROM refresh_tokens WHERE user_id IN (SELECT id FROM revoked)
+        RETURNING 1
+    ), revoked_access_tokens AS (
+        DELETE FROM access_tokens WHERE user_id IN (SELECT id FROM revoked)
+        RETURNING 1
+    )
+    SELECT
+        (SELECT count(*) FROM users_import) AS received,
+        (SELECT count(*) FROM merged WHERE inserted) AS inserted,
+        (SELECT count(*) FROM merged WHERE NOT inserted) AS updated,
+        (SELECT count(*) FROM assigned) AS roles_assigned,
+        (SELECT count(*) FROM revoked_refresh_tokens) + (SELECT count(*) FROM revoked_access_tokens)
+            AS tokens_revoked,
+        (SELECT coalesce(array_agg(email), '{{}}') FROM merged WHERE inserted) AS inserted_emails,
+        (SELECT coalesce(array_agg(id), '{{}}') FROM merged WHERE NOT inserted) AS updated_ids,
+        (SELECT coalesce(array_agg(id), '{{}}') FROM revoked) AS revoked_ids
+"""
+
+
+class UserTransferService:
+    """
+    Service class for bulk user export and import through Postgres COPY.
+    Both directions stream, so memory use is constant regardless of the number of users, and a bulk
+    import costs one COPY plus one merge statement instead of a round trip and commit per user.
+    """
+
+    def __init__(
+        self,
+        session: Annotated[AsyncSession, "User transfer DB session"],
+        cache: Optional[RedisCache] = None,
+    ) -> None:
+        """
+        Initialize UserTransferService with a database session.
+        Args:
+            session (AsyncSession): SQLAlchemy async session for database operations.
+            cache (Optional[RedisCache]): Redis cache holding principals and token generations, if available.
+        """
+        self.session = session
+        self.auth_service = AuthService(session, cache=cache)
+
+    async def _driver_connection(self):
+        connection = await self.session.connection()
+        raw_connection = await connection.get_raw_connection()
+        return raw_connection.driver_connection
+
+    async def export_users(self, fmt: str = "ndjson", include_password_hashes: bool = False) -> AsyncIterator[bytes]:
+        """
+        Stream all users with their role names straight out of `COPY ... TO STDOUT`.
+        Args:
+            fmt (str): "ndjson" (one JSON object per line) or "csv" (with a header row).
+            include_password_hashes (bool): Include the password hashes, e.g. for a migration.
+        Yields:
+            bytes: Chunks of the export as produced by the server.
+        """
+        if fmt not in TRANSFER_FORMATS:
+            raise ValueError(f"Unsupported export format: {fmt}")
+        query = EXPORT_QUERY.format(password_column="users.password, " if include_password_hashes else "")
+        if fmt == "ndjson":
+            query = f"SELECT row_to_json(exported) FROM ({query}) AS exported"
+            options = JSON_LINE_COPY_OPTIONS
+        else:
+            options = {"format": "csv", "header": True}
+
+        driver_connection = await self._driver_connection()
+        chunks: asyncio.Queue = asyncio.Queue(maxsize=EXPORT_BUFFER_CHUNKS)
+
+        async def copy_out() -> None:
+            try:
+                await driver_connection.copy_from_query(query, output=chunks.put, **options)
+            finally:
+                await chunks.put(None)
+
+        copy_task = asyncio.create_task(copy_out())
+        try:
+            while (chunk := await chunks.get()) is not None:
+                yield chunk
+            await copy_task
+        finally:
+            if not copy_task.done():
+                copy_task.cancel()
+                await asyncio.gather(copy_task, return_exceptions=True)
+
+    @staticmethod
+    async def stream_export(fmt: str = "ndjson", include_password_hashes: bool = False) -> AsyncIterator[bytes]:
+        """
+        Export with a dedicated session that lives as long as the stream, for use in streaming responses
+        (request-scoped sessions are closed before the response body is sent).
+        """
+        async with AsyncSessionLocal() as session:
+            async for chunk in UserTransferService(session).export_users(fmt, include_password_hashes):
+                yield chunk
+
+    async def import_users(self, source: AsyncIterable[bytes], fmt: str = "ndjson", on_conflict: str = "skip") -> Dict:
+        """
+        Bulk-load users with pre-hashed (Argon2) passwords: `COPY FROM` into a temporary staging table,
+        then a single `INSERT ... SELECT ... ON CONFLICT` merge, including role assignments by name.
+        Updated users whose password changed or who were deactivated lose their persisted tokens in the
+        same transaction. Commits on success, then adds the inserted emails to the email Bloom filter and
+        invalidates the cached principals of updated users (and, with stateless access tokens, bumps the
+        revoked users' token generations).
+        Args:
+            source (AsyncIterable[bytes]): NDJSON, or CSV with a header row and the columns of an export
+                with password hashes.
+            fmt (str): "ndjson" or "csv".
+            on_conflict (str): "skip" existing emails or "update" them.
+        Returns:
+            Dict: Counts of received, inserted, updated and skipped rows (invalid, duplicate or existing
+                emails), of role assignments and of revoked token rows.
+        """
+        if fmt not in TRANSFER_FORMATS:
+            raise ValueError(f"Unsupported import format: {fmt}")
+        if on_conflict not in CONFLICT_MODES:
+            raise ValueError(f"Unsupported conflict mode: {on_conflict}")
+
+        await self.session.execute(
+            text(
+                f"CREATE TEMPORARY TABLE {STAGING_TABLE} (id bigint, full_name text, email text, password text, "
+                "is_active boolean, created_at timestamptz, roles text[]) ON COMMIT DROP"
+            )
+        )
+        driver_connection = await self._driver_connection()
+        if fmt == "ndjson":
+            await self.session.execute(text("CREATE TEMPORARY TABLE users_import_json (doc jsonb) ON COMMIT DROP"))
+            await driver_connection.copy_to_table("users_import_json", source=source, **JSON_LINE_COPY_OPTIONS)
+            await self.session.execute(
+                text(
+                    f"INSERT INTO {STAGING_TABLE} ({', '.join(STAGING_COLUMNS)}) "
+                    f"SELECT {', '.join(STAGING_COLUMNS)} "
+                    f"FROM users_import_json, jsonb_populate_record(NULL::{STAGING_TABLE}, doc)"
+                )
+            )
+        else:
+            await driver_connection.copy_to_table(
+                STAGING_TABLE, source=source, columns=list(STAGING_COLUMNS), format="csv", header=True
+            )
+
+        result = await self.session.execute(
+            text(MERGE_QUERY.format(conflict_clause=MERGE_CONFLICT_CLAUSES[on_conflict]))
+        )
+        counts = dict(result.mappings().one())
+        await self.session.commit()
+        inserted_emails = counts.pop("inserted_emails")
+        updated_ids, revoked_ids = counts.pop("updated_ids"), counts.pop("revoked_ids")
+        # Keep the email Bloom filter free of false negatives: it must know every taken email
+        await self.auth_service.user_service.remember_emails(inserted_emails)
+        if settings.JWT_STATELESS_ACCESS_TOKENS:
+            # Stateless access tokens aren't persisted, so the merge couldn't delete them
+            for user_id in revoked_ids:
+                await self.auth_service.bump_token_generation(user_id)
+        for user_id in updated_ids:
+            await self.auth_service.user_service.invalidate_principal(user_id)
+        counts["skipped"] = counts["received"] - counts["inserted"] - counts["updated"]
+        logger.info(f"User import finished: {counts}")
+        return counts
@@ -0,0 +1,62 @@
+"""
+Prebuilt statements for the hot user queries; see `app.integrations.statements`.
+"""
+
+from sqlalchemy import bindparam, exists, func, select
+from sqlalchemy.dialects.postgresql import insert
+
+from app.integrations.statements import statements
+from app.user.models.user_models import User, user_roles
+
+users = User.__table__
+
+USER_BY_ID = statements.register("user_by_id", select(User).where(User.id == bindparam("user_id")))
+
+USER_BY_EMAIL = statements.register("user_by_email", select(User).where(User.email == bindparam("email")))
+
+EMAIL_EXISTS = statements.register("email_exists", select(exists().where(User.email == bindparam("email"))))
+
+# One index lookup on users plus an index-only scan of user_roles for the role ids
+PRINCIPAL_ROW = statements.register(
+    "principal_row",
+    select(
+        User.id,
+        User.full_name,
+        User.email,
+        User.is_active,
+        select(func.array_agg(user_roles.c.role_id)).where(user_roles.c.user_id == User.id).scalar_subquery(),
+    ).where(User.id == bindparam("user_id")),
+)
+
+# Email uniqueness is enforced by the unique index; a taken email returns no row
+CREATE_USER = statements.register(
+    "create_user",
+    insert(users)
+    .values(full_name=bindparam("p_full_name"), email=bindparam("p_email"), password=bindparam("p_password"))
+    .on_conflict_do_nothing(index_elements=[users.c.email])
+    .returning(users.c.id, users.c.full_name, users.c.email),
+)
+
+# Core statement, so the ORM doesn't add a RETURNING to synchronize the session
+UPDATE_PASSWORD_HASH = statements.register(
+    "update_password_hash",
+    users.update()
+    .where(users.c.id == bindparam("user_id"), users.c.password == bindparam("old_hash"))
+    .values(password=bindparam("new_hash")),
+)
+
+DEACTIVATE_USER = statements.register(
+    "deactivate_user",
+    users.update().where(users.c.id == bindparam("user_id")).values(is_active=False),
+)
+
+USER_IS_ACTIVE = statements.register(
+    "user_is_active",
+    select(users.c.is_active).where(users.c.id == bindparam("user_id")),
+)
+
+# Only ever deletes a deactivated user; its token rows cascade, though the purge removes them first
+PURGE_USER = statements.register(
+    "purge_user",
+    users.delete().where(users.c.id == bindparam("user_id"), users.c.is_active.is_(False)),
+)
@@ -1,4 +1,24 @@
+from typing import Dict, Optional
+
+from asgiref.sync import async_to_sync
 from celery import shared_task
+from celery.result import AsyncResult
+
+from app.config.config import settings
+from app.integrations.database import task_session
+from app.user.schemas.user_schemas import UserDeletionStatus
+from app.user.services.user_services import UserService
+
+DELETION_STATUSES = {
+    "PENDING": "pending",
+    "RECEIVED": "pending",
+    "STARTED": "in_progress",
+    "PROGRESS": "in_progress",
+    "RETRY": "in_progress",
+    "SUCCESS": "completed",
+    "FAILURE": "failed",
+    "REVOKED": "failed",
+}
 
 
 @shared_task(bind=True, queue="user-queue", max_retries=3, default_retry_delay=10)
@@ -7,3 +27,45 @@ def user_created_task(self, user_email: str):
         print(f"Hi {user_email}")
     except Exception as exc:
         raise self.retry(exc=exc)
+
+
+async def _purge_user(task, user_id: int) -> Optional[Dict[str, int]]:
+    async with task_session() as session:
+        return await UserService(session).purge_user(
+            user_id,
+            batch_size=settings.USER_PURGE_BATCH_SIZE,
+            on_progress=lambda deleted: task.update_state(
+                state="PROGRESS", meta={"user_id": user_id, "deleted": deleted}
+            ),
+        )
+
+
+@shared_task(bind=True, queue="user-queue", max_retries=5, default_retry_delay=10, acks_late=True)
+def purge_user_task(self, user_id: int):
+    """
+    Purge a deactivated user: its tokens in batches, then the user. Idempotent. Retries while the user
+    is still active, since the deactivating transaction may not have committed yet.
+    """
+    try:
+        deleted = async_to_sync(_purge_user)(self, user_id)
+    except Exception as exc:
+        raise self.retry(exc=exc)
+    if deleted is None:
+        raise self.retry()
+    return {"user_id": user_id, "deleted": deleted}
+
+
+def get_deletion_status(deletion_id: str) -> UserDeletionStatus:
+    """
+    Report the progress of a user deletion from its purge task's state in the result backend.
+    Unknown ids read as pending, with no user id until the task has reported progress.
+    Blocking: call it from a thread pool.
+    """
+    result = AsyncResult(deletion_id)
+    info = result.info if isinstance(result.info, dict) else {}
+    return UserDeletionStatus(
+        id=deletion_id,
+        status=DELETION_STATUSES.get(result.state, "pending"),
+        user_id=info.get("user_id"),
+        deleted=info.get("deleted", {}),
+    )
@@ -0,0 +1,30 @@
+import asyncio
+import logging
+from typing import Any, Coroutine, Set
+
+logger = logging.getLogger(__name__)
+
+# Strong references to in-flight fire-and-forget tasks so they aren't garbage collected mid-run
+_background_tasks: Set[asyncio.Task] = set()
+
+
+def _on_task_done(task: asyncio.Task) -> None:
+    _background_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"Background task {task.get_name()} failed: {task.exception()!r}")
+
+
+def spawn(coro: Coroutine[Any, Any, Any], name: str = None) -> asyncio.Task:
+    """
+    Schedule a coroutine to run in the background on the current event loop.
+    Failures are logged instead of being silently dropped.
+    Args:
+        coro (Coroutine): The coroutine to run.
+        name (str, optional): Task name used in logs.
+    Returns:
+        asyncio.Task: The scheduled task.
+    """
+    task = asyncio.create_task(coro, name=name)
+    _background_tasks.add(task)
+    task.add_done_callback(_on_task_done)
+    return task
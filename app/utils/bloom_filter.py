@@ -0,0 +1,45 @@
+import hashlib
+import math
+from typing import List
+
+
+class BloomFilter:
+    """
+    Bloom filter geometry and hashing. The bits themselves live elsewhere (e.g. a Redis string); this
+    class only maps items to bit positions, using double hashing over one BLAKE2b digest.
+    Bit `n` follows Redis SETBIT/GETBIT numbering: the most significant bit of byte `n // 8` first.
+    """
+
+    def __init__(self, capacity: int, error_rate: float) -> None:
+        """
+        Size the filter for `capacity` items at the given false-positive rate.
+        Args:
+            capacity (int): Expected number of items.
+            error_rate (float): Target false-positive probability at capacity, e.g. 0.01.
+        """
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size_bits = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size_bits / capacity * math.log(2)))
+
+    def positions(self, item: str) -> List[int]:
+        """
+        Return the bit positions of `item`.
+        """
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "big")
+        second = int.from_bytes(digest[8:], "big") | 1
+        return [(first + index * second) % self.size_bits for index in range(self.hash_count)]
+
+    def new_bit_array(self) -> bytearray:
+        """
+        Return an empty local bit array, for building the whole filter before storing it in one write.
+        """
+        return bytearray((self.size_bits + 7) // 8)
+
+    def add_to(self, bits: bytearray, item: str) -> None:
+        """
+        Set the bits of `item` in a local bit array.
+        """
+        for position in self.positions(item):
+            bits[position >> 3] |= 0x80 >> (position & 7)
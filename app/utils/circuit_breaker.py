@@ -0,0 +1,91 @@
+import logging
+import time
+from typing import Any, Dict
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Fail-fast guard for a remote dependency. Closed, calls go through; `failure_threshold` consecutive
+    failures open it, and calls are then rejected immediately for `recovery_timeout` seconds. It then
+    turns half-open: a single probe call goes through, closing the breaker if it succeeds and
+    re-opening it if it fails. State changes are logged and counted.
+    """
+
+    def __init__(self, name: str, failure_threshold: int, recovery_timeout: float) -> None:
+        """
+        Args:
+            name (str): Name of the guarded dependency, used in logs.
+            failure_threshold (int): Consecutive failures that open the breaker.
+            recovery_timeout (float): Seconds the breaker stays open before letting a probe through.
+        """
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.recovery_timeout = recovery_timeout
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self.rejected = 0
+        self.transitions = 0
+
+    @property
+    def state(self) -> str:
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.recovery_timeout:
+            self._transition(HALF_OPEN)
+        return self._state
+
+    @property
+    def is_open(self) -> bool:
+        """Whether calls are currently being rejected (open, or half-open with the probe in flight)."""
+        state = self.state
+        return state == OPEN or (state == HALF_OPEN and self._probing)
+
+    def allow(self) -> bool:
+        """
+        Whether a call may go through now; in the half-open state, only the first caller (the probe) may.
+        Every allowed call must be followed by `record_success`, `record_failure` or `release`.
+        """
+        state = self.state
+        if state == CLOSED:
+            return True
+        if state == HALF_OPEN and not self._probing:
+            self._probing = True
+            return True
+        self.rejected += 1
+        return False
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._probing = False
+        if self._state != CLOSED:
+            self._transition(CLOSED)
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        self._probing = False
+        if self._state == HALF_OPEN or (self._state == CLOSED and self._failures >= self.failure_threshold):
+            self._opened_at = time.monotonic()
+            self._transition(OPEN)
+
+    def release(self) -> None:
+        """End an allowed call that neither succeeded nor failed (e.g. it was cancelled)."""
+        self._probing = False
+
+    def _transition(self, state: str) -> None:
+        logger.warning(f"Circuit breaker {self.name}: {self._state} -> {state}")
+        self._state = state
+        self.transitions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self._failures,
+            "rejected": self.rejected,
+            "transitions": self.transitions,
+        }
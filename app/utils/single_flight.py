@@ -0,0 +1,75 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key within a worker: the first caller starts the function,
+    and callers arriving while it runs await the same result (or exception) instead of running it again.
+    By default the call runs in its own task, so a caller being cancelled doesn't cancel it for the others.
+    Calls that use the first caller's request-scoped resources (e.g. its DB session) must not outlive
+    that caller: with `detached=False` the first caller runs the call itself, and if it is cancelled the
+    callers waiting on it start over, one of them running the call with its own resources.
+    """
+
+    def __init__(self, detached: bool = True) -> None:
+        """
+        Args:
+            detached (bool): Run each call in its own task rather than in the first caller's.
+        """
+        self.detached = detached
+        self._flights: Dict[Hashable, asyncio.Future] = {}
+
+    def in_flight(self, key: Hashable) -> bool:
+        return key in self._flights
+
+    async def do(self, key: Hashable, function: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run `function` for `key`, or join the run already in flight for it.
+        Args:
+            key (Hashable): What the call computes, e.g. a cache key.
+            function (Callable[[], Awaitable[T]]): The call, started only if none is in flight.
+        Returns:
+            T: The result of the call.
+        """
+        if self.detached:
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = asyncio.ensure_future(function())
+                self._flights[key] = flight
+                flight.add_done_callback(lambda _: self._done(key, flight))
+            return await asyncio.shield(flight)
+        while True:
+            flight = self._flights.get(key)
+            if flight is None:
+                return await self._run_inline(key, function)
+            # Unlike awaiting the flight, wait() doesn't raise when the first caller was cancelled
+            await asyncio.wait([flight])
+            if not flight.cancelled():
+                return flight.result()
+
+    async def _run_inline(self, key: Hashable, function: Callable[[], Awaitable[T]]) -> T:
+        flight = asyncio.get_running_loop().create_future()
+        self._flights[key] = flight
+        try:
+            result = await function()
+        except asyncio.CancelledError:
+            flight.cancel()
+            raise
+        except BaseException as e:
+            flight.set_exception(e)
+            raise
+        else:
+            flight.set_result(result)
+            return result
+        finally:
+            self._done(key, flight)
+
+    def _done(self, key: Hashable, flight: asyncio.Future) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        if not flight.cancelled():
+            # Mark the exception retrieved; the callers awaiting the flight have already received it
+            flight.exception()
@@ -0,0 +1,96 @@
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class TTLCache:
+    """
+    Bounded, per-process LRU cache whose entries expire at an absolute wall-clock time.
+    Intended for the event loop thread only; it performs no locking.
+    """
+
+    def __init__(self, maxsize: int, default_ttl: Optional[float] = None) -> None:
+        """
+        Initialize the cache.
+        Args:
+            maxsize (int): Maximum number of entries kept before the least recently used is evicted.
+            default_ttl (Optional[float]): TTL in seconds used when `set` gets no expiry.
+        """
+        self.maxsize = maxsize
+        self.default_ttl = default_ttl
+        self._data: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Return the cached value for `key`, or None when it is missing or expired.
+        """
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, value = entry
+        if expires_at <= time.time():
+            del self._data[key]
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(
+        self,
+        key: Hashable,
+        value: Any,
+        ttl: Optional[float] = None,
+        expires_at: Optional[float] = None,
+    ) -> None:
+        """
+        Store `value` under `key` until `expires_at` (epoch seconds) or for `ttl` seconds.
+        """
+        if self.maxsize <= 0:
+            return
+        if expires_at is None:
+            ttl = ttl if ttl is not None else self.default_ttl
+            if ttl is None:
+                raise ValueError("Either ttl, expires_at or a default_ttl is required.")
+            expires_at = time.time() + ttl
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key: Hashable) -> None:
+        self._data.pop(key, None)
+
+    def delete_where(self, predicate: Callable[[Any], bool]) -> int:
+        """
+        Delete every entry whose value matches `predicate`; returns the number deleted. O(size).
+        """
+        keys = [key for key, (_, value) in self._data.items() if predicate(value)]
+        for key in keys:
+            del self._data[key]
+        return len(keys)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return hit/miss counters and occupancy for metrics reporting.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
@@ -1,5 +1,6 @@
 #!/usr/bin/env python
 import code
+import os
 import sys
 
 
@@ -49,6 +50,197 @@ def shell():
         code.interact(banner=banner, local=local_vars)
 
 
+def write_env_values(values, env_path=".env"):
+    """Set KEY=value lines in the env file, replacing existing keys and appending new ones."""
+    lines = []
+    if os.path.exists(env_path):
+        with open(env_path) as env_file:
+            lines = env_file.read().splitlines()
+    pending = dict(values)
+    for index, line in enumerate(lines):
+        key = line.split("=", 1)[0].strip()
+        if key in pending:
+            lines[index] = f"{key}={pending.pop(key)}"
+    lines.extend(f"{key}={value}" for key, value in pending.items())
+    with open(env_path, "w") as env_file:
+        env_file.write("\n".join(lines) + "\n")
+
+
+def calibrate_argon2(target_ms=250.0, max_memory_mib=64, parallelism=None):
+    """Benchmark Argon2 on this machine and write the chosen parameters into .env."""
+    from app.auth.utils.hash_utils import calibrate_parameters
+    from app.config.config import settings
+
+    parallelism = parallelism or settings.ARGON2_PARALLELISM
+    print(f"Calibrating Argon2 for ~{target_ms:.0f} ms per hash (max {max_memory_mib} MiB, {parallelism} lanes)...")
+    params = calibrate_parameters(target_ms=target_ms, max_memory_kib=max_memory_mib * 1024, parallelism=parallelism)
+    print(
+        f"time_cost={params['time_cost']} memory_cost={params['memory_cost']} KiB "
+        f"parallelism={params['parallelism']} -> {params['duration_ms']} ms"
+    )
+    write_env_values(
+        {
+            "ARGON2_TIME_COST": params["time_cost"],
+            "ARGON2_MEMORY_COST": params["memory_cost"],
+            "ARGON2_PARALLELISM": params["parallelism"],
+        }
+    )
+    print("Wrote ARGON2_* settings to .env; existing hashes are upgraded on the next successful login.")
+
+
+def _private_key_ids(keys_dir):
+    if not os.path.isdir(keys_dir):
+        return []
+    return sorted(
+        name[: -len(".pem")] for name in os.listdir(keys_dir) if name.endswith(".pem") and ".pub." not in name
+    )
+
+
+def generate_jwt_key(kid=None):
+    """
+    Stage 1 of a JWT key rotation: generate a new private key for JWT_ALGORITHM in JWT_KEYS_DIR and
+    publish it, without signing with it yet.
+
+    Verifiers cache /.well-known/jwks.json for JWKS_MAX_AGE seconds and workers only load keys at
+    startup, so signing with a brand-new key would break verification elsewhere for up to that long.
+    Rotation therefore takes two steps:
+      1. `generate_jwt_key [kid]` writes the key and pins JWT_ACTIVE_KID to the current signing key.
+         Restart every worker so they all verify with and publish the new key.
+      2. Once JWKS_MAX_AGE seconds have passed since the last worker restarted, run
+         `activate_jwt_key <kid>` and restart the workers again to sign with it.
+    The very first key is activated right away, as no verifier can have cached a JWKS without it.
+    """
+    from datetime import datetime, timezone
+
+    from app.auth.utils.key_ring import generate_private_key_pem
+    from app.config.config import settings
+
+    kid = kid or datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S")
+    current_kid = settings.JWT_ACTIVE_KID or next(reversed(_private_key_ids(settings.JWT_KEYS_DIR)), "")
+    os.makedirs(settings.JWT_KEYS_DIR, exist_ok=True)
+    path = os.path.join(settings.JWT_KEYS_DIR, f"{kid}.pem")
+    if os.path.exists(path):
+        print(f"Key {path} already exists.")
+        sys.exit(1)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "wb") as key_file:
+        key_file.write(generate_private_key_pem(settings.JWT_ALGORITHM))
+    if not current_kid:
+        write_env_values({"JWT_ACTIVE_KID": kid})
+        print(f"Wrote {settings.JWT_ALGORITHM} key {path} and set JWT_ACTIVE_KID={kid} in .env (first key).")
+        return
+    write_env_values({"JWT_ACTIVE_KID": current_kid})
+    print(f"Wrote {settings.JWT_ALGORITHM} key {path}; signing stays on JWT_ACTIVE_KID={current_kid}.")
+    print("Next: restart every worker so the new key is published in the JWKS, wait JWKS_MAX_AGE")
+    print(f"({settings.JWKS_MAX_AGE}s), then run: python manage.py activate_jwt_key {kid}")
+
+
+def activate_jwt_key(kid, force=False):
+    """
+    Stage 2 of a JWT key rotation: sign with `kid` (see generate_jwt_key). Refuses while the key file
+    is younger than JWKS_MAX_AGE unless `force` is set. Keep the previous key until every token it
+    signed has expired, then remove it (or keep only its public half as `<kid>.pub.pem`).
+    """
+    import time
+
+    from app.config.config import settings
+
+    path = os.path.join(settings.JWT_KEYS_DIR, f"{kid}.pem")
+    if not os.path.exists(path):
+        print(f"Key {path} does not exist.")
+        sys.exit(1)
+    wait = settings.JWKS_MAX_AGE - (time.time() - os.path.getmtime(path))
+    if wait > 0 and not force:
+        print(f"Key {kid} was published less than JWKS_MAX_AGE ago; verifiers may not know it yet.")
+        print(f"Retry in {int(wait) + 1}s (counted from the worker restart), or pass --force.")
+        sys.exit(1)
+    write_env_values({"JWT_ACTIVE_KID": kid})
+    print(f"Set JWT_ACTIVE_KID={kid} in .env; restart the workers to sign with it.")
+    print("Keep the previous key until every token it signed has expired, then remove it.")
+
+
+def export_users(fmt="ndjson", path=None, include_password_hashes=False):
+    """Stream all users to a file (or stdout) via COPY, in constant memory."""
+    import asyncio
+
+    from app.integrations.database import task_session
+    from app.user.services.user_transfer_services import UserTransferService
+
+    async def run(output):
+        async with task_session() as session:
+            async for chunk in UserTransferService(session).export_users(fmt, include_password_hashes):
+                output.write(chunk)
+
+    if path:
+        with open(path, "wb") as output:
+            asyncio.run(run(output))
+    else:
+        asyncio.run(run(sys.stdout.buffer))
+
+
+def import_users(path, fmt="ndjson", on_conflict="skip"):
+    """Bulk import users with pre-hashed passwords from an NDJSON or CSV file via COPY."""
+    import asyncio
+
+    from app.dependencies import get_redis_cache
+    from app.integrations.database import task_session
+    from app.user.services.user_transfer_services import UserTransferService
+
+    async def read_chunks():
+        with open(path, "rb") as source:
+            while chunk := source.read(1 << 20):
+                yield chunk
+
+    async def run():
+        cache = await get_redis_cache()
+        try:
+            async with task_session() as session:
+                return await UserTransferService(session, cache=cache).import_users(
+                    read_chunks(), fmt=fmt, on_conflict=on_conflict
+                )
+        finally:
+            await cache.close()
+
+    print(asyncio.run(run()))
+
+
+def reload_permissions():
+    """Tell every running worker to reload roles and permissions (after changing them in the database)."""
+    import asyncio
+
+    from app.auth.permissions import publish_permissions_changed
+    from app.dependencies import get_redis_cache
+
+    async def run():
+        cache = await get_redis_cache()
+        try:
+            await publish_permissions_changed(cache)
+        finally:
+            await cache.close()
+
+    asyncio.run(run())
+    print("Published a permissions reload to all workers.")
+
+
+def rebuild_email_bloom():
+    """Rebuild the Redis email Bloom filter from the users table."""
+    import asyncio
+
+    from app.dependencies import get_redis_cache
+    from app.integrations.database import task_session
+    from app.user.services.user_services import UserService
+
+    async def run():
+        cache = await get_redis_cache()
+        try:
+            async with task_session() as session:
+                return await UserService(session, cache=cache).rebuild_email_bloom()
+        finally:
+            await cache.close()
+
+    print(f"Email Bloom filter rebuilt with {asyncio.run(run())} emails.")
+
+
 def main():
     if len(sys.argv) < 2:
         print("Usage: python manage.py <command>")
@@ -65,6 +257,35 @@ def main():
         import subprocess
 
         subprocess.run(["alembic", "upgrade", "head"], check=True)
+    elif command == "calibrate_argon2":
+        target_ms = float(sys.argv[2]) if len(sys.argv) > 2 else 250.0
+        max_memory_mib = int(sys.argv[3]) if len(sys.argv) > 3 else 64
+        parallelism = int(sys.argv[4]) if len(sys.argv) > 4 else None
+        calibrate_argon2(target_ms=target_ms, max_memory_mib=max_memory_mib, parallelism=parallelism)
+    elif command == "export_users":
+        args = [arg for arg in sys.argv[2:] if not arg.startswith("--")]
+        fmt = args[0] if args else "ndjson"
+        path = args[1] if len(args) > 1 else None
+        export_users(fmt=fmt, path=path, include_password_hashes="--with-password-hashes" in sys.argv)
+    elif command == "import_users":
+        if len(sys.argv) < 3:
+            print("Usage: python manage.py import_users <path> [ndjson|csv] [skip|update]")
+            sys.exit(1)
+        fmt = sys.argv[3] if len(sys.argv) > 3 else "ndjson"
+        on_conflict = sys.argv[4] if len(sys.argv) > 4 else "skip"
+        import_users(sys.argv[2], fmt=fmt, on_conflict=on_conflict)
+    elif command == "rebuild_email_bloom":
+        rebuild_email_bloom()
+    elif command == "reload_permissions":
+        reload_permissions()
+    elif command == "generate_jwt_key":
+        generate_jwt_key(sys.argv[2] if len(sys.argv) > 2 else None)
+    elif command == "activate_jwt_key":
+        args = [arg for arg in sys.argv[2:] if not arg.startswith("--")]
+        if not args:
+            print("Usage: python manage.py activate_jwt_key <kid> [--force]")
+            sys.exit(1)
+        activate_jwt_key(args[0], force="--force" in sys.argv)
     else:
         print(f"Unknown command: {command}")
         sys.exit(1)
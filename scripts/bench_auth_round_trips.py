@@ -0,0 +1,194 @@
+"""
+Count database round trips per auth endpoint, before and after the single-transaction rewrite.
+
+Drives the app in-process against the configured database and counts every statement,
+BEGIN, COMMIT and ROLLBACK that reaches the server (each is one network round trip with asyncpg).
+
+The "before" column replays the statement sequence of the pre-change services (signup: SELECT the
+user by email, INSERT user + COMMIT, SELECT to refresh it, INSERT access token (flush), INSERT refresh
+token + COMMIT; login: SELECT the user, then the same token writes; refresh: SELECT the token, DELETE
++ COMMIT, then the same token writes) with the ORM against the same database, so both columns are
+measured in the same configuration on every run. The "after" column goes through the app's routes.
+
+Usage:
+    python -m scripts.bench_auth_round_trips [iterations]
+
+Expected with persisted access tokens and the email Bloom filter disabled, counted from the statement
+sequences, as round trips (commits):
+
+    endpoint        before      after
+    signup          9 (2)       7 (2)
+    login           5 (1)       6 (2)
+    refresh-token   8 (2)       4 (1)
+
+After, signup is BEGIN, SELECT EXISTS, COMMIT (the duplicate check, ended before hashing), then BEGIN,
+INSERT user ... ON CONFLICT ... RETURNING, one CTE statement writing both token rows, COMMIT; with the
+Bloom filter ruling the email out, the first transaction is skipped: 4 (1). Login likewise ends its
+read transaction before verifying the password, trading a round trip for not holding a pooled
+connection during the hash. Refresh is BEGIN, DELETE ... RETURNING the consumed token, the token CTE,
+COMMIT. Stateless access tokens (JWT_STATELESS_ACCESS_TOKENS) drop the access token insert on both
+sides.
+"""
+
+import asyncio
+import sys
+import uuid
+from collections import Counter
+from typing import Awaitable, Callable
+
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.auth.models.token_models import AccessToken, RefreshToken
+from app.auth.utils.token_utils import TokenUtils
+from app.config.config import settings
+from app.integrations.database import AsyncSessionLocal, engine
+from app.main import app
+from app.user.models.user_models import User
+
+ENDPOINTS = ("signup", "login", "refresh-token")
+COLUMNS = ("statements", "begin", "commit", "rollback")
+
+round_trips: Counter = Counter()
+
+
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    round_trips["statements"] += 1
+
+
+@event.listens_for(engine.sync_engine, "begin")
+def _count_begin(conn):
+    round_trips["begin"] += 1
+
+
+@event.listens_for(engine.sync_engine, "commit")
+def _count_commit(conn):
+    round_trips["commit"] += 1
+
+
+@event.listens_for(engine.sync_engine, "rollback")
+def _count_rollback(conn):
+    round_trips["rollback"] += 1
+
+
+async def _baseline_tokens(session: AsyncSession, user_id: int) -> str:
+    """The pre-change `_generate_tokens`: flush the access token for its id, then commit the refresh token."""
+    access_token_id = None
+    if not settings.JWT_STATELESS_ACCESS_TOKENS:
+        access_token, access_expires_at = await TokenUtils.generate_access_token(user_id=user_id)
+        access_token_obj = AccessToken(user_id=user_id, token=access_token, expires_at=access_expires_at)
+        session.add(access_token_obj)
+        await session.flush()
+        access_token_id = access_token_obj.id
+    refresh_token, refresh_expires_at = await TokenUtils.generate_refresh_token(user_id=user_id)
+    session.add(
+        RefreshToken(
+            user_id=user_id, access_token_id=access_token_id, token=refresh_token, expires_at=refresh_expires_at
+        )
+    )
+    await session.commit()
+    return refresh_token
+
+
+async def _baseline_signup(session: AsyncSession, credentials: dict) -> None:
+    result = await session.execute(select(User).filter_by(email=credentials["email"]))
+    assert result.scalars().first() is None
+    user = User(full_name="Bench User", email=credentials["email"], password="not-a-hash")
+    session.add(user)
+    await session.commit()
+    await session.refresh(user)
+    await _baseline_tokens(session, user.id)
+
+
+async def _baseline_login(session: AsyncSession, credentials: dict) -> str:
+    result = await session.execute(select(User).filter_by(email=credentials["email"]))
+    user = result.scalars().first()
+    return await _baseline_tokens(session, user.id)
+
+
+async def _baseline_refresh(session: AsyncSession, refresh_token: str) -> None:
+    result = await session.execute(RefreshToken.__table__.select().where(RefreshToken.token == refresh_token))
+    db_refresh_token = result.fetchone()
+    await session.execute(RefreshToken.__table__.delete().where(RefreshToken.token == refresh_token))
+    await session.commit()
+    await _baseline_tokens(session, db_refresh_token.user_id)
+
+
+async def measure(operation: Callable[[], Awaitable]) -> tuple[object, Counter]:
+    round_trips.clear()
+    result = await operation()
+    return result, Counter(round_trips)
+
+
+async def measure_baseline(operation: Callable[[AsyncSession], Awaitable]) -> tuple[object, Counter]:
+    async def run():
+        async with AsyncSessionLocal() as session:
+            return await operation(session)
+
+    return await measure(run)
+
+
+async def measure_route(client: AsyncClient, method: str, url: str, **kwargs) -> tuple[dict, Counter]:
+    async def run():
+        response = await client.request(method, url, **kwargs)
+        response.raise_for_status()
+        return response.json()
+
+    return await measure(run)
+
+
+def new_credentials() -> dict:
+    return {"email": f"bench-{uuid.uuid4().hex}@example.com", "password": "benchpassword123"}
+
+
+async def run_baseline(totals: dict[str, Counter]) -> None:
+    credentials = new_credentials()
+    _, counts = await measure_baseline(lambda session: _baseline_signup(session, credentials))
+    totals["signup"] += counts
+    refresh_token, counts = await measure_baseline(lambda session: _baseline_login(session, credentials))
+    totals["login"] += counts
+    _, counts = await measure_baseline(lambda session: _baseline_refresh(session, refresh_token))
+    totals["refresh-token"] += counts
+
+
+async def run_current(client: AsyncClient, totals: dict[str, Counter]) -> None:
+    credentials = new_credentials()
+    _, counts = await measure_route(
+        client, "POST", "/user/auth/signup", json={"full_name": "Bench User", **credentials}
+    )
+    totals["signup"] += counts
+    body, counts = await measure_route(client, "POST", "/user/auth/login", json=credentials)
+    totals["login"] += counts
+    _, counts = await measure_route(
+        client, "POST", "/user/auth/refresh-token", json={"refresh_token": body["refresh_token"]}
+    )
+    totals["refresh-token"] += counts
+
+
+def per_request(counts: Counter, iterations: int) -> dict[str, float]:
+    return {key: counts[key] / iterations for key in COLUMNS}
+
+
+async def main(iterations: int) -> None:
+    before: dict[str, Counter] = {endpoint: Counter() for endpoint in ENDPOINTS}
+    after: dict[str, Counter] = {endpoint: Counter() for endpoint in ENDPOINTS}
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+        for _ in range(iterations):
+            await run_baseline(before)
+            await run_current(client, after)
+    await engine.dispose()
+
+    print(f"{'endpoint':<16}{'before':>10}{'after':>10}{'commits before':>16}{'commits after':>15}")
+    for endpoint in ENDPOINTS:
+        old = per_request(before[endpoint], iterations)
+        new = per_request(after[endpoint], iterations)
+        print(
+            f"{endpoint:<16}{sum(old.values()):>10.1f}{sum(new.values()):>10.1f}"
+            f"{old['commit']:>16.1f}{new['commit']:>15.1f}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 20))
@@ -0,0 +1,125 @@
+"""
+Measure Redis value encoding and per-key versus bulk throughput.
+
+The codec section compares the encoded size and the encode + decode time of typical cached values
+under each RedisCodec configuration. No Redis is needed.
+
+With `--redis`, also writes and reads `keys` values against the configured Redis (REDIS_URL, ideally
+a local instance) one key per round trip (GET/SET/DEL per key) and in bulk (mget, mset, delete_many)
+and reports keys per second. Keys are written under a `bench:` prefix and deleted afterwards.
+
+Usage:
+    python -m scripts.bench_redis_bulk [keys] [--redis]
+
+Reference numbers (codec, CPython 3.11):
+
+    value              json B   msgpack B   msgpack+zstd B   json us   msgpack us   msgpack+zstd us
+    principal              79          63               63       1.2          2.3               3.3
+    user page (50)       7122        4584              494      48.8         90.0              99.8
+
+msgpack trades some CPU against orjson for smaller values; zstd pays off on large, repetitive ones.
+"""
+
+import asyncio
+import sys
+import time
+import timeit
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List
+
+from app.config.config import settings
+from app.integrations.redis_cache import RedisCache
+from app.integrations.redis_codec import RedisCodec
+
+VALUES: Dict[str, Any] = {
+    "principal": {"id": 1, "full_name": "Bench User", "email": "bench@example.com", "roles": ["user"]},
+    "user page (50)": [
+        {
+            "id": index,
+            "full_name": f"User {index}",
+            "email": f"user{index}@example.com",
+            "is_active": True,
+            "created_at": datetime.now(timezone.utc),
+            "roles": ["user"],
+        }
+        for index in range(50)
+    ],
+}
+
+CODECS: Dict[str, RedisCodec] = {
+    "json": RedisCodec("json", compression_threshold=0),
+    "msgpack": RedisCodec("msgpack", compression_threshold=0),
+    "msgpack+zstd": RedisCodec("msgpack", compression_threshold=1024),
+}
+
+
+def bench_codecs(iterations: int) -> None:
+    header = "".join(f"{name + ' B':>17}" for name in CODECS) + "".join(f"{name + ' us':>18}" for name in CODECS)
+    print(f"{'value':<18}{header}")
+    for name, value in VALUES.items():
+        sizes, timings = [], []
+        for codec in CODECS.values():
+            sizes.append(len(codec.encode(value)))
+            timing = min(timeit.repeat(lambda: codec.decode(codec.encode(value)), number=iterations, repeat=5))
+            timings.append(timing / iterations * 1e6)
+        print(f"{name:<18}" + "".join(f"{size:>17}" for size in sizes) + "".join(f"{us:>18.1f}" for us in timings))
+
+
+async def keys_per_second(function: Callable[[], Awaitable[Any]], count: int) -> float:
+    started_at = time.perf_counter()
+    await function()
+    return count / (time.perf_counter() - started_at)
+
+
+async def bench_redis(count: int) -> None:
+    cache = RedisCache(url=settings.REDIS_URI)
+    await cache.connect()
+    keys: List[str] = [f"bench:{index}" for index in range(count)]
+    values = {key: VALUES["principal"] for key in keys}
+
+    async def set_each() -> None:
+        for key in keys:
+            await cache.set(key, values[key], expire=60)
+
+    async def get_each() -> None:
+        for key in keys:
+            await cache.get(key)
+
+    async def delete_each() -> None:
+        for key in keys:
+            await cache.delete(key)
+
+    async def mset() -> None:
+        await cache.mset(values, expire=60)
+
+    async def mget() -> None:
+        await cache.mget(keys)
+
+    async def delete_many() -> None:
+        await cache.delete_many(keys)
+
+    try:
+        print(f"\n{'operation':<12}{'per key/s':>12}{'bulk/s':>12}")
+        for operation, per_key, bulk in (
+            ("set", set_each, mset),
+            ("get", get_each, mget),
+            ("delete", delete_each, delete_many),
+        ):
+            if operation != "set":
+                await mset()
+            per_key_rate = await keys_per_second(per_key, count)
+            if operation == "delete":
+                await mset()
+            bulk_rate = await keys_per_second(bulk, count)
+            print(f"{operation:<12}{per_key_rate:>12.0f}{bulk_rate:>12.0f}")
+    finally:
+        await cache.delete_many(keys)
+        await cache.close()
+
+
+if __name__ == "__main__":
+    arguments = [argument for argument in sys.argv[1:] if not argument.startswith("--")]
+    count = int(arguments[0]) if arguments else 1000
+    bench_codecs(2000)
+    if "--redis" in sys.argv:
+        asyncio.run(bench_redis(count))
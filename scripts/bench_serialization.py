@@ -0,0 +1,111 @@
+"""
+Measure response serialization cost per endpoint.
+
+For each endpoint payload, compares the previous path, where a route returned a validated model and
+FastAPI ran it through `response_model` again (dump, re-validate, encode) and rendered it with the
+stdlib `json`, with `ModelResponse`, which serializes the model once with pydantic-core. Error
+responses compare a `JSONResponse` built per request with `error_response` and its pre-serialized
+bodies. No database or Redis is needed.
+
+Usage:
+    python -m scripts.bench_serialization [iterations]
+
+Reference numbers (microseconds per response, CPython 3.11):
+
+    endpoint                 before    after
+    GET /user/details          11.8      4.5
+    POST /user/auth/login      14.8      5.6
+    GET /user/ (50 users)     252.3     76.8
+    401 invalid token           9.0      4.0
+"""
+
+import asyncio
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from app.auth.exceptions import InvalidTokenException
+from app.auth.schemas.auth_schemas import AuthLoginResponse
+from app.exceptions import error_response
+from app.pagination import Page
+from app.responses import ModelResponse
+from app.user.schemas.user_schemas import UserListItem, UserPrincipal, UserResponse
+
+TOKEN = "e" * 200
+
+principal = UserPrincipal(id=1, full_name="Bench User", email="bench@example.com", roles=["user"], role_ids=[2])
+login = AuthLoginResponse(
+    user=UserResponse(id=1, full_name="Bench User", email="bench@example.com"),
+    access_token=TOKEN,
+    token_type="bearer",
+    refresh_token=TOKEN,
+)
+page = Page[UserListItem](
+    items=[
+        UserListItem(
+            id=index,
+            full_name=f"User {index}",
+            email=f"user{index}@example.com",
+            is_active=True,
+            created_at=datetime.now(timezone.utc),
+            roles=["user"],
+        )
+        for index in range(50)
+    ],
+    next_cursor="cursor",
+)
+
+ENDPOINTS: Dict[str, Tuple[Any, Any, Dict[str, Any]]] = {
+    "GET /user/details": (principal, UserResponse, {"model": UserResponse}),
+    "POST /user/auth/login": (login, AuthLoginResponse, {}),
+    "GET /user/ (50 users)": (page, Page[UserListItem], {}),
+}
+
+
+async def microseconds(function: Callable[[], Awaitable[Any]], iterations: int) -> float:
+    best = float("inf")
+    for _ in range(5):
+        started_at = time.perf_counter()
+        for _ in range(iterations):
+            await function()
+        best = min(best, time.perf_counter() - started_at)
+    return best / iterations * 1e6
+
+
+async def main(iterations: int) -> None:
+    print(f"{'endpoint':<24}{'before us':>10}{'after us':>10}")
+    for endpoint, (content, response_model, options) in ENDPOINTS.items():
+        field = create_model_field(name="Response", type_=response_model, mode="serialization")
+
+        async def before() -> bytes:
+            return JSONResponse(await serialize_response(field=field, response_content=content)).body
+
+        async def after() -> bytes:
+            return ModelResponse(content, **options).body
+
+        assert (await before()).replace(b" ", b"") == (await after()).replace(b" ", b""), endpoint
+        before_us, after_us = await microseconds(before, iterations), await microseconds(after, iterations)
+        print(f"{endpoint:<24}{before_us:>10.1f}{after_us:>10.1f}")
+
+    exc = InvalidTokenException()
+    errors = [{"error_code": exc.error_code, "message": exc.message}]
+
+    async def error_before() -> bytes:
+        return JSONResponse({"detail": errors}, status_code=exc.status_code).body
+
+    async def error_after() -> bytes:
+        return error_response(exc.status_code, errors, envelope="detail").body
+
+    print(
+        f"{'401 invalid token':<24}{await microseconds(error_before, iterations):>10.1f}"
+        f"{await microseconds(error_after, iterations):>10.1f}"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000))
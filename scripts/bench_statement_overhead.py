@@ -0,0 +1,99 @@
+"""
+Measure the per-query Python overhead of the hot point lookups.
+
+For each statement, compares building it per call (as the services used to) with the prebuilt
+statement from the registry:
+
+    build       construct the select and generate its cache key, paid on every call when built per call
+    prebuilt    look up the memoized cache key of the prebuilt statement
+    compile     compile to SQL for asyncpg, paid on a miss of the engine's compiled cache
+
+With `--db`, also executes both forms against the configured database (ids/emails that don't exist,
+so the result rows don't matter) and reports the time per query, round trip included.
+
+Usage:
+    python -m scripts.bench_statement_overhead [iterations] [--db]
+
+Reference numbers (microseconds per call, CPython 3.11):
+
+    statement         build   prebuilt   compile
+    user_by_id           76       0.2       265
+    user_by_email        87       0.2       268
+    email_exists        123       0.2       201
+    principal_row       193       0.2       415
+"""
+
+import asyncio
+import sys
+import timeit
+from typing import Callable, Dict
+
+from sqlalchemy import exists, func, select
+from sqlalchemy.dialects.postgresql.asyncpg import dialect as asyncpg_dialect
+
+from app.integrations.database import AsyncSessionLocal, engine
+from app.user.models.user_models import User, user_roles
+from app.user.statements import EMAIL_EXISTS, PRINCIPAL_ROW, USER_BY_EMAIL, USER_BY_ID
+
+BUILDERS: Dict[str, Callable] = {
+    "user_by_id": lambda: select(User).filter_by(id=0),
+    "user_by_email": lambda: select(User).filter_by(email="nobody@example.invalid"),
+    "email_exists": lambda: select(exists().where(User.email == "nobody@example.invalid")),
+    "principal_row": lambda: select(
+        User.id,
+        User.full_name,
+        User.email,
+        User.is_active,
+        select(func.array_agg(user_roles.c.role_id)).where(user_roles.c.user_id == User.id).scalar_subquery(),
+    ).where(User.id == 0),
+}
+
+PREBUILT = {
+    "user_by_id": (USER_BY_ID, {"user_id": 0}),
+    "user_by_email": (USER_BY_EMAIL, {"email": "nobody@example.invalid"}),
+    "email_exists": (EMAIL_EXISTS, {"email": "nobody@example.invalid"}),
+    "principal_row": (PRINCIPAL_ROW, {"user_id": 0}),
+}
+
+
+def microseconds(function: Callable, iterations: int) -> float:
+    return min(timeit.repeat(function, number=iterations, repeat=5)) / iterations * 1e6
+
+
+def bench_python(iterations: int) -> None:
+    dialect = asyncpg_dialect()
+    print(f"{'statement':<16}{'build us':>10}{'prebuilt us':>13}{'compile us':>12}")
+    for name, build in BUILDERS.items():
+        statement, _ = PREBUILT[name]
+        built = microseconds(lambda: build()._generate_cache_key(), iterations)
+        prebuilt = microseconds(lambda: statement._generate_cache_key(), iterations)
+        compiled = microseconds(lambda: statement.compile(dialect=dialect), max(1, iterations // 10))
+        print(f"{name:<16}{built:>10.1f}{prebuilt:>13.2f}{compiled:>12.1f}")
+
+
+async def bench_db(iterations: int) -> None:
+    print(f"\n{'statement':<16}{'built per call us':>19}{'prebuilt us':>13}")
+    loop = asyncio.get_running_loop()
+    async with AsyncSessionLocal() as session:
+        for name, build in BUILDERS.items():
+            statement, params = PREBUILT[name]
+            await session.execute(build())
+            await session.execute(statement, params)
+            started_at = loop.time()
+            for _ in range(iterations):
+                await session.execute(build())
+            built = (loop.time() - started_at) / iterations * 1e6
+            started_at = loop.time()
+            for _ in range(iterations):
+                await session.execute(statement, params)
+            prebuilt = (loop.time() - started_at) / iterations * 1e6
+            print(f"{name:<16}{built:>19.1f}{prebuilt:>13.1f}")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    arguments = [argument for argument in sys.argv[1:] if not argument.startswith("--")]
+    iterations = int(arguments[0]) if arguments else 10000
+    bench_python(iterations)
+    if "--db" in sys.argv:
+        asyncio.run(bench_db(max(1, iterations // 10)))
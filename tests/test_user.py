@@ -1,6 +1,11 @@
+import orjson
 import pytest
 from fastapi import status
 
+from app.auth.utils.hash_utils import HashUtils
+from app.integrations.database import AsyncSessionLocal
+from app.user.services.user_transfer_services import UserTransferService
+
 
 @pytest.mark.asyncio
 async def test_get_user_details(async_client):
@@ -21,3 +26,68 @@ async def test_get_user_details(async_client):
     assert resp.status_code == status.HTTP_200_OK
     data = resp.json()
     assert data["email"] == signup_data["email"]
+
+
+@pytest.mark.asyncio
+async def test_imported_password_change_revokes_refresh_tokens(async_client):
+    signup_data = {
+        "full_name": "Imported User",
+        "email": "importeduser@example.com",
+        "password": "strongpassword123",
+    }
+    resp = await async_client.post("/user/auth/signup", json=signup_data)
+    assert resp.status_code == status.HTTP_201_CREATED
+    refresh_token = resp.json()["refresh_token"]
+
+    # Re-import the user with a new password hash
+    row = {
+        "full_name": signup_data["full_name"],
+        "email": signup_data["email"],
+        "password": await HashUtils.hash_password("anotherpassword456"),
+        "is_active": True,
+    }
+
+    async def source():
+        yield orjson.dumps(row) + b"\n"
+
+    async with AsyncSessionLocal() as session:
+        counts = await UserTransferService(session).import_users(source(), fmt="ndjson", on_conflict="update")
+    assert counts["updated"] == 1
+    assert counts["tokens_revoked"] >= 1
+
+    # The refresh token issued before the import no longer works
+    resp = await async_client.post("/user/auth/refresh-token", json={"refresh_token": refresh_token})
+    assert resp.status_code == status.HTTP_401_UNAUTHORIZED
+
+    # The imported password does
+    resp = await async_client.post(
+        "/user/auth/login", json={"email": signup_data["email"], "password": "anotherpassword456"}
+    )
+    assert resp.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.asyncio
+async def test_deleted_user_polls_their_deletion(async_client):
+    signup_data = {
+        "full_name": "Deleted User",
+        "email": "deleteduser@example.com",
+        "password": "strongpassword123",
+    }
+    resp = await async_client.post("/user/auth/signup", json=signup_data)
+    assert resp.status_code == status.HTTP_201_CREATED
+    headers = {"Authorization": f"Bearer {resp.json()['access_token']}"}
+
+    resp = await async_client.delete("/user/delete", headers=headers)
+    assert resp.status_code == status.HTTP_202_ACCEPTED
+    location = resp.headers["Location"]
+
+    # The account is deactivated, so its access token no longer works, but the status link does
+    resp = await async_client.get("/user/details", headers=headers)
+    assert resp.status_code == status.HTTP_401_UNAUTHORIZED
+    resp = await async_client.get(location, headers=headers)
+    assert resp.status_code == status.HTTP_200_OK
+    assert resp.json()["status"] in ("pending", "in_progress", "completed")
+
+    # Without the token, the status resource needs an admin
+    resp = await async_client.get(location.split("?")[0], headers=headers)
+    assert resp.status_code == status.HTTP_401_UNAUTHORIZED
@@ -0,0 +1,44 @@
+import fakeredis
+import pytest
+import pytest_asyncio
+
+from app.integrations import redis_cache
+from app.integrations.redis_cache import RedisCache
+from app.utils.circuit_breaker import CircuitBreaker
+
+
+@pytest.fixture(autouse=True, scope="function")
+def clean_db():
+    # Unit tests don't touch the database
+    yield
+
+
+@pytest.fixture
+def redis_server(monkeypatch):
+    """An in-memory Redis server; every RedisCache connected during the test talks to it."""
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(redis_cache.redis, "from_url", lambda url, **kwargs: fakeredis.FakeAsyncRedis(server=server))
+    return server
+
+
+@pytest_asyncio.fixture
+async def make_cache(redis_server):
+    """Connect RedisCache instances (e.g. one per simulated worker) to the in-memory server."""
+    caches = []
+
+    async def make() -> RedisCache:
+        cache = RedisCache(
+            url="redis://fake", breaker=CircuitBreaker("redis", failure_threshold=2, recovery_timeout=60)
+        )
+        await cache.connect()
+        caches.append(cache)
+        return cache
+
+    yield make
+    for cache in caches:
+        await cache.close()
+
+
+@pytest_asyncio.fixture
+async def cache(make_cache):
+    return await make_cache()
@@ -0,0 +1,119 @@
+import pytest
+
+from app.config.config import settings
+from app.user.services import user_services
+from app.user.services.user_services import EMAIL_BLOOM_KEY, UserService, email_bloom
+from app.utils.bloom_filter import BloomFilter
+
+
+class FakeSession:
+    """Answers the `SELECT EXISTS` fallback with `exists`, counting the queries."""
+
+    def __init__(self, exists=False):
+        self.exists = exists
+        self.queries = 0
+
+    async def scalar(self, statement, params=None):
+        self.queries += 1
+        return self.exists
+
+
+@pytest.fixture(autouse=True)
+def bloom_enabled(monkeypatch):
+    monkeypatch.setattr(settings, "EMAIL_BLOOM_ENABLED", True)
+
+
+def test_sized_for_capacity_and_error_rate():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+
+    # m = -n ln(p) / ln(2)^2 and k = m / n ln(2)
+    assert bloom.size_bits == 9586
+    assert bloom.hash_count == 7
+
+
+def test_positions_are_deterministic_distinct_and_in_range():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    positions = bloom.positions("user@example.com")
+
+    assert positions == bloom.positions("user@example.com")
+    assert positions != bloom.positions("other@example.com")
+    assert len(positions) == bloom.hash_count
+    assert len(set(positions)) == bloom.hash_count
+    assert all(0 <= position < bloom.size_bits for position in positions)
+
+
+def test_add_to_sets_bits_in_redis_order():
+    bloom = BloomFilter(capacity=10, error_rate=0.1)
+    bits = bloom.new_bit_array()
+    bloom.add_to(bits, "user@example.com")
+
+    for position in range(bloom.size_bits):
+        is_set = bool(bits[position // 8] & (0x80 >> (position % 8)))
+        assert is_set == (position in bloom.positions("user@example.com"))
+
+
+def test_no_false_negatives_and_few_false_positives():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    bits = bloom.new_bit_array()
+    added = [f"user{index}@example.com" for index in range(1000)]
+    for email in added:
+        bloom.add_to(bits, email)
+
+    def might_contain(item):
+        return all(bits[position >> 3] & (0x80 >> (position & 7)) for position in bloom.positions(item))
+
+    assert all(might_contain(email) for email in added)
+    false_positives = sum(might_contain(f"absent{index}@example.com") for index in range(10000))
+    assert false_positives < 300
+
+
+@pytest.mark.asyncio
+async def test_absent_email_skips_the_database(cache):
+    await cache.replace_bloom(EMAIL_BLOOM_KEY, bytes(email_bloom.new_bit_array()))
+    session = FakeSession()
+
+    assert not await UserService(session, cache=cache).user_exists_by_email("new@example.com")
+    assert session.queries == 0
+
+
+@pytest.mark.asyncio
+async def test_remembered_emails_fall_through_to_the_database(cache):
+    await cache.replace_bloom(EMAIL_BLOOM_KEY, bytes(email_bloom.new_bit_array()))
+    session = FakeSession(exists=True)
+    service = UserService(session, cache=cache)
+    await service.remember_email(" Taken@Example.com")
+
+    assert await service.user_exists_by_email("taken@example.com")
+    assert session.queries == 1
+
+
+@pytest.mark.asyncio
+async def test_remember_emails_adds_in_batches(cache, monkeypatch):
+    monkeypatch.setattr(user_services, "EMAIL_BLOOM_ADD_BATCH_SIZE", 2)
+    await cache.replace_bloom(EMAIL_BLOOM_KEY, bytes(email_bloom.new_bit_array()))
+    emails = [f"imported{index}@example.com" for index in range(5)]
+    await UserService(FakeSession(), cache=cache).remember_emails(emails)
+
+    for email in emails:
+        assert await cache.bloom_might_contain(EMAIL_BLOOM_KEY, email_bloom.positions(email))
+
+
+@pytest.mark.asyncio
+async def test_unbuilt_filter_falls_back_to_the_database(cache):
+    session = FakeSession(exists=True)
+
+    assert await cache.bloom_might_contain(EMAIL_BLOOM_KEY, email_bloom.positions("taken@example.com")) is None
+    assert await UserService(session, cache=cache).user_exists_by_email("taken@example.com")
+    assert session.queries == 1
+
+
+@pytest.mark.asyncio
+async def test_redis_failure_falls_back_to_the_database(cache, monkeypatch):
+    async def unavailable(*args, **kwargs):
+        raise ConnectionError("Redis is down")
+
+    monkeypatch.setattr(cache.redis, "exists", unavailable)
+    session = FakeSession(exists=False)
+
+    assert not await UserService(session, cache=cache).user_exists_by_email("new@example.com")
+    assert session.queries == 1
@@ -0,0 +1,121 @@
+import pytest
+
+from app.utils import circuit_breaker
+from app.utils.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", clock)
+    return clock
+
+
+@pytest.fixture
+def breaker(clock):
+    return CircuitBreaker("test", failure_threshold=3, recovery_timeout=10)
+
+
+def fail(breaker, times):
+    for _ in range(times):
+        assert breaker.allow()
+        breaker.record_failure()
+
+
+def test_starts_closed(breaker):
+    assert breaker.state == CLOSED
+    assert not breaker.is_open
+    assert breaker.allow()
+
+
+def test_opens_after_the_failure_threshold(breaker):
+    fail(breaker, 2)
+    assert breaker.state == CLOSED
+
+    fail(breaker, 1)
+    assert breaker.state == OPEN
+    assert breaker.is_open
+
+
+def test_success_resets_the_failure_count(breaker):
+    fail(breaker, 2)
+    breaker.record_success()
+    fail(breaker, 2)
+
+    assert breaker.state == CLOSED
+    assert breaker.stats()["consecutive_failures"] == 2
+
+
+def test_open_breaker_rejects_calls(breaker):
+    fail(breaker, 3)
+
+    assert not breaker.allow()
+    assert not breaker.allow()
+    assert breaker.rejected == 2
+
+
+def test_turns_half_open_after_the_recovery_timeout(breaker, clock):
+    fail(breaker, 3)
+    clock.now += 9.9
+    assert breaker.state == OPEN
+
+    clock.now += 0.1
+    assert breaker.state == HALF_OPEN
+    assert not breaker.is_open
+
+
+def test_half_open_lets_a_single_probe_through(breaker, clock):
+    fail(breaker, 3)
+    clock.now += 10
+
+    assert breaker.allow()
+    assert breaker.is_open
+    assert not breaker.allow()
+
+
+def test_successful_probe_closes_the_breaker(breaker, clock):
+    fail(breaker, 3)
+    clock.now += 10
+    assert breaker.allow()
+    breaker.record_success()
+
+    assert breaker.state == CLOSED
+    assert breaker.allow()
+    assert breaker.stats() == {"state": CLOSED, "consecutive_failures": 0, "rejected": 0, "transitions": 3}
+
+
+def test_failed_probe_reopens_the_breaker_for_another_timeout(breaker, clock):
+    fail(breaker, 3)
+    clock.now += 10
+    fail(breaker, 1)
+
+    assert breaker.state == OPEN
+    clock.now += 9.9
+    assert not breaker.allow()
+    clock.now += 0.1
+    assert breaker.state == HALF_OPEN
+
+
+def test_released_probe_lets_another_probe_through(breaker, clock):
+    fail(breaker, 3)
+    clock.now += 10
+    assert breaker.allow()
+    breaker.release()
+
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+
+
+def test_threshold_is_at_least_one(clock):
+    breaker = CircuitBreaker("test", failure_threshold=0, recovery_timeout=10)
+    fail(breaker, 1)
+
+    assert breaker.state == OPEN
@@ -0,0 +1,122 @@
+import time
+
+import pytest
+
+from app.auth.utils import token_utils
+from app.auth.utils.token_utils import TokenUtils
+from app.utils import ttl_cache
+from app.utils.ttl_cache import TTLCache
+
+
+@pytest.fixture
+def decodes(monkeypatch):
+    """Start from an empty decode cache; returns the tokens whose signature was verified, in order."""
+    monkeypatch.setattr(token_utils, "verified_token_cache", TTLCache(maxsize=2))
+    calls = []
+    decode = TokenUtils._decode
+
+    def counting_decode(token):
+        calls.append(token)
+        return decode(token)
+
+    monkeypatch.setattr(TokenUtils, "_decode", staticmethod(counting_decode))
+    return calls
+
+
+def sign(user_id=1, expires_in=60):
+    return TokenUtils._encode({"user_id": user_id, "exp": int(time.time()) + expires_in})
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2, default_ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == (1, None, 3)
+    assert cache.stats() == {
+        "size": 2,
+        "maxsize": 2,
+        "hits": 3,
+        "misses": 1,
+        "evictions": 1,
+        "hit_ratio": 0.75,
+    }
+
+
+def test_ttl_cache_expires_at_the_given_time(monkeypatch):
+    now = time.time()
+    cache = TTLCache(maxsize=10)
+    cache.set("key", "value", expires_at=now + 5)
+
+    monkeypatch.setattr(ttl_cache.time, "time", lambda: now + 4)
+    assert cache.get("key") == "value"
+    monkeypatch.setattr(ttl_cache.time, "time", lambda: now + 5)
+    assert cache.get("key") is None
+    assert len(cache) == 0
+
+
+def test_ttl_cache_needs_an_expiry():
+    with pytest.raises(ValueError):
+        TTLCache(maxsize=10).set("key", "value")
+
+
+def test_ttl_cache_of_size_zero_stores_nothing():
+    cache = TTLCache(maxsize=0, default_ttl=60)
+    cache.set("key", "value")
+
+    assert cache.get("key") is None
+
+
+@pytest.mark.asyncio
+async def test_repeated_token_is_verified_once(decodes):
+    token = sign()
+
+    assert (await TokenUtils.decode_token(token))["user_id"] == 1
+    assert (await TokenUtils.decode_token(token))["user_id"] == 1
+    assert decodes == [token]
+    assert token_utils.verified_token_cache.stats()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_cached_payload_is_not_shared(decodes):
+    token = sign()
+    (await TokenUtils.decode_token(token))["user_id"] = 2
+
+    assert (await TokenUtils.decode_token(token))["user_id"] == 1
+
+
+@pytest.mark.asyncio
+async def test_entry_expires_with_the_token(monkeypatch, decodes):
+    token = sign(expires_in=5)
+    assert await TokenUtils.decode_token(token) is not None
+
+    expired_at = time.time() + 5
+    monkeypatch.setattr(ttl_cache.time, "time", lambda: expired_at)
+
+    # Past `exp` the cache no longer answers, so the token goes through verification (and its expiry check)
+    await TokenUtils.decode_token(token)
+    assert decodes == [token, token]
+
+
+@pytest.mark.asyncio
+async def test_invalid_tokens_are_not_cached(decodes):
+    header, payload, signature = sign().split(".")
+    tampered = f"{header}.{payload}.{signature[:-4]}AAAA"
+
+    assert await TokenUtils.decode_token(tampered) is None
+    assert await TokenUtils.decode_token(tampered) is None
+    assert len(decodes) == 2
+    assert len(token_utils.verified_token_cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_bounded_by_maxsize(decodes):
+    tokens = [sign(user_id) for user_id in range(3)]
+    for token in tokens:
+        await TokenUtils.decode_token(token)
+
+    assert len(token_utils.verified_token_cache) == 2
+    await TokenUtils.decode_token(tokens[0])
+    assert decodes.count(tokens[0]) == 2
@@ -0,0 +1,114 @@
+import json
+import logging
+import time
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives import serialization
+
+from app.auth.utils import token_utils
+from app.auth.utils.key_ring import KeyRing, generate_private_key_pem
+from app.auth.utils.token_utils import TokenUtils
+from app.config.config import settings
+from app.utils.ttl_cache import TTLCache
+
+
+def write_private_key(keys_dir, kid):
+    (keys_dir / f"{kid}.pem").write_bytes(generate_private_key_pem("EdDSA"))
+
+
+def retire_key(keys_dir, kid):
+    """Keep only the public half of `kid`, as after rotating it out."""
+    ring = KeyRing("EdDSA", str(keys_dir))
+    public_key = ring.verification_key(kid)
+    (keys_dir / f"{kid}.pub.pem").write_bytes(
+        public_key.public_bytes(serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo)
+    )
+    (keys_dir / f"{kid}.pem").unlink()
+
+
+@pytest.fixture
+def use_key_ring(monkeypatch):
+    """Sign and verify tokens with `ring`, as if a worker had started with it (empty decode cache)."""
+
+    def use(ring):
+        monkeypatch.setattr(settings, "JWT_ALGORITHM", "EdDSA")
+        monkeypatch.setattr(token_utils, "key_ring", ring)
+        monkeypatch.setattr(token_utils, "verified_token_cache", TTLCache(maxsize=16))
+
+    return use
+
+
+def sign(payload=None):
+    return TokenUtils._encode({"user_id": 1, "exp": int(time.time()) + 60, **(payload or {})})
+
+
+def test_active_kid_defaults_to_last_private_key(tmp_path):
+    write_private_key(tmp_path, "2024-01")
+    write_private_key(tmp_path, "2024-02")
+    ring = KeyRing("EdDSA", str(tmp_path))
+
+    assert ring.signing_key()[0] == "2024-02"
+    assert {key["kid"] for key in json.loads(ring.jwks())["keys"]} == {"2024-01", "2024-02"}
+
+
+def test_load_rejects_missing_or_unknown_keys(tmp_path):
+    with pytest.raises(ValueError):
+        KeyRing("EdDSA", str(tmp_path)).load()
+
+    write_private_key(tmp_path, "2024-01")
+    with pytest.raises(ValueError):
+        KeyRing("EdDSA", str(tmp_path), active_kid="2024-02").load()
+
+
+def test_symmetric_algorithm_reads_no_keys(tmp_path):
+    ring = KeyRing("HS256", str(tmp_path / "missing"))
+
+    assert not ring.is_asymmetric
+    assert json.loads(ring.jwks()) == {"keys": []}
+
+
+@pytest.mark.asyncio
+async def test_rotation_keeps_old_tokens_valid(tmp_path, use_key_ring):
+    write_private_key(tmp_path, "2024-01")
+    use_key_ring(KeyRing("EdDSA", str(tmp_path)))
+    old_token = sign()
+    assert jwt.get_unverified_header(old_token)["kid"] == "2024-01"
+
+    # Stage 1: publish the new key while the old one still signs
+    write_private_key(tmp_path, "2024-02")
+    use_key_ring(KeyRing("EdDSA", str(tmp_path), active_kid="2024-01"))
+    assert jwt.get_unverified_header(sign())["kid"] == "2024-01"
+
+    # Stage 2: switch signing to the new key and retire the old one to its public half
+    retire_key(tmp_path, "2024-01")
+    ring = KeyRing("EdDSA", str(tmp_path), active_kid="2024-02")
+    use_key_ring(ring)
+    new_token = sign()
+
+    assert jwt.get_unverified_header(new_token)["kid"] == "2024-02"
+    assert (await TokenUtils.decode_token(old_token))["user_id"] == 1
+    assert (await TokenUtils.decode_token(new_token))["user_id"] == 1
+    assert {key["kid"] for key in json.loads(ring.jwks())["keys"]} == {"2024-01", "2024-02"}
+
+    # Stage 3: once the old key is deleted, its tokens no longer verify
+    (tmp_path / "2024-01.pub.pem").unlink()
+    use_key_ring(KeyRing("EdDSA", str(tmp_path)))
+    assert await TokenUtils.decode_token(old_token) is None
+    assert (await TokenUtils.decode_token(new_token))["user_id"] == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("kid", ["unknown", None])
+async def test_unknown_kid_is_an_invalid_token(tmp_path, use_key_ring, caplog, kid):
+    write_private_key(tmp_path, "2024-01")
+    ring = KeyRing("EdDSA", str(tmp_path))
+    use_key_ring(ring)
+    headers = {"kid": kid} if kid is not None else {}
+    token = jwt.encode({"user_id": 1, "exp": int(time.time()) + 60}, ring.signing_key()[1], "EdDSA", headers=headers)
+
+    with caplog.at_level(logging.WARNING):
+        assert await TokenUtils.decode_token(token) is None
+
+    assert "Invalid token" in caplog.text
+    assert not [record for record in caplog.records if record.levelno >= logging.ERROR]
@@ -0,0 +1,153 @@
+import asyncio
+
+import pytest
+import pytest_asyncio
+
+from app.integrations import l1_cache as l1_module
+from app.integrations.l1_cache import INVALIDATION_CHANNEL, L1Cache, l1_cache, listen_for_invalidations_forever
+from app.integrations.redis_cache import PRINCIPAL_INDEX_PREFIX, PRINCIPAL_KEY_PREFIX
+
+
+@pytest.fixture
+def subscribed(monkeypatch):
+    monkeypatch.setattr(l1_module, "_subscribed", True)
+
+
+@pytest.fixture
+def tier(monkeypatch):
+    """A registered L1 cache, as every worker has one per name."""
+    monkeypatch.setattr(l1_module, "_l1_caches", {})
+    return l1_cache("test")
+
+
+async def wait_for(condition, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "condition not met in time"
+        await asyncio.sleep(0.01)
+
+
+@pytest_asyncio.fixture
+async def listener(make_cache, tier):
+    """This worker's invalidation listener, on its own Redis connection."""
+    task = asyncio.create_task(listen_for_invalidations_forever(make_cache))
+    await wait_for(lambda: l1_module._subscribed)
+    yield task
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+
+def test_serves_nothing_while_unsubscribed(tier):
+    tier.set("key", "value")
+
+    assert tier.get("key") is None
+
+
+def test_entry_lives_for_at_most_the_l1_ttl(subscribed):
+    tier = L1Cache("test", maxsize=10, ttl=5)
+    tier.set("short", "value", ttl=1)
+    tier.set("long", "value", ttl=3600)
+    tier.set("expired", "value", ttl=0)
+
+    expiries = {key: expires_at for key, (expires_at, _) in tier._entries._data.items()}
+    assert set(expiries) == {"short", "long"}
+    assert expiries["long"] - expiries["short"] == pytest.approx(4, abs=0.1)
+
+
+def test_invalidate_local_drops_only_the_group(subscribed):
+    tier = L1Cache("test", maxsize=10, ttl=5)
+    tier.set("a", 1, groups=["7"])
+    tier.set("b", 2, groups=["7", "8"])
+    tier.set("c", 3, groups=["8"])
+
+    assert tier.invalidate_local("7") == 2
+    assert (tier.get("a"), tier.get("b"), tier.get("c")) == (None, None, 3)
+
+
+@pytest.mark.asyncio
+async def test_invalidation_reaches_other_workers(make_cache, tier, listener):
+    other_worker = await make_cache()
+    tier.set("a", 1, groups=["7"])
+    tier.set("b", 2, groups=["8"])
+
+    # Another worker's L1 cache of the same name invalidates group 7 and announces it
+    await L1Cache("test", maxsize=10, ttl=5).invalidate(other_worker, "7")
+
+    await wait_for(lambda: tier.get("a") is None)
+    assert tier.get("b") == 2
+
+
+@pytest.mark.asyncio
+async def test_invalidation_of_another_cache_is_ignored(make_cache, tier, listener):
+    other_worker = await make_cache()
+    tier.set("a", 1, groups=["7"])
+    tier.set("sentinel", 2, groups=["9"])
+
+    await other_worker.publish(INVALIDATION_CHANNEL, "unknown|7")
+    await other_worker.publish(INVALIDATION_CHANNEL, "test|8")
+    # Messages arrive in order: once the sentinel is dropped, the others have been applied
+    await other_worker.publish(INVALIDATION_CHANNEL, "test|9")
+    await wait_for(lambda: tier.get("sentinel") is None)
+
+    assert tier.get("a") == 1
+
+
+@pytest.mark.asyncio
+async def test_lost_subscription_stops_serving_and_clears_on_resubscribe(make_cache, tier):
+    caches = []
+
+    async def connect():
+        caches.append(await make_cache())
+        return caches[-1]
+
+    task = asyncio.create_task(listen_for_invalidations_forever(connect))
+    await wait_for(lambda: l1_module._subscribed)
+    tier.set("a", 1)
+    assert tier.get("a") == 1
+
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert tier.get("a") is None
+
+    task = asyncio.create_task(listen_for_invalidations_forever(connect))
+    await wait_for(lambda: l1_module._subscribed)
+    assert tier.get("a") is None
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+
+@pytest.mark.asyncio
+async def test_invalidate_principals_drops_every_token(cache):
+    await cache.set_principal(7, "first", b"principal", expire=60, index_expire=120)
+    await cache.set_principal(7, "second", b"principal", expire=60, index_expire=120)
+    await cache.set_principal(8, "other", b"principal", expire=60, index_expire=120)
+
+    await cache.invalidate_principals(7)
+
+    assert await cache.get_principal(7, "first") is None
+    assert await cache.get_principal(7, "second") is None
+    assert not await cache.redis.exists(f"{PRINCIPAL_INDEX_PREFIX}:7")
+    assert await cache.get_principal(8, "other") == b"principal"
+
+
+@pytest.mark.asyncio
+async def test_principal_cached_after_invalidation_stays_invalidatable(cache):
+    await cache.invalidate_principals(7)
+    await cache.set_principal(7, "late", b"principal", expire=60, index_expire=120)
+
+    assert await cache.redis.smembers(f"{PRINCIPAL_INDEX_PREFIX}:7") == {f"{PRINCIPAL_KEY_PREFIX}:7:late".encode()}
+    await cache.invalidate_principals(7)
+    assert await cache.get_principal(7, "late") is None
+
+
+@pytest.mark.asyncio
+async def test_invalidate_principals_handles_large_indexes(cache):
+    for index in range(2500):
+        await cache.set_principal(7, str(index), b"principal", expire=60, index_expire=120)
+
+    await cache.invalidate_principals(7)
+
+    assert await cache.redis.dbsize() == 0
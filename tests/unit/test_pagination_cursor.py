@@ -0,0 +1,72 @@
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import HTTPException, status
+
+from app.config.config import settings
+from app.pagination import decode_cursor, encode_cursor
+from app.user.models.user_models import User
+
+KEY_COLUMNS = (User.created_at, User.id)
+
+
+def test_cursor_round_trip():
+    created_at = datetime(2024, 5, 17, 12, 30, 45, 123456, tzinfo=timezone.utc)
+    cursor = encode_cursor([created_at, 42])
+
+    assert decode_cursor(cursor, KEY_COLUMNS) == [created_at, 42]
+
+
+def test_cursor_round_trip_single_column():
+    assert decode_cursor(encode_cursor([7]), (User.id,)) == [7]
+
+
+def test_cursor_is_url_safe():
+    cursor = encode_cursor([datetime(2024, 1, 1, tzinfo=timezone.utc), 1])
+
+    assert set(cursor) <= set("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_.")
+
+
+def assert_invalid(cursor, columns=KEY_COLUMNS):
+    with pytest.raises(HTTPException) as exc_info:
+        decode_cursor(cursor, columns)
+    assert exc_info.value.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_cursor_with_tampered_payload_is_rejected():
+    cursor = encode_cursor([datetime(2024, 1, 1, tzinfo=timezone.utc), 1])
+    forged_payload = encode_cursor([datetime(2024, 1, 1, tzinfo=timezone.utc), 999]).split(".")[0]
+    signature = cursor.split(".")[1]
+
+    assert_invalid(f"{forged_payload}.{signature}")
+
+
+def test_cursor_with_tampered_signature_is_rejected():
+    payload, signature = encode_cursor([1]).split(".")
+    flipped = ("A" if signature[0] != "A" else "B") + signature[1:]
+
+    assert_invalid(f"{payload}.{flipped}", (User.id,))
+
+
+def test_cursor_signed_with_another_secret_is_rejected(monkeypatch):
+    monkeypatch.setattr(settings, "PAGINATION_CURSOR_SECRET", "another-secret")
+    cursor = encode_cursor([1])
+    monkeypatch.setattr(settings, "PAGINATION_CURSOR_SECRET", "the-real-secret")
+
+    assert_invalid(cursor, (User.id,))
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    ["", "no-separator", ".", "!!!.!!!", "e30.", "not base64.at all"],
+)
+def test_malformed_cursor_is_rejected(cursor):
+    assert_invalid(cursor)
+
+
+def test_cursor_for_another_sort_key_is_rejected():
+    assert_invalid(encode_cursor([1]))
+
+
+def test_cursor_with_invalid_datetime_is_rejected():
+    assert_invalid(encode_cursor(["yesterday", 1]))
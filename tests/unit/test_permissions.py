@@ -0,0 +1,104 @@
+import asyncio
+
+import pytest
+
+from app.auth import permissions
+from app.auth.permissions import (
+    PERMISSIONS_CHANGED_CHANNEL,
+    PermissionRegistry,
+    publish_permissions_changed,
+    refresh_permissions_forever,
+)
+
+ROLES = [
+    (1, "admin", ["users:read", "users:write", "users:delete"]),
+    (2, "support", ["users:read"]),
+    (3, "editor", ["users:write"]),
+    (4, "guest", None),
+]
+
+
+@pytest.fixture
+def registry():
+    registry = PermissionRegistry()
+    registry.compile(ROLES)
+    return registry
+
+
+def test_each_permission_gets_its_own_bit(registry):
+    bits = [registry.required_mask((permission,)) for permission in ("users:delete", "users:read", "users:write")]
+
+    assert bits == [1, 2, 4]
+    assert registry.role_mask([1]) == 7
+    assert registry.role_mask([4]) == 0
+
+
+def test_roles_grant_the_union_of_their_permissions(registry):
+    required = ("users:read", "users:write")
+
+    assert registry.has_permissions([1], required)
+    assert not registry.has_permissions([2], required)
+    assert not registry.has_permissions([3], required)
+    assert registry.has_permissions([2, 3], required)
+    assert registry.has_permissions([1], ())
+
+
+def test_unknown_permissions_and_roles_grant_nothing(registry):
+    assert registry.required_mask(("users:read", "billing:read")) is None
+    assert not registry.has_permissions([1], ("billing:read",))
+    assert not registry.has_permissions([99], ("users:read",))
+    assert registry.role_names([2, 99, 1]) == ["support", "admin"]
+
+
+def test_recompile_replaces_bits_and_cached_masks(registry):
+    assert registry.has_permissions([2], ("users:read",))
+    version = registry.version
+
+    registry.compile([(2, "support", ["billing:read"]), (5, "reader", ["users:read"])])
+
+    assert registry.version == version + 1
+    assert not registry.has_permissions([2], ("users:read",))
+    assert registry.has_permissions([5], ("users:read",))
+    assert registry.stats()["roles"] == 2
+    assert registry.stats()["permissions"] == 2
+
+
+@pytest.mark.asyncio
+async def test_registry_reloads_when_a_change_is_announced(monkeypatch, make_cache):
+    registry = PermissionRegistry()
+    rows = [(2, "support", [])]
+    loads = asyncio.Queue()
+
+    async def load():
+        registry.compile(rows)
+        loads.put_nowait(registry.version)
+
+    monkeypatch.setattr(registry, "load", load)
+    monkeypatch.setattr(permissions, "permission_registry", registry)
+    refresher = asyncio.create_task(refresh_permissions_forever(await make_cache()))
+    try:
+        # Loaded once subscribed
+        assert await asyncio.wait_for(loads.get(), 2) == 1
+        assert not registry.has_permissions([2], ("users:read",))
+
+        rows = [(2, "support", ["users:read"])]
+        await publish_permissions_changed(await make_cache())
+
+        assert await asyncio.wait_for(loads.get(), 2) == 2
+        assert registry.has_permissions([2], ("users:read",))
+    finally:
+        refresher.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await refresher
+
+
+@pytest.mark.asyncio
+async def test_publish_reaches_subscribers(make_cache):
+    cache = await make_cache()
+    async with cache.subscribe(PERMISSIONS_CHANGED_CHANNEL) as pubsub:
+        await publish_permissions_changed(cache)
+        # The subscription confirmation comes first, skipped as None
+        messages = [await pubsub.get_message(ignore_subscribe_messages=True, timeout=1) for _ in range(2)]
+        message = next(message for message in messages if message is not None)
+
+    assert message["data"] == b"reload"
@@ -0,0 +1,112 @@
+import asyncio
+
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+
+from app import rate_limit
+from app.config.config import settings
+from app.main import app
+from app.rate_limit import LocalPreFilter, RateLimiter, parse_limit
+
+
+def test_parse_limit():
+    assert parse_limit("20/60") == (20, 20 / 60)
+    assert parse_limit("5/1") == (5, 5.0)
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_script_rejects_once_empty(cache):
+    results = [await cache.consume_token_bucket("rate_limit:test", 3, 0.01) for _ in range(4)]
+
+    assert [allowed for allowed, _ in results] == [True, True, True, False]
+    # One token refills every 100 seconds
+    assert 99 < results[-1][1] <= 100
+    assert await cache.redis.pttl("rate_limit:test") > 0
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_script_refills(cache):
+    assert (await cache.consume_token_bucket("rate_limit:test", 1, 100))[0]
+    assert not (await cache.consume_token_bucket("rate_limit:test", 1, 100))[0]
+
+    await asyncio.sleep(0.05)
+    assert (await cache.consume_token_bucket("rate_limit:test", 1, 100))[0]
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_is_shared_by_workers(make_cache):
+    first, second = await make_cache(), await make_cache()
+
+    assert (await first.consume_token_bucket("rate_limit:test", 1, 0.01))[0]
+    assert not (await second.consume_token_bucket("rate_limit:test", 1, 0.01))[0]
+
+
+def test_prefilter_allows_burst_times_the_limit():
+    prefilter = LocalPreFilter(burst=3, maxsize=100)
+
+    assert [prefilter.check("key", 2, 0.01) for _ in range(6)] == [None] * 6
+    assert prefilter.check("key", 2, 0.01) > 0
+    assert prefilter.check("other", 2, 0.01) is None
+
+
+def test_prefilter_remembers_denials():
+    prefilter = LocalPreFilter(burst=0, maxsize=100)
+    prefilter.deny("key", 30)
+
+    assert 29 < prefilter.check("key", 100, 100) <= 30
+    assert prefilter.check("other", 100, 100) is None
+
+
+@pytest.mark.asyncio
+async def test_redis_rejection_is_then_answered_locally(cache):
+    limiter = RateLimiter(burst=3, maxsize=100)
+
+    assert await limiter.hit(cache, "ip:/login:10.0.0.1", "1/60") is None
+    assert await limiter.hit(cache, "ip:/login:10.0.0.1", "1/60") > 0
+    assert await limiter.hit(cache, "ip:/login:10.0.0.1", "1/60") > 0
+
+    assert limiter.stats() == {"allowed": 1, "rejected_local": 1, "rejected_redis": 1, "redis_errors": 0}
+
+
+@pytest.mark.asyncio
+async def test_falls_back_to_prefilter_without_redis(cache):
+    limiter = RateLimiter(burst=2, maxsize=100)
+    for _ in range(cache.breaker.failure_threshold):
+        cache.breaker.record_failure()
+
+    assert [await limiter.hit(cache, "key", "1/60") for _ in range(2)] == [None, None]
+    assert await limiter.hit(cache, "key", "1/60") > 0
+    assert await limiter.hit(None, "other", "1/60") is None
+    assert limiter.stats()["redis_errors"] == 2
+
+
+@pytest.mark.asyncio
+async def test_check_stops_at_first_rejection(cache):
+    limiter = RateLimiter(burst=3, maxsize=100)
+    await limiter.hit(cache, "ip", "1/60")
+
+    assert await limiter.check(cache, [("ip", "1/60"), ("route", "1/60")]) > 0
+    assert await limiter.check(cache, [("route", "1/60")]) is None
+
+
+def test_rejection_carries_cors_headers(monkeypatch):
+    async def no_cache():
+        return None
+
+    limiter = RateLimiter(burst=1, maxsize=100)
+    monkeypatch.setattr(rate_limit, "rate_limiter", limiter)
+    monkeypatch.setattr(rate_limit, "get_optional_redis_cache", no_cache)
+    monkeypatch.setattr(settings, "RATE_LIMIT_PER_IP", "1/60")
+    # The test client's address has used up its local bucket
+    limiter.prefilter.check("ip:/user/auth/login:testclient", 1, 1 / 60)
+
+    response = TestClient(app).post(
+        "/user/auth/login",
+        json={"email": "user@example.com", "password": "secret"},
+        headers={"Origin": "https://a.test"},
+    )
+
+    assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    assert "retry-after" in response.headers
+    assert "access-control-allow-origin" in response.headers
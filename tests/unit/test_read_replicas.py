@@ -0,0 +1,166 @@
+import asyncio
+import time
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import create_async_engine
+from starlette.responses import JSONResponse
+
+from app.config.config import settings
+from app.integrations import read_replicas
+from app.integrations.read_replicas import (
+    PRIMARY_COOKIE,
+    ReadYourWritesMiddleware,
+    Replica,
+    ReplicaRouter,
+    read_only_primary_engine,
+    read_session,
+    use_primary_for_reads,
+)
+
+
+class FakeConnection:
+    def __init__(self, lag):
+        self.lag = lag
+
+    async def __aenter__(self):
+        if isinstance(self.lag, Exception):
+            raise self.lag
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def scalar(self, statement):
+        if self.lag == "hang":
+            await asyncio.sleep(10)
+        return self.lag
+
+
+class FakeEngine:
+    """Answers the replica health check with a fixed lag (or error)."""
+
+    def __init__(self, lag=0.0):
+        self.lag = lag
+
+    def connect(self):
+        return FakeConnection(self.lag)
+
+
+def healthy_replica(name, weight=1, engine=None):
+    replica = Replica(name, engine or FakeEngine(), weight=weight)
+    replica.healthy = True
+    return replica
+
+
+def test_smooth_weighted_round_robin():
+    router = ReplicaRouter([healthy_replica("a", weight=2), healthy_replica("b")])
+
+    assert [router.pick().name for _ in range(6)] == ["a", "b", "a", "a", "b", "a"]
+
+
+def test_unhealthy_replicas_are_skipped():
+    unhealthy = healthy_replica("b")
+    unhealthy.healthy = False
+    router = ReplicaRouter([healthy_replica("a"), unhealthy])
+
+    assert {router.pick().name for _ in range(4)} == {"a"}
+    assert ReplicaRouter([unhealthy]).pick() is None
+    assert ReplicaRouter([]).pick() is None
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "lag, healthy",
+    [
+        (0.0, True),
+        (None, True),
+        (settings.DB_REPLICA_MAX_LAG_SECONDS, True),
+        (settings.DB_REPLICA_MAX_LAG_SECONDS + 1, False),
+        (ConnectionRefusedError("refused"), False),
+        ("hang", False),
+    ],
+)
+async def test_health_check(monkeypatch, lag, healthy):
+    monkeypatch.setattr(settings, "DB_REPLICA_HEALTH_TIMEOUT", 0.01)
+    replica = Replica("a", FakeEngine(lag))
+    replica.healthy = not healthy
+
+    await ReplicaRouter([replica]).check(replica)
+
+    assert replica.healthy is healthy
+    assert (replica.last_error is None) is healthy
+
+
+@pytest.fixture
+def replica(monkeypatch):
+    """One healthy replica on an engine that is never connected."""
+    replica = healthy_replica("replica:5432", engine=create_async_engine("postgresql+asyncpg://u:p@replica:5432/db"))
+    monkeypatch.setattr(read_replicas, "replica_router", ReplicaRouter([replica]))
+    return replica
+
+
+def test_reads_go_to_a_healthy_replica(replica):
+    assert read_session().bind is replica.engine
+
+
+def test_reads_fall_back_to_the_read_only_primary(replica):
+    replica.healthy = False
+
+    assert read_session().bind is read_only_primary_engine
+
+
+@pytest.mark.parametrize(
+    "wrote, pinned_for, primary",
+    [
+        (False, None, False),
+        (True, None, True),
+        (False, 2, True),
+        (False, -1, False),
+        # A forged cookie can't pin the client for longer than the window
+        (False, 3600, False),
+    ],
+)
+def test_read_your_writes(replica, wrote, pinned_for, primary):
+    pinned_until = time.time() + pinned_for if pinned_for is not None else 0.0
+    token = read_replicas._request_state.set({"wrote": wrote, "pinned_until": pinned_until})
+    try:
+        assert use_primary_for_reads() is primary
+        assert (read_session().bind is read_only_primary_engine) is primary
+    finally:
+        read_replicas._request_state.reset(token)
+
+
+def test_no_request_state_means_no_pinning(replica):
+    assert not use_primary_for_reads()
+
+
+async def endpoint(scope, receive, send):
+    """Writes when asked to, and reports where its reads would go."""
+    if scope["path"] == "/write":
+        read_replicas._request_state.get()["wrote"] = True
+    await JSONResponse({"primary": use_primary_for_reads()})(scope, receive, send)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("fraction", [0.1, 0.9])
+async def test_write_pins_the_client_to_the_primary_for_the_window(monkeypatch, fraction):
+    now = int(time.time()) + fraction
+    monkeypatch.setattr(read_replicas.time, "time", lambda: now)
+    transport = ASGITransport(app=ReadYourWritesMiddleware(endpoint))
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        read = await client.get("/read")
+        assert read.json() == {"primary": False}
+        assert PRIMARY_COOKIE not in read.cookies
+
+        write = await client.post("/write")
+        assert write.json() == {"primary": True}
+        pinned_until = float(write.cookies[PRIMARY_COOKIE])
+        assert now < pinned_until <= now + settings.DB_READ_YOUR_WRITES_SECONDS
+        assert f"Max-Age={settings.DB_READ_YOUR_WRITES_SECONDS}" in write.headers["set-cookie"]
+
+        # The client sends the cookie back: its next reads stick to the primary
+        assert (await client.get("/read")).json() == {"primary": True}
+
+        client.cookies.set(PRIMARY_COOKIE, "not-a-number")
+        assert (await client.get("/read")).json() == {"primary": False}
@@ -0,0 +1,132 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from app.integrations import redis_codec
+from app.integrations.redis_cache import RedisCache
+from app.integrations.redis_codec import COMPRESSED_FLAG, JSON, MSGPACK, RedisCodec
+
+VALUE = {"id": 7, "name": "Ada", "roles": ["admin", "support"], "score": 1.5, "active": True, "manager": None}
+
+needs_zstandard = pytest.mark.skipif(redis_codec.zstandard is None, reason="zstandard is not installed")
+
+
+@pytest.mark.parametrize("serializer, header", [("msgpack", MSGPACK), ("json", JSON)])
+def test_round_trip_with_serializer_header(serializer, header):
+    codec = RedisCodec(serializer=serializer, compression_threshold=0)
+    encoded = codec.encode(VALUE)
+
+    assert encoded[0] == header
+    assert codec.decode(encoded) == VALUE
+
+
+def test_msgpack_is_smaller_than_json():
+    msgpack_codec = RedisCodec(serializer="msgpack", compression_threshold=0)
+    json_codec = RedisCodec(serializer="json", compression_threshold=0)
+
+    assert len(msgpack_codec.encode(VALUE)) < len(json_codec.encode(VALUE))
+
+
+def test_msgpack_keeps_bytes_and_aware_datetimes():
+    codec = RedisCodec(compression_threshold=0)
+    value = {"digest": b"\x00\xff", "at": datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc)}
+
+    assert codec.decode(codec.encode(value)) == value
+
+
+def test_values_written_with_another_serializer_stay_readable():
+    json_value = RedisCodec(serializer="json", compression_threshold=0).encode(VALUE)
+    msgpack_value = RedisCodec(serializer="msgpack", compression_threshold=0).encode(VALUE)
+
+    assert RedisCodec(serializer="msgpack").decode(json_value) == VALUE
+    assert RedisCodec(serializer="json").decode(msgpack_value) == VALUE
+
+
+@needs_zstandard
+def test_large_payloads_are_compressed():
+    codec = RedisCodec(compression_threshold=64)
+    small, large = {"id": 1}, {"items": ["x" * 10] * 100}
+
+    assert codec.encode(small)[0] == MSGPACK
+    encoded = codec.encode(large)
+    assert encoded[0] == MSGPACK | COMPRESSED_FLAG
+    assert len(encoded) < len(RedisCodec(compression_threshold=0).encode(large))
+    assert codec.decode(encoded) == large
+    # Compression is per value: a codec that doesn't compress still reads compressed values
+    assert RedisCodec(compression_threshold=0).decode(encoded) == large
+
+
+def test_compressed_value_needs_zstandard(monkeypatch):
+    encoded = bytes((MSGPACK | COMPRESSED_FLAG,)) + b"payload"
+    monkeypatch.setattr(redis_codec, "zstandard", None)
+
+    with pytest.raises(ValueError):
+        RedisCodec().decode(encoded)
+
+
+def test_unknown_header_and_serializer_are_rejected():
+    with pytest.raises(ValueError):
+        RedisCodec().decode(b"\x07payload")
+    with pytest.raises(ValueError):
+        RedisCodec(serializer="pickle")
+
+
+@pytest.mark.asyncio
+async def test_mset_and_mget_round_trip(cache):
+    values = {"a": {"id": 1}, "b": [1, 2, 3], "c": "text"}
+    await cache.mset(values, expire=60)
+
+    assert await cache.mget(["a", "missing", "b", "c"]) == [{"id": 1}, None, [1, 2, 3], "text"]
+    assert 0 < await cache.redis.ttl("a") <= 60
+    assert await cache.mget([]) == []
+
+
+@pytest.mark.asyncio
+async def test_mset_without_expire_keeps_values(cache):
+    await cache.mset({"a": 1, "b": 2}, expire=None)
+    await cache.mset({})
+
+    assert await cache.redis.ttl("a") == -1
+    assert await cache.mget(["a", "b"]) == [1, 2]
+
+
+@pytest.mark.asyncio
+async def test_delete_many(cache):
+    await cache.mset({"a": 1, "b": 2, "c": 3})
+
+    assert await cache.delete_many(["a", "b", "missing"]) == 2
+    assert await cache.delete_many([]) == 0
+    assert await cache.mget(["a", "b", "c"]) == [None, None, 3]
+
+
+@pytest.mark.asyncio
+async def test_pipeline_sends_queued_commands_on_exit(cache):
+    async with cache.pipeline() as pipe:
+        pipe.set("a", cache.codec.encode({"id": 1}))
+        pipe.set("b", cache.codec.encode({"id": 2}))
+        assert await cache.get("a") is None
+
+    assert await cache.mget(["a", "b"]) == [{"id": 1}, {"id": 2}]
+
+
+@pytest.mark.asyncio
+async def test_pipeline_sends_nothing_if_the_block_raises(cache):
+    with pytest.raises(RuntimeError):
+        async with cache.pipeline() as pipe:
+            pipe.set("a", cache.codec.encode(1))
+            raise RuntimeError("abort")
+
+    assert await cache.get("a") is None
+
+
+@pytest.mark.asyncio
+async def test_workers_with_different_serializers_share_values(redis_server, cache):
+    json_worker = RedisCache(url="redis://fake", codec=RedisCodec(serializer="json"))
+    await json_worker.connect()
+    try:
+        await cache.set("key", VALUE)
+        assert await json_worker.get("key") == VALUE
+        await json_worker.set("key", VALUE)
+        assert await cache.get("key") == VALUE
+    finally:
+        await json_worker.close()
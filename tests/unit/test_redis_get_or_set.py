@@ -0,0 +1,152 @@
+import asyncio
+
+import pytest
+from redis.exceptions import TimeoutError as RedisTimeoutError
+
+from app.integrations import redis_cache
+from app.integrations.redis_cache import LOCK_PREFIX
+
+
+class Loader:
+    """Counts its calls and returns `value`, after `delay` seconds."""
+
+    def __init__(self, value="value", delay=0.0):
+        self.value = value
+        self.delay = delay
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return self.value
+
+
+def fail_with_timeout(*args, **kwargs):
+    raise RedisTimeoutError("Timeout reading from socket")
+
+
+@pytest.mark.asyncio
+async def test_miss_loads_and_caches(cache):
+    loader = Loader({"id": 1})
+
+    assert await cache.get_or_set("key", loader, ttl=60, beta=0) == {"id": 1}
+    assert await cache.get_or_set("key", loader, ttl=60, beta=0) == {"id": 1}
+    assert loader.calls == 1
+    assert 54 <= await cache.redis.ttl("key") <= 60
+    assert not await cache.redis.exists(f"{LOCK_PREFIX}:get_or_set:key")
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_load(cache):
+    loader = Loader(delay=0.02)
+
+    results = await asyncio.gather(*(cache.get_or_set("key", loader, ttl=60) for _ in range(10)))
+
+    assert results == ["value"] * 10
+    assert loader.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_other_worker_waits_for_the_lock_holder(cache, make_cache):
+    other_worker = await make_cache()
+    loader = Loader(delay=0.05)
+    results = await asyncio.gather(
+        cache.get_or_set("key", loader, ttl=60), other_worker.get_or_set("key", loader, ttl=60)
+    )
+
+    assert results == ["value", "value"]
+    assert loader.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_hit_refreshes_early_near_expiry(cache, monkeypatch):
+    await cache.get_or_set("key", Loader("old"), ttl=60, jitter=0)
+    # A slow loader (large delta) with a draw close to 1 makes the refresh certain
+    await cache._set_entry("key", "old", delta=30.0, expire=60)
+    monkeypatch.setattr(redis_cache.random, "random", lambda: 0.999)
+    loader = Loader("new")
+
+    assert await cache.get_or_set("key", loader, ttl=60) == "new"
+    assert loader.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_hit_is_not_refreshed_without_beta(cache, monkeypatch):
+    await cache._set_entry("key", "old", delta=30.0, expire=60)
+    monkeypatch.setattr(redis_cache.random, "random", lambda: 0.999)
+    loader = Loader("new")
+
+    assert await cache.get_or_set("key", loader, ttl=60, beta=0) == "old"
+    assert loader.calls == 0
+
+
+@pytest.mark.asyncio
+async def test_early_refresh_in_progress_serves_the_stale_value(cache, monkeypatch):
+    await cache._set_entry("key", "old", delta=30.0, expire=60)
+    await cache.acquire_lock("get_or_set:key", timeout=5)
+    monkeypatch.setattr(redis_cache.random, "random", lambda: 0.999)
+    loader = Loader("new")
+
+    assert await cache.get_or_set("key", loader, ttl=60) == "old"
+    assert loader.calls == 0
+
+
+@pytest.mark.asyncio
+async def test_lookup_timeout_falls_back_to_the_loader(cache, monkeypatch):
+    monkeypatch.setattr(cache.redis, "get", fail_with_timeout)
+    loader = Loader()
+
+    assert await cache.get_or_set("key", loader, ttl=60) == "value"
+    assert loader.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_outage_falls_back_to_the_loader_and_still_coalesces(cache, monkeypatch):
+    monkeypatch.setattr(cache.redis, "get", fail_with_timeout)
+    monkeypatch.setattr(cache.redis, "set", fail_with_timeout)
+    loader = Loader(delay=0.02)
+
+    results = await asyncio.gather(*(cache.get_or_set("key", loader, ttl=60) for _ in range(5)))
+
+    assert results == ["value"] * 5
+    assert loader.calls == 1
+    assert cache.breaker.is_open
+
+
+@pytest.mark.asyncio
+async def test_open_breaker_falls_back_to_the_loader(cache):
+    for _ in range(cache.breaker.failure_threshold):
+        cache.breaker.record_failure()
+    loader = Loader()
+
+    assert await cache.get_or_set("key", loader, ttl=60) == "value"
+    assert loader.calls == 1
+    assert not await cache.redis.exists("key")
+
+
+@pytest.mark.asyncio
+async def test_failed_store_still_returns_the_value(cache, monkeypatch):
+    set_without_values = cache.redis.set
+
+    async def set_locks_only(name, value, *args, **kwargs):
+        if not kwargs.get("nx"):
+            raise RedisTimeoutError("Timeout writing to socket")
+        return await set_without_values(name, value, *args, **kwargs)
+
+    monkeypatch.setattr(cache.redis, "set", set_locks_only)
+    loader = Loader()
+
+    assert await cache.get_or_set("key", loader, ttl=60) == "value"
+    assert loader.calls == 1
+    assert not await cache.redis.exists(f"{LOCK_PREFIX}:get_or_set:key")
+
+
+@pytest.mark.asyncio
+async def test_loader_exception_propagates_and_releases_the_lock(cache):
+    async def loader():
+        raise ValueError("source unavailable")
+
+    with pytest.raises(ValueError, match="source unavailable"):
+        await cache.get_or_set("key", loader, ttl=60)
+    assert not await cache.redis.exists("key")
+    assert not await cache.redis.exists(f"{LOCK_PREFIX}:get_or_set:key")
@@ -0,0 +1,199 @@
+import asyncio
+from types import SimpleNamespace
+from typing import Annotated, Optional
+
+import pytest
+import pytest_asyncio
+from fastapi import Depends, FastAPI, Header, Request
+from httpx import ASGITransport, AsyncClient
+
+from app import response_cache
+from app.response_cache import ResponseCacheStats, cache_response, invalidate_response_cache, invalidates_response_cache
+
+
+class FakeSession:
+    """Stands in for the request's DB session; closed when the request's dependencies are torn down."""
+
+    def __init__(self):
+        self.closed = False
+
+
+class Endpoint:
+    """Counts calls, checking the session each one was given is still open while it runs."""
+
+    def __init__(self):
+        self.calls = 0
+        self.release = asyncio.Event()
+        self.release.set()
+        self.started = asyncio.Event()
+
+    async def __call__(self, session: FakeSession, value: str) -> dict:
+        self.calls += 1
+        self.started.set()
+        await self.release.wait()
+        assert not session.closed, "endpoint ran with a closed session"
+        return {"value": value, "call": self.calls}
+
+
+async def get_session():
+    session = FakeSession()
+    try:
+        yield session
+    finally:
+        session.closed = True
+
+
+def authenticate(request: Request, x_user: Annotated[Optional[int], Header()] = None) -> None:
+    if x_user is not None:
+        request.state.principal = SimpleNamespace(id=x_user)
+
+
+@pytest.fixture
+def endpoint():
+    return Endpoint()
+
+
+@pytest.fixture
+def app(endpoint):
+    app = FastAPI(dependencies=[Depends(authenticate)])
+
+    @app.get("/shared")
+    @cache_response("shared", ttl=60, per_user=False)
+    async def shared(session: Annotated[FakeSession, Depends(get_session)], value: str = "default") -> dict:
+        return await endpoint(session, value)
+
+    @app.get("/mine")
+    @cache_response("mine", ttl=60)
+    async def mine(session: Annotated[FakeSession, Depends(get_session)], request: Request) -> dict:
+        principal = getattr(request.state, "principal", None)
+        return await endpoint(session, str(principal.id) if principal else "anonymous")
+
+    @app.put("/mine")
+    @invalidates_response_cache("shared", user_namespaces=["mine"])
+    async def update_mine() -> dict:
+        return {}
+
+    return app
+
+
+@pytest_asyncio.fixture
+async def client(monkeypatch, cache, app):
+    async def get_cache():
+        return cache
+
+    monkeypatch.setattr(response_cache, "get_optional_redis_cache", get_cache)
+    monkeypatch.setattr(response_cache, "stats", ResponseCacheStats())
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+
+@pytest.mark.asyncio
+async def test_second_request_is_a_hit(client, endpoint):
+    first = await client.get("/shared")
+    second = await client.get("/shared")
+
+    assert first.headers["X-Cache"] == "MISS"
+    assert second.headers["X-Cache"] == "HIT"
+    assert second.json() == first.json() == {"value": "default", "call": 1}
+    assert endpoint.calls == 1
+    assert response_cache.stats.snapshot()["hit_ratio"] == 0.5
+
+
+@pytest.mark.asyncio
+async def test_query_parameters_are_part_of_the_key(client, endpoint):
+    await client.get("/shared", params={"value": "a"})
+
+    assert (await client.get("/shared", params={"value": "b"})).json()["value"] == "b"
+    assert (await client.get("/shared", params={"value": "a"})).headers["X-Cache"] == "HIT"
+    assert endpoint.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_per_user_entries_are_separate(client, endpoint):
+    assert (await client.get("/mine", headers={"X-User": "1"})).json()["value"] == "1"
+    assert (await client.get("/mine", headers={"X-User": "2"})).json()["value"] == "2"
+    assert (await client.get("/mine", headers={"X-User": "1"})).headers["X-Cache"] == "HIT"
+    assert endpoint.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_write_invalidates_the_users_entries_and_shared_namespaces(client, endpoint):
+    await client.get("/mine", headers={"X-User": "1"})
+    await client.get("/mine", headers={"X-User": "2"})
+    await client.get("/shared")
+
+    await client.put("/mine", headers={"X-User": "1"})
+
+    assert (await client.get("/mine", headers={"X-User": "1"})).headers["X-Cache"] == "MISS"
+    assert (await client.get("/mine", headers={"X-User": "2"})).headers["X-Cache"] == "HIT"
+    assert (await client.get("/shared")).headers["X-Cache"] == "MISS"
+
+
+@pytest.mark.asyncio
+async def test_invalidating_a_namespace_drops_every_entry(client, endpoint):
+    await client.get("/shared", params={"value": "a"})
+    await client.get("/shared", params={"value": "b"})
+
+    await invalidate_response_cache("shared")
+
+    assert (await client.get("/shared", params={"value": "a"})).headers["X-Cache"] == "MISS"
+    assert (await client.get("/shared", params={"value": "b"})).headers["X-Cache"] == "MISS"
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_call(client, endpoint):
+    endpoint.release.clear()
+    first = asyncio.create_task(client.get("/shared"))
+    await endpoint.started.wait()
+    others = [asyncio.create_task(client.get("/shared")) for _ in range(4)]
+    await asyncio.sleep(0.01)
+    endpoint.release.set()
+
+    responses = await asyncio.gather(first, *others)
+
+    assert endpoint.calls == 1
+    assert {response.json()["call"] for response in responses} == {1}
+    assert [response.headers["X-Cache"] for response in responses] == ["MISS"] + ["HIT"] * 4
+    assert response_cache.stats.coalesced == 4
+
+
+@pytest.mark.asyncio
+async def test_disconnected_first_caller_hands_the_call_to_a_waiter(client, endpoint):
+    endpoint.release.clear()
+    first = asyncio.create_task(client.get("/shared"))
+    await endpoint.started.wait()
+    second = asyncio.create_task(client.get("/shared"))
+    await asyncio.sleep(0.01)
+
+    # The first request goes away: its dependencies, and its session, are torn down
+    first.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await first
+    endpoint.release.set()
+
+    response = await second
+    assert response.status_code == 200
+    assert response.json()["call"] == 2
+
+
+@pytest.mark.asyncio
+async def test_bypassed_without_redis(monkeypatch, client, endpoint):
+    async def no_cache():
+        return None
+
+    monkeypatch.setattr(response_cache, "get_optional_redis_cache", no_cache)
+    await client.get("/shared")
+    response = await client.get("/shared")
+
+    assert "X-Cache" not in response.headers
+    assert endpoint.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_per_user_endpoint_bypassed_without_principal(client, endpoint):
+    await client.get("/mine")
+    response = await client.get("/mine")
+
+    assert response.json()["value"] == "anonymous"
+    assert "X-Cache" not in response.headers
+    assert endpoint.calls == 2
@@ -0,0 +1,151 @@
+import asyncio
+
+import pytest
+
+from app.utils.single_flight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_run():
+    flights = SingleFlight()
+    calls = 0
+
+    async def load():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return calls
+
+    results = await asyncio.gather(*(flights.do("key", load) for _ in range(10)))
+
+    assert calls == 1
+    assert results == [1] * 10
+    assert not flights.in_flight("key")
+
+
+@pytest.mark.asyncio
+async def test_different_keys_run_separately():
+    flights = SingleFlight()
+
+    async def load(value):
+        await asyncio.sleep(0.01)
+        return value
+
+    results = await asyncio.gather(flights.do("a", lambda: load("a")), flights.do("b", lambda: load("b")))
+
+    assert results == ["a", "b"]
+
+
+@pytest.mark.asyncio
+async def test_finished_run_is_not_reused():
+    flights = SingleFlight()
+    calls = 0
+
+    async def load():
+        nonlocal calls
+        calls += 1
+        return calls
+
+    assert await flights.do("key", load) == 1
+    assert await flights.do("key", load) == 2
+
+
+@pytest.mark.asyncio
+async def test_exception_reaches_every_waiter():
+    flights = SingleFlight()
+    calls = 0
+
+    async def load():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        raise ValueError("load failed")
+
+    results = await asyncio.gather(*(flights.do("key", load) for _ in range(5)), return_exceptions=True)
+
+    assert calls == 1
+    assert len(results) == 5
+    assert all(isinstance(result, ValueError) and str(result) == "load failed" for result in results)
+    assert not flights.in_flight("key")
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_the_run():
+    flights = SingleFlight()
+    started = asyncio.Event()
+
+    async def load():
+        started.set()
+        await asyncio.sleep(0.02)
+        return "value"
+
+    first = asyncio.create_task(flights.do("key", load))
+    await started.wait()
+    second = asyncio.create_task(flights.do("key", load))
+    await asyncio.sleep(0)
+    first.cancel()
+
+    assert await second == "value"
+    with pytest.raises(asyncio.CancelledError):
+        await first
+
+
+@pytest.mark.asyncio
+async def test_inline_run_happens_in_the_first_callers_task():
+    flights = SingleFlight(detached=False)
+    runners = []
+
+    async def load():
+        runners.append(asyncio.current_task())
+        await asyncio.sleep(0.01)
+        return "value"
+
+    first = asyncio.create_task(flights.do("key", load))
+    await asyncio.sleep(0)
+    second = asyncio.create_task(flights.do("key", load))
+
+    assert await asyncio.gather(first, second) == ["value", "value"]
+    assert runners == [first]
+    assert not flights.in_flight("key")
+
+
+@pytest.mark.asyncio
+async def test_inline_run_is_retried_by_a_waiter_when_the_first_caller_is_cancelled():
+    flights = SingleFlight(detached=False)
+    started = asyncio.Event()
+    runners = []
+
+    async def load():
+        runners.append(asyncio.current_task())
+        started.set()
+        await asyncio.sleep(0.02)
+        return "value"
+
+    first = asyncio.create_task(flights.do("key", load))
+    await started.wait()
+    second = asyncio.create_task(flights.do("key", load))
+    await asyncio.sleep(0)
+    first.cancel()
+
+    assert await second == "value"
+    assert runners == [first, second]
+    with pytest.raises(asyncio.CancelledError):
+        await first
+
+
+@pytest.mark.asyncio
+async def test_inline_exception_reaches_every_waiter():
+    flights = SingleFlight(detached=False)
+    calls = 0
+
+    async def load():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        raise ValueError("load failed")
+
+    results = await asyncio.gather(*(flights.do("key", load) for _ in range(5)), return_exceptions=True)
+
+    assert calls == 1
+    assert all(isinstance(result, ValueError) for result in results)
+    assert not flights.in_flight("key")
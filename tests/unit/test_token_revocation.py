@@ -0,0 +1,75 @@
+import pytest
+
+from app.auth.services.auth_services import AuthService
+from app.auth.statements import DELETE_USER_ACCESS_TOKENS, DELETE_USER_REFRESH_TOKENS
+from app.config.config import settings
+
+
+class FakeSession:
+    """Records executed statements and commits."""
+
+    def __init__(self):
+        self.executed = []
+        self.commits = 0
+
+    async def execute(self, statement, params=None):
+        self.executed.append((statement, params))
+
+    async def commit(self):
+        self.commits += 1
+
+
+def open_breaker(cache):
+    for _ in range(cache.breaker.failure_threshold):
+        cache.breaker.record_failure()
+
+
+@pytest.mark.asyncio
+async def test_revoke_sessions_deletes_tokens_and_bumps_generation(cache):
+    session = FakeSession()
+    await AuthService(session, cache=cache).revoke_sessions(7)
+
+    assert session.executed == [
+        (DELETE_USER_REFRESH_TOKENS, {"user_id": 7}),
+        (DELETE_USER_ACCESS_TOKENS, {"user_id": 7}),
+    ]
+    assert session.commits == 1
+    assert await cache.get_token_generation(7) == 1
+
+
+@pytest.mark.asyncio
+async def test_revoke_sessions_deletes_tokens_without_redis():
+    session = FakeSession()
+    await AuthService(session).revoke_sessions(7)
+
+    assert [statement for statement, _ in session.executed] == [DELETE_USER_REFRESH_TOKENS, DELETE_USER_ACCESS_TOKENS]
+    assert session.commits == 1
+
+
+@pytest.mark.asyncio
+async def test_bumped_generation_revokes_stateless_token(cache):
+    auth_service = AuthService(FakeSession(), cache=cache)
+    decoded = {"user_id": 7, "gen": 0}
+
+    assert not await auth_service.is_token_revoked(decoded)
+    await auth_service.bump_token_generation(7)
+    assert await auth_service.is_token_revoked(decoded)
+    assert not await auth_service.is_token_revoked({"user_id": 7, "gen": 1})
+
+
+@pytest.mark.asyncio
+async def test_persisted_tokens_are_not_checked(cache):
+    open_breaker(cache)
+
+    assert not await AuthService(FakeSession(), cache=cache).is_token_revoked({"user_id": 7})
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("fail_open", [False, True])
+async def test_outage_behaviour_follows_setting(monkeypatch, cache, fail_open):
+    monkeypatch.setattr(settings, "JWT_STATELESS_FAIL_OPEN", fail_open)
+    open_breaker(cache)
+    decoded = {"user_id": 7, "gen": 0}
+
+    assert await AuthService(FakeSession(), cache=cache).is_token_revoked(decoded) is not fail_open
+    assert await AuthService(FakeSession()).is_token_revoked(decoded) is not fail_open